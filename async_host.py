@@ -0,0 +1,228 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+
+from clock import MonotonicClock
+from scheduler import FixedStepScheduler, get_step_ms
+from simulation import InputSource, ScriptedInput
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Union
+    from board import Board
+    from button_controller import DirectionButton, ActionButton
+    from clock import Clock
+
+
+class OutputSink(ABC):
+    """
+    Receives the state of the boards of an AsyncGameHost, such as a window, a log or a socket.
+    Every method is awaited on the host's event loop, so a sink should never block
+    """
+
+    async def on_start(self, host: AsyncGameHost):
+        """
+        Called once before the first update, after every board was added
+        """
+        pass
+
+    @abstractmethod
+    async def on_tick(self, host: AsyncGameHost, simulation_time_ms: int):
+        """
+        Called after every board was updated
+        :param simulation_time_ms: The time the boards were updated with
+        """
+        ...
+
+    async def on_frame(self, host: AsyncGameHost):
+        """
+        Called whenever a frame is due, at most once per pass of the host's loop
+        """
+        pass
+
+    async def close(self):
+        """
+        Called once the host stopped running, even when it stopped because of an error
+        """
+        pass
+
+
+class QueuedInputSource(InputSource):
+    """
+    Holds button presses made at any time, such as from a key callback or a socket reader,
+    until the host applies them right before its next update
+    """
+
+    def __init__(self):
+        self._inputs: List[ScriptedInput] = []
+
+    def put(self, button: Union[DirectionButton, ActionButton], *, board_index: int):
+        # The time is only used to order inputs, every queued input is due on the next poll
+        self._inputs.append(ScriptedInput(time_ms=0, board_index=board_index, button=button))
+
+    def poll(self, current_time_ms: int) -> List[ScriptedInput]:
+        inputs, self._inputs = self._inputs, []
+        return inputs
+
+
+class AsyncGameHost:
+    """
+    Runs boards on an asyncio event loop, so any number of boards, input sources and
+    output sinks can share a single thread with other coroutines.
+
+    Note:
+        Boards are stepped with a FixedStepScheduler, the same way as Game, and between steps
+        the host sleeps on the event loop until the next step or frame is due. Boards report
+        their score to this class the same way they would to Game.
+        Several hosts can run on the same loop, each with its own update interval. The update
+        interval is shortened when a gravity rule drops tiles more often, see get_step_ms
+    """
+
+    def __init__(self, *, clock: Optional[Clock] = None, update_interval: int = 100, render_interval: int = 33,
+                 max_catch_up_updates: int = 5):
+        """
+        :param clock: Wall clock time by default. The host sleeps until the clock reaches the next step,
+            so a clock which doesn't move on its own, such as a VirtualClock, never gets there
+        """
+        self._clock: Clock = clock if clock is not None else MonotonicClock()
+        self.update_interval = update_interval
+        self.render_interval = render_interval
+        self.max_catch_up_updates = max_catch_up_updates
+        self._scheduler: Optional[FixedStepScheduler] = None
+        self._boards: List[Board] = []
+        self._input_sources: List[InputSource] = []
+        self._output_sinks: List[OutputSink] = []
+        self._tick_count = 0
+        self._is_running = False
+        self.scores: Dict[Board, int] = {}
+
+    def add_board(self, board: Board):
+        board.set_game(self)
+        self._boards.append(board)
+        self.scores[board] = 0
+
+    def get_board(self, index: int, /) -> Board:
+        if index not in range(len(self._boards)):
+            raise IndexError
+        return self._boards[index]
+
+    def get_boards(self) -> List[Board]:
+        return self._boards
+
+    def add_input_source(self, input_source: InputSource):
+        self._input_sources.append(input_source)
+
+    def add_output_sink(self, output_sink: OutputSink):
+        self._output_sinks.append(output_sink)
+
+    def get_tick_count(self) -> int:
+        return self._tick_count
+
+    def get_simulation_time(self) -> int:
+        return self._scheduler.get_simulation_time_ms() if self._scheduler is not None else 0
+
+    def get_score(self, index: int, /) -> int:
+        return self.scores[self.get_board(index)]
+
+    def update_score(self, board: Board, points: int):
+        self.scores[board] = self.scores.get(board, 0) + points
+
+    def is_game_over(self) -> bool:
+        return len(self._boards) > 0 and all(board.is_game_over() for board in self._boards)
+
+    def is_running(self) -> bool:
+        return self._is_running
+
+    def stop(self):
+        """
+        Stop running once the current step is done, can be called from any coroutine or callback on the loop
+        """
+        self._is_running = False
+
+    async def run(self, *, max_ticks: Optional[int] = None, stop_on_game_over: bool = False) -> int:
+        """
+        Update the boards every update interval until stopped
+        :param max_ticks: Upper limit of updates to run, no limit by default
+        :param stop_on_game_over: Stop once every board has reached a game over
+        :return: Number of updates which were run
+        """
+        if self._is_running:
+            raise RuntimeError("host is already running")
+        self._scheduler = FixedStepScheduler(clock=self._clock,
+                                             step_ms=get_step_ms(self.update_interval, self._boards),
+                                             render_interval_ms=self.render_interval,
+                                             max_catch_up_steps=self.max_catch_up_updates)
+        self._is_running = True
+        ticks_run = 0
+        try:
+            for output_sink in self._output_sinks:
+                await output_sink.on_start(self)
+            self._scheduler.start()
+            while self._is_running:
+                for simulation_time in self._scheduler.take_due_steps():
+                    await self._tick(simulation_time)
+                    ticks_run += 1
+                    if (max_ticks is not None and ticks_run >= max_ticks) or (stop_on_game_over and self.is_game_over()):
+                        self._is_running = False
+                    if not self._is_running:
+                        break
+
+                if self._scheduler.take_render_due():
+                    for output_sink in self._output_sinks:
+                        await output_sink.on_frame(self)
+
+                if self._is_running:
+                    await asyncio.sleep(self._scheduler.get_delay_until_next_ms() / 1000)
+        finally:
+            self._is_running = False
+            for output_sink in self._output_sinks:
+                await output_sink.close()
+        return ticks_run
+
+    async def _tick(self, simulation_time: int):
+        for input_source in self._input_sources:
+            for scripted_input in input_source.poll(simulation_time):
+                self.get_board(scripted_input.board_index).queue_input(scripted_input.button, time_ms=simulation_time)
+
+        for board in self._boards:
+            board.update(simulation_time)
+        self._tick_count += 1
+
+        for output_sink in self._output_sinks:
+            await output_sink.on_tick(self, simulation_time)
+
+
+class ScoreStreamSink(OutputSink):
+    """
+    Writes the score of every board as a line of JSON after every update, e.g. to an asyncio.StreamWriter.
+    The stream is drained after every line when it supports it, so a slow reader slows the host down
+    instead of letting the buffer grow
+    """
+
+    def __init__(self, stream: Any, *, close_stream: bool = False):
+        """
+        :param stream: Anything with a write method taking bytes
+        :param close_stream: Close the stream when the host stops
+        """
+        self._stream = stream
+        self._close_stream = close_stream
+
+    async def on_tick(self, host: AsyncGameHost, simulation_time_ms: int):
+        line = json.dumps({
+            'time_ms': simulation_time_ms,
+            'scores': [host.scores[board] for board in host.get_boards()],
+            'game_over': [board.is_game_over() for board in host.get_boards()],
+        })
+        self._stream.write(line.encode() + b'\n')
+        drain = getattr(self._stream, 'drain', None)
+        if drain is not None:
+            await drain()
+
+    async def close(self):
+        if self._close_stream:
+            self._stream.close()
+            wait_closed = getattr(self._stream, 'wait_closed', None)
+            if wait_closed is not None:
+                await wait_closed()
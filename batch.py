@@ -0,0 +1,150 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from board import Board
+from provider import derive_seed
+from simulation import HeadlessGame
+
+if TYPE_CHECKING:
+    from typing import Callable, List, Optional, Sequence, Tuple
+    from simulation import InputSource
+
+
+@dataclass(frozen=True)
+class GameConfig:
+    """
+    Everything needed to build and play a game in another process.
+
+    `apply_rules` is called as apply_rules(board, seed=...), like apply_tetris_rule, and `controller`
+    as controller(game, board_index, seed=...) to make the input source of the board, like a Bot class.
+    Both are sent to the worker processes, so they need to be picklable, such as module level functions
+    and classes, or functools.partial of them
+    """
+    apply_rules: Callable[..., None]
+    controller: Callable[..., InputSource]
+    height: int
+    width: int
+    update_interval: int = 100
+    max_ticks: int = 1000
+
+
+@dataclass(frozen=True)
+class GameResult:
+    game_index: int
+    seed: int
+    score: int
+    ticks: int
+    is_game_over: bool
+    # Wall time spent running ticks, in seconds
+    elapsed: float
+
+    def get_ticks_per_second(self) -> float:
+        return self.ticks / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """
+    The results of every game of a batch, ordered by game index, which do not depend on how many workers ran them.
+    Only the times do
+    """
+    results: Tuple[GameResult, ...]
+    # Wall time of the whole batch, in seconds
+    elapsed: float
+
+    def get_game_count(self) -> int:
+        return len(self.results)
+
+    def get_mean_score(self) -> float:
+        return sum(result.score for result in self.results) / len(self.results) if self.results else 0.0
+
+    def get_min_score(self) -> int:
+        return min((result.score for result in self.results), default=0)
+
+    def get_max_score(self) -> int:
+        return max((result.score for result in self.results), default=0)
+
+    def get_mean_ticks(self) -> float:
+        return sum(result.ticks for result in self.results) / len(self.results) if self.results else 0.0
+
+    def get_game_over_count(self) -> int:
+        return sum(1 for result in self.results if result.is_game_over)
+
+    def get_total_ticks(self) -> int:
+        return sum(result.ticks for result in self.results)
+
+    def get_ticks_per_second(self) -> float:
+        """
+        :return: Ticks run by every worker together, per second of the whole batch
+        """
+        return self.get_total_ticks() / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def get_game_seed(seed: int, game_index: int) -> int:
+    """
+    :return: The seed of a game of a batch, which only depends on its index
+    """
+    return derive_seed(seed, game_index)
+
+
+def play_game(config: GameConfig, *, seed: int, game_index: int = 0) -> GameResult:
+    """
+    Build a board from the config and play it until game over or `config.max_ticks`.
+    The rules and the controller get their own seeds derived from `seed`
+    """
+    board = Board(height=config.height, width=config.width)
+    config.apply_rules(board, seed=derive_seed(seed, 'rules'))
+    game = HeadlessGame(update_interval=config.update_interval)
+    game.add_board(board)
+    game.add_input_source(config.controller(game, 0, seed=derive_seed(seed, 'controller')))
+
+    start = time.perf_counter()
+    ticks = game.run(max_ticks=config.max_ticks)
+    elapsed = time.perf_counter() - start
+    return GameResult(game_index=game_index, seed=seed, score=game.get_score(0), ticks=ticks,
+                      is_game_over=game.is_game_over(), elapsed=elapsed)
+
+
+def run_batch(config: GameConfig, game_count: int, *, seed: int, workers: Optional[int] = None,
+              chunk_size: int = 1) -> BatchResult:
+    """
+    Play `game_count` independent games across a pool of processes.
+
+    Note:
+        Game i is played with the seed get_game_seed(seed, i), so every game plays out the same
+        no matter which worker runs it, or how many workers there are
+    :param workers: Number of processes, the number of CPUs by default. With 1 or less, games are played in this process
+    :param chunk_size: Number of games sent to a worker at once. Larger chunks cost less to send,
+        but can leave workers idle at the end of the batch when games differ in length
+    """
+    if game_count < 0:
+        raise ValueError(f"game count can't be negative, not {game_count}")
+    if chunk_size <= 0:
+        raise ValueError(f"chunk size needs to be greater than zero, not {chunk_size}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    games = [(game_index, get_game_seed(seed, game_index)) for game_index in range(game_count)]
+    chunks = [games[i:i + chunk_size] for i in range(0, len(games), chunk_size)]
+
+    start = time.perf_counter()
+    if workers <= 1 or len(chunks) <= 1:
+        results = [result for chunk in chunks for result in _play_games(config, chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            results = [result for chunk in executor.map(_play_games, [config] * len(chunks), chunks)
+                       for result in chunk]
+    elapsed = time.perf_counter() - start
+    return BatchResult(results=tuple(results), elapsed=elapsed)
+
+
+def _play_games(config: GameConfig, games: Sequence[Tuple[int, int]]) -> List[GameResult]:
+    """
+    :param games: (game index, seed) of every game to play
+    """
+    return [play_game(config, seed=game_seed, game_index=game_index) for game_index, game_seed in games]
@@ -0,0 +1,76 @@
+"""
+Plays a batch of games of an example rule set with a bot, across every core.
+
+Every game gets its own seed derived from --seed, so a batch plays out the same
+games no matter how many workers run it. Only the times differ between runs.
+
+Usage:
+    python benchmarks/run_batch.py tetris_placement --games 64 --size 20 10
+    python benchmarks/run_batch.py bejeweled_swap --games 200 --workers 4 --output results.json
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import argparse
+import json
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from batch import GameConfig, run_batch
+from bots import RandomBot, BestSwapBot, PlacementBot
+from examples.tetris import apply_tetris_rule
+from examples.bejeweled import apply_bejeweled_rule
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Sequence, Tuple
+
+_DEFAULT_SEED = 1234
+
+# name: (apply_rules, controller, update interval)
+_SETUPS: Dict[str, Tuple[Callable[..., None], Callable[..., Any], int]] = {
+    'tetris_random': (apply_tetris_rule, RandomBot, 50),
+    'tetris_placement': (apply_tetris_rule, PlacementBot, 50),
+    'bejeweled_random': (apply_bejeweled_rule, RandomBot, 100),
+    'bejeweled_swap': (apply_bejeweled_rule, BestSwapBot, 100),
+}
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Play a batch of games with a bot across a process pool')
+    parser.add_argument('setup', choices=sorted(_SETUPS))
+    parser.add_argument('--games', type=int, default=32)
+    parser.add_argument('--size', nargs=2, type=int, default=[20, 10], metavar=('HEIGHT', 'WIDTH'))
+    parser.add_argument('--max-ticks', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=_DEFAULT_SEED)
+    parser.add_argument('--workers', type=int, help='Number of processes, the number of CPUs by default')
+    parser.add_argument('--chunk-size', type=int, default=1)
+    parser.add_argument('--output', help='Write the result of every game to this JSON file')
+    args = parser.parse_args(argv)
+
+    apply_rules, controller, update_interval = _SETUPS[args.setup]
+    height, width = args.size
+    config = GameConfig(apply_rules=apply_rules, controller=controller, height=height, width=width,
+                        update_interval=update_interval, max_ticks=args.max_ticks)
+    batch = run_batch(config, args.games, seed=args.seed, workers=args.workers, chunk_size=args.chunk_size)
+
+    print(f"{batch.get_game_count()} games in {batch.elapsed:.2f}s, "
+          f"{batch.get_ticks_per_second():.1f} ticks/s across every worker")
+    print(f"score: mean {batch.get_mean_score():.1f}, min {batch.get_min_score()}, max {batch.get_max_score()}")
+    print(f"length: mean {batch.get_mean_ticks():.1f} ticks, {batch.get_game_over_count()} games over")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'config': {'setup': args.setup, 'games': args.games, 'size': args.size,
+                           'max_ticks': args.max_ticks, 'seed': args.seed},
+                'games': [{'game_index': result.game_index, 'seed': result.seed, 'score': result.score,
+                           'ticks': result.ticks, 'game_over': result.is_game_over,
+                           'ticks_per_second': result.get_ticks_per_second()} for result in batch.results],
+            }, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
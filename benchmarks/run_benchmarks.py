@@ -0,0 +1,311 @@
+"""
+Benchmarks the rule sets from the examples on boards of different sizes.
+Large boards run for fewer ticks, since a single tick can take seconds there.
+
+Every scenario builds a board with the same rules as the example games, then
+runs it headless with seeded scripted inputs, so two runs on the same machine
+play out exactly the same game. Each scenario is measured in three ways:
+for ticks per second, with profiling enabled for the time spent in each rule,
+and with tracemalloc for the memory allocated per tick. The first two are run
+--repeats times and the fastest result is kept, since other processes on the
+machine only ever make a run slower.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+
+When a baseline is given, the run fails if ticks per second drop, or if the
+median time of a rule grows, by more than the tolerance. Baselines are only
+comparable between runs on the same machine, so the machine they were recorded
+on is stored along with the results
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import argparse
+import json
+import random
+import sys
+import os
+import platform
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from board import Board
+from board_elements import Coordinate
+from button_controller import DirectionButton, ActionButton
+from simulation import HeadlessGame, ScriptedInput, ScriptedInputSource
+from constants import Color
+from provider import derive_seed
+from examples.tetris import apply_tetris_rule, TetrisTile
+from examples.bejeweled import apply_bejeweled_rule
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Optional, Sequence
+
+_DEFAULT_SIZES = (10, 25, 50, 100)
+_DEFAULT_TICKS = 100
+# Run for --large-ticks instead of --ticks
+_DEFAULT_LARGE_SIZES = (500,)
+_DEFAULT_LARGE_TICKS = 5
+_DEFAULT_REPEATS = 3
+_DEFAULT_SEED = 1234
+_DEFAULT_TOLERANCE = 0.25
+
+# Rules and runs which take less than this are too fast to compare reliably between runs
+_MIN_COMPARED_RULE_MS = 0.05
+_MIN_COMPARED_RUN_S = 0.01
+
+
+class _Scenario:
+    def __init__(self, name: str, apply_rules: Callable[..., None], *,
+                 update_interval: int, buttons: Sequence, presses_per_tick: float,
+                 prepare: Optional[Callable[[Board, random.Random], None]] = None):
+        self.name = name
+        self.apply_rules = apply_rules
+        # Places tiles on the board before the first tick
+        self.prepare = prepare
+        self.update_interval = update_interval
+        self.buttons = buttons
+        # Chance of a button being pressed on any given tick
+        self.presses_per_tick = presses_per_tick
+
+
+def _fill_alternating_rows(board: Board, rng: random.Random):
+    """
+    Fill the bottom three quarters of the board with rows which alternate
+    between full and missing a single tile, so the first tick clears half of
+    them and every row above has to be shifted down
+    """
+    for y in range(board.get_height() // 4, board.get_height()):
+        gap = rng.randrange(board.get_width()) if y % 2 == 0 else None
+        for x in range(board.get_width()):
+            if x != gap:
+                board.get_tile_at(Coordinate(x, y)).add_game_element(TetrisTile(name='Filler', color=Color.GRAY))
+
+
+_TETRIS_BUTTONS = (DirectionButton.LEFT, DirectionButton.RIGHT, DirectionButton.DOWN,
+                   ActionButton.PRIMARY, ActionButton.SECONDARY)
+
+_SCENARIOS = {
+    'tetris': _Scenario('tetris', apply_tetris_rule, update_interval=50,
+                        buttons=_TETRIS_BUTTONS, presses_per_tick=0.5),
+    'tetris_row_clear': _Scenario('tetris_row_clear', apply_tetris_rule, update_interval=50,
+                                  buttons=_TETRIS_BUTTONS, presses_per_tick=0.5,
+                                  prepare=_fill_alternating_rows),
+    'bejeweled': _Scenario('bejeweled', apply_bejeweled_rule, update_interval=100,
+                           buttons=(DirectionButton.UP, DirectionButton.DOWN, DirectionButton.LEFT,
+                                    DirectionButton.RIGHT, ActionButton.PRIMARY, ActionButton.PRIMARY),
+                           presses_per_tick=1.0),
+}
+
+
+def _make_game(scenario: _Scenario, size: int, *, ticks: int, seed: int) -> HeadlessGame:
+    board = Board(height=size, width=size)
+    # The board's providers get their own stream, so they don't depend on the inputs
+    scenario.apply_rules(board, seed=derive_seed(seed, 0))
+    input_random = random.Random(seed)
+    if scenario.prepare is not None:
+        scenario.prepare(board, input_random)
+
+    game = HeadlessGame(update_interval=scenario.update_interval)
+    game.add_board(board)
+
+    inputs = ScriptedInputSource()
+    for tick in range(ticks):
+        if input_random.random() < scenario.presses_per_tick:
+            inputs.add_input(ScriptedInput(time_ms=tick * scenario.update_interval, board_index=0,
+                                           button=input_random.choice(scenario.buttons)))
+    game.add_input_source(inputs)
+    return game
+
+
+def _measure_throughput(scenario: _Scenario, size: int, *, ticks: int, seed: int) -> Dict[str, Any]:
+    game = _make_game(scenario, size, ticks=ticks, seed=seed)
+    start = time.perf_counter()
+    ticks_run = game.run(max_ticks=ticks)
+    elapsed = time.perf_counter() - start
+    return {
+        'ticks_run': ticks_run,
+        'ticks_per_second': ticks_run / elapsed if elapsed > 0 else 0.0,
+        'score': game.get_score(0),
+        'game_over': game.is_game_over(),
+    }
+
+
+def _measure_rules(scenario: _Scenario, size: int, *, ticks: int, seed: int) -> Dict[str, Any]:
+    game = _make_game(scenario, size, ticks=ticks, seed=seed)
+    board = game.get_board(0)
+    board.enable_profiling(capacity=ticks)
+    game.run(max_ticks=ticks)
+    profiler = board.get_profiler()
+    return {
+        'stages': profiler.get_stage_summaries(),
+        'rules': profiler.get_rule_summaries(),
+    }
+
+
+def _keep_fastest(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    :return: The summary with the lowest median of every stage and rule across the runs
+    """
+    fastest: Dict[str, Any] = {'stages': {}, 'rules': {}}
+    for run in runs:
+        for kind in ('stages', 'rules'):
+            for name, summary in run[kind].items():
+                if name not in fastest[kind] or summary['p50_ms'] < fastest[kind][name]['p50_ms']:
+                    fastest[kind][name] = summary
+    return fastest
+
+
+def _measure_allocations(scenario: _Scenario, size: int, *, ticks: int, seed: int) -> Dict[str, Any]:
+    game = _make_game(scenario, size, ticks=ticks, seed=seed)
+    tracemalloc.start()
+    try:
+        allocated_per_tick: List[int] = []
+        while game.get_tick_count() < ticks and not game.is_game_over():
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            game.tick()
+            _, peak = tracemalloc.get_traced_memory()
+            allocated_per_tick.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        'mean_peak_kib_per_tick': sum(allocated_per_tick) / max(1, len(allocated_per_tick)) / 1024,
+        'max_peak_kib_per_tick': max(allocated_per_tick, default=0) / 1024,
+    }
+
+
+def get_machine_info() -> Dict[str, Any]:
+    """
+    :return: What the results depend on besides the code, to tell whether two runs can be compared
+    """
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': f'{platform.python_implementation()} {platform.python_version()}',
+    }
+
+
+def run_benchmarks(*, scenarios: Sequence[str], sizes: Sequence[int], ticks: int, seed: int,
+                   large_sizes: Sequence[int] = (), large_ticks: int = _DEFAULT_LARGE_TICKS,
+                   repeats: int = _DEFAULT_REPEATS) -> Dict[str, Any]:
+    """
+    Run every scenario at every size
+    :param large_sizes: Sizes to run for `large_ticks` instead of `ticks`
+    :param repeats: Number of times ticks per second and rule times are measured, keeping the fastest
+    :return: Results keyed by '<scenario>_<size>x<size>'
+    """
+    results: Dict[str, Any] = {}
+    for name in scenarios:
+        scenario = _SCENARIOS[name]
+        for size, size_ticks in [(size, ticks) for size in sizes] + [(size, large_ticks) for size in large_sizes]:
+            key = f'{name}_{size}x{size}'
+            print(f'Running {key}...', file=sys.stderr)
+            result = max((_measure_throughput(scenario, size, ticks=size_ticks, seed=seed) for _ in range(repeats)),
+                         key=lambda throughput: throughput['ticks_per_second'])
+            result.update(_keep_fastest([_measure_rules(scenario, size, ticks=size_ticks, seed=seed)
+                                         for _ in range(repeats)]))
+            result.update(_measure_allocations(scenario, size, ticks=size_ticks, seed=seed))
+            results[key] = result
+    return {
+        'config': {'scenarios': list(scenarios), 'sizes': list(sizes), 'ticks': ticks,
+                   'large_sizes': list(large_sizes), 'large_ticks': large_ticks, 'repeats': repeats, 'seed': seed},
+        'machine': get_machine_info(),
+        'results': results,
+    }
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any], *, tolerance: float) -> List[str]:
+    """
+    :return: A description of every regression, empty if there are none
+    """
+    regressions = []
+    for key, baseline_result in baseline['results'].items():
+        result = current['results'].get(key)
+        if result is None:
+            continue
+        if result['ticks_run'] != baseline_result['ticks_run'] or result['score'] != baseline_result['score']:
+            regressions.append(f"{key}: game played out differently than the baseline "
+                               f"(ticks {result['ticks_run']} vs {baseline_result['ticks_run']}, "
+                               f"score {result['score']} vs {baseline_result['score']})")
+
+        baseline_run_s = baseline_result['ticks_run'] / max(baseline_result['ticks_per_second'], 1e-9)
+        minimum_rate = baseline_result['ticks_per_second'] * (1 - tolerance)
+        if baseline_run_s >= _MIN_COMPARED_RUN_S and result['ticks_per_second'] < minimum_rate:
+            regressions.append(f"{key}: {result['ticks_per_second']:.1f} ticks/s, "
+                               f"baseline {baseline_result['ticks_per_second']:.1f} ticks/s")
+
+        for rule, baseline_summary in baseline_result['rules'].items():
+            summary = result['rules'].get(rule)
+            if summary is None or baseline_summary['p50_ms'] < _MIN_COMPARED_RULE_MS:
+                continue
+            if summary['p50_ms'] > baseline_summary['p50_ms'] * (1 + tolerance):
+                regressions.append(f"{key}: {rule} p50 {summary['p50_ms']:.3f}ms, "
+                                   f"baseline {baseline_summary['p50_ms']:.3f}ms")
+    return regressions
+
+
+def _print_results(results: Dict[str, Any]):
+    for key, result in results['results'].items():
+        print(f"{key}: {result['ticks_per_second']:.1f} ticks/s over {result['ticks_run']} ticks, "
+              f"{result['mean_peak_kib_per_tick']:.1f} KiB/tick")
+        for rule, summary in sorted(result['rules'].items()):
+            print(f"    {rule}: p50 {summary['p50_ms']:.3f}ms, p95 {summary['p95_ms']:.3f}ms")
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the example rule sets across board sizes')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(_SCENARIOS), default=sorted(_SCENARIOS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(_DEFAULT_SIZES))
+    parser.add_argument('--ticks', type=int, default=_DEFAULT_TICKS)
+    parser.add_argument('--large-sizes', nargs='*', type=int, default=list(_DEFAULT_LARGE_SIZES),
+                        help='Sizes to run for --large-ticks instead of --ticks')
+    parser.add_argument('--large-ticks', type=int, default=_DEFAULT_LARGE_TICKS)
+    parser.add_argument('--repeats', type=int, default=_DEFAULT_REPEATS,
+                        help='Number of runs to keep the fastest ticks per second and rule times of')
+    parser.add_argument('--seed', type=int, default=_DEFAULT_SEED)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results against this JSON file')
+    parser.add_argument('--save-baseline', help='Write the results as a new baseline to this JSON file')
+    parser.add_argument('--tolerance', type=float, default=_DEFAULT_TOLERANCE,
+                        help='Allowed slowdown as a fraction of the baseline, e.g. 0.25 for 25%%')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(scenarios=args.scenarios, sizes=args.sizes, ticks=args.ticks, seed=args.seed,
+                             large_sizes=args.large_sizes, large_ticks=args.large_ticks, repeats=args.repeats)
+    _print_results(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        config = baseline['config']
+        if (config['seed'] != args.seed or config['ticks'] != args.ticks or
+                config.get('large_ticks', args.large_ticks) != args.large_ticks):
+            print('Baseline was recorded with a different seed or tick count', file=sys.stderr)
+            return 2
+        if baseline.get('machine') != results['machine']:
+            print(f"Baseline was recorded on another machine ({baseline.get('machine')}), "
+                  f"so the times might not compare", file=sys.stderr)
+        regressions = compare_to_baseline(results, baseline, tolerance=args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+        print('No regressions against the baseline', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
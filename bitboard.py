@@ -0,0 +1,95 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from board import Board, TileChangeListener
+from board_elements import Coordinate
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional
+    from board_elements import ElementSet
+
+
+class RowOccupancy(TileChangeListener):
+    """
+    Tracks the tiles of a board as one integer per row, where bit x of
+    row y is set when the tile at (x, y) is occupied.
+
+    Two masks are kept for every row:
+        - occupied: the tile has at least one element
+        - blocked: live tiles are not able to move through the tile
+
+    Note:
+        Once set on a board with Board.set_row_occupancy, the masks are kept in
+        sync through tile change notifications, so they never need to be rebuilt
+    """
+
+    def __init__(self, board: Board):
+        self._width = board.get_width()
+        self._height = board.get_height()
+        self._full_row = (1 << self._width) - 1
+        self._occupied: List[int] = [0] * self._height
+        self._blocked: List[int] = [0] * self._height
+        for y in range(self._height):
+            for x in range(self._width):
+                self.on_tile_change(board, board.get_coordinate(x, y))
+
+    def on_tile_change(self, board: Board, coordinate: Coordinate):
+        tile = board.get_tile_at(coordinate)
+        bit = 1 << coordinate.x
+        if tile.has_elements():
+            self._occupied[coordinate.y] |= bit
+        else:
+            self._occupied[coordinate.y] &= ~bit
+        if tile.can_move_through():
+            self._blocked[coordinate.y] &= ~bit
+        else:
+            self._blocked[coordinate.y] |= bit
+
+    def on_rows_rearranged(self, board: Board, sources: List[int], coordinates: List[Coordinate]):
+        self._occupied = [self._occupied[source] for source in sources]
+        self._blocked = [self._blocked[source] for source in sources]
+
+    def get_occupied_mask(self, y: int) -> int:
+        return self._occupied[y]
+
+    def get_blocked_mask(self, y: int) -> int:
+        return self._blocked[y]
+
+    def is_row_full(self, y: int) -> bool:
+        return self._occupied[y] == self._full_row
+
+    def is_row_empty(self, y: int) -> bool:
+        return self._occupied[y] == 0
+
+    def overlaps_occupied(self, element_set: ElementSet, *, horizontal: int = 0, vertical: int = 0) -> bool:
+        """
+        Check if an element set, after being shifted, would leave the board
+        or land on a tile which has any elements
+        """
+        return self._overlaps(self._occupied, element_set, horizontal, vertical)
+
+    def overlaps_blocked(self, element_set: ElementSet, *, horizontal: int = 0, vertical: int = 0) -> bool:
+        """
+        Check if an element set, after being shifted, would leave the board
+        or land on a tile which live tiles are not able to move through
+        """
+        return self._overlaps(self._blocked, element_set, horizontal, vertical)
+
+    def _overlaps(self, row_masks: List[int], element_set: ElementSet, horizontal: int, vertical: int) -> bool:
+        set_masks = self._as_row_masks(element_set, horizontal, vertical)
+        if set_masks is None:
+            return True
+        return any(row_masks[y] & mask for y, mask in set_masks.items())
+
+    def _as_row_masks(self, element_set: ElementSet, horizontal: int, vertical: int) -> Optional[Dict[int, int]]:
+        """
+        :return: Row masks of the shifted element set, None if any element is off the board
+        """
+        set_masks: Dict[int, int] = {}
+        for pair in element_set.get_element_pairs():
+            x = pair.coordinate.x + horizontal
+            y = pair.coordinate.y + vertical
+            if not (0 <= x < self._width and 0 <= y < self._height):
+                return None
+            set_masks[y] = set_masks.get(y, 0) | (1 << x)
+        return set_masks
@@ -1,19 +1,34 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import bisect
+import time
+
 from constants import Color
-from game import Game
 from structures import Matrix
 from rules import UserInputRuleSet, GravityRule, MatchEventRule, GameOverException
 from board_elements import Coordinate
 from constants import TK_COLOR_MAP
+from profiling import BoardProfiler
 
 if TYPE_CHECKING:
-    from typing import List, Set, Optional, Iterable
+    from typing import Any, Callable, FrozenSet, List, Set, Optional, Iterable, Tuple, Union
+    from game import Game
+    from bitboard import RowOccupancy
+    from swap_index import LegalSwapIndex
     from button_controller import DirectionButton, ActionButton
     from board_elements import GameElement, ElementSet, BoardElementSet
     from shift_rules import ShiftDirection
-    from rules import TileMatchRule, TileGeneratorRule, TileMovementRule, UserInputRule, GameConditionRule
+    from rules import Rule, TileMatchRule, TileGeneratorRule, TileMovementRule, UserInputRule, GameConditionRule
+
+    # (stage name, attribute of the rule the stage is timed as, apply the stage to a board at a time)
+    UpdateStage = Tuple[str, Optional[str], Callable[[Board, int], Any]]
+
+
+# Number of matches a board resolving cascades resolves within a single update by default
+DEFAULT_MAX_CHAIN_DEPTH = 32
 
 
 class Cursor:
@@ -80,9 +95,128 @@ class Cursor:
 
 
 
+class TileChangeListener(ABC):
+    """
+    Something which needs to know when the contents of a board's tiles change.
+
+    Listeners are notified after every mutation made through a TileElement
+    which belongs to a board, including swaps made by Board.swap_tile_contents
+    """
+    @abstractmethod
+    def on_tile_change(self, board: Board, coordinate: Coordinate):
+        ...
+
+    def on_rows_rearranged(self, board: Board, sources: List[int], coordinates: List[Coordinate]):
+        """
+        Called once instead of on_tile_change when Board.rearrange_rows moved whole rows at once,
+        where row y ended up with the contents row sources[y] had.
+        By default, on_tile_change is called for every tile whose contents changed
+        :param coordinates: Every tile whose contents changed
+        """
+        for coordinate in coordinates:
+            self.on_tile_change(board, coordinate)
+
+
+class DirtyRegion:
+    """
+    The rows and columns of a board which contain at least one tile whose
+    contents changed. Rules which only care about what is new on the board
+    can restrict themselves to these lines
+    """
+    def __init__(self, coordinates: Iterable[Coordinate] = ()):
+        self._rows: Set[int] = set()
+        self._columns: Set[int] = set()
+        for coordinate in coordinates:
+            self.add(coordinate)
+
+    @classmethod
+    def whole_board(cls, board: Board) -> DirtyRegion:
+        region = cls()
+        region._rows = set(range(board.get_height()))
+        region._columns = set(range(board.get_width()))
+        return region
+
+    @classmethod
+    def from_lines(cls, rows: Iterable[int], columns: Iterable[int]) -> DirtyRegion:
+        region = cls()
+        region._rows = set(rows)
+        region._columns = set(columns)
+        return region
+
+    def add(self, coordinate: Coordinate):
+        self._rows.add(coordinate.y)
+        self._columns.add(coordinate.x)
+
+    def is_empty(self) -> bool:
+        return len(self._rows) == 0
+
+    def get_rows(self) -> Set[int]:
+        return self._rows
+
+    def get_columns(self) -> Set[int]:
+        return self._columns
+
+    def __repr__(self):
+        return f"DirtyRegion(rows={sorted(self._rows)}, columns={sorted(self._columns)})"
+
+
+@dataclass(frozen=True)
+class BoardSnapshot:
+    """
+    The state of a board at one point in time, taken with Board.take_snapshot.
+
+    Note:
+        Rows which did not change between two snapshots are the same tuple in both,
+        so keeping many snapshots of a board only costs memory for the rows which changed
+    """
+    board: Board
+    # Elements of every tile, one tuple per row
+    rows: Tuple[Tuple[Tuple[GameElement, ...], ...], ...]
+    # Live tile sets are replaced instead of modified, so the set itself is kept
+    live_tiles: Optional[BoardElementSet]
+    # (primary position, secondary position, is in swapping state), None without a cursor
+    cursor_state: Optional[Tuple[Coordinate, Optional[Coordinate], bool]]
+    is_game_over: bool
+    dirty_rows: FrozenSet[int]
+    dirty_columns: FrozenSet[int]
+    rule_states: Tuple[Tuple[Rule, Any], ...]
+    last_cascade: Optional[CascadeResult]
+
+
+@dataclass(frozen=True)
+class CascadeResult:
+    """
+    What happened while a board resolved a cascade with Board.resolve_cascade
+    """
+    # Number of tiles the match rule removed, once for every time it removed any
+    cleared_per_match: Tuple[int, ...]
+    # The board stopped changing, as opposed to the cascade being cut short
+    is_settled: bool
+
+    @property
+    def chain_depth(self) -> int:
+        return len(self.cleared_per_match)
+
+    @property
+    def cleared_tiles(self) -> int:
+        return sum(self.cleared_per_match)
+
+
 class TileElement:
     def __init__(self):
         self._elements: List[GameElement] = []
+        # Set once the tile is placed on a board. Tiles never move between
+        # cells, only their contents do, so the coordinate is fixed
+        self._board: Optional[Board] = None
+        self._coordinate: Optional[Coordinate] = None
+
+    def bind_to_board(self, board: Board, coordinate: Coordinate):
+        self._board = board
+        self._coordinate = coordinate
+
+    def _notify_change(self):
+        if self._board is not None:
+            self._board._on_tile_change(self._coordinate)
 
     def can_support_tile_spawn(self):
         """
@@ -102,6 +236,14 @@ class TileElement:
 
     def add_game_element(self, element: GameElement):
         self._elements.append(element)
+        self._notify_change()
+
+    def set_elements(self, elements: Iterable[GameElement]):
+        """
+        Replace every element of this tile
+        """
+        self._elements = list(elements)
+        self._notify_change()
 
     def has_elements(self) -> bool:
         return len(self._elements) > 0
@@ -125,9 +267,37 @@ class TileElement:
         for element in self._elements:
             if element.do_block_destroy:
                 self._elements.remove(element)
+                self._notify_change()
                 return
         # clear the tile element set
         self._elements = []
+        self._notify_change()
+
+    def swap_contents(self, other: TileElement):
+        if not self._elements and not other._elements:
+            return
+        self._elements, other._elements = other._elements, self._elements
+        self._notify_change()
+        other._notify_change()
+
+    @staticmethod
+    def rearrange_contents(tiles: List[TileElement], sources: List[int]):
+        """
+        Move the contents of tiles between each other at once, where tiles[i] ends up with the contents
+        tiles[sources[i]] had. Only tiles whose contents changed are notified
+        :param tiles: The tiles to rearrange
+        :param sources: A permutation of the indices of tiles
+        """
+        contents = [tile._elements for tile in tiles]
+        changed_tiles = []
+        for tile, source in zip(tiles, sources):
+            if tile._elements is not contents[source]:
+                # an empty tile which gets the contents of another empty tile did not change
+                if tile._elements or contents[source]:
+                    changed_tiles.append(tile)
+                tile._elements = contents[source]
+        for tile in changed_tiles:
+            tile._notify_change()
 
     def has_colors(self):
         return any(map(lambda element: element.supports_color, self._elements))
@@ -135,14 +305,40 @@ class TileElement:
     def get_colors(self) -> List[Color]:
         return [element.element_color for element in self._elements if element.supports_color]
 
+    def get_color_mask(self) -> int:
+        """
+        Returns the colors of this tile as a set of bits, where the bit
+        matching a color's value is set. Two tiles share a color when
+        their masks have a common bit
+        """
+        mask = 0
+        for element in self._elements:
+            if element.supports_color:
+                mask |= 1 << element.element_color.value
+        return mask
+
 
 class Board:
     def __init__(self, height: int, width: int):
         self._tiles: Matrix[TileElement] = Matrix(rows=height, cols=width, initializer=lambda: TileElement())
+        # A single coordinate instance per cell, shared by everything that refers to the cell
+        self._coordinates: List[List[Coordinate]] = [[Coordinate(x, y) for x in range(width)] for y in range(height)]
+        for y in range(height):
+            for x in range(width):
+                self._tiles.get_mutable(y, x).bind_to_board(self, self._coordinates[y][x])
+        self._tile_change_listeners: List[TileChangeListener] = []
+        # Contents of every row as of the last snapshot, dropped as soon as the row changes
+        self._row_snapshots: List[Optional[Tuple[Tuple[GameElement, ...], ...]]] = [None] * height
+        # Everything is unchecked until the match rule has seen the board once
+        self._dirty_region: DirtyRegion = DirtyRegion.whole_board(self)
+        self._row_occupancy: Optional[RowOccupancy] = None
+        self._legal_swap_index: Optional[LegalSwapIndex] = None
         self._match_rule: Optional[TileMatchRule] = None
         self._generator_rule: Optional[TileGeneratorRule] = None
         self._live_tiles: Optional[ElementSet] = None
         self._input_rules: List[UserInputRuleSet] = []
+        # (time, button) of every press waiting for the update at or after its time, ordered by time
+        self._input_queue: List[Tuple[int, Union[DirectionButton, ActionButton]]] = []
         self._static_move_rule: Optional[TileMovementRule] = None
         self._match_events: List[MatchEventRule] = []
         self._gravity_rule: Optional[GravityRule] = None
@@ -150,7 +346,64 @@ class Board:
         self._cursor: Optional[Cursor] = None
         self._is_game_over: bool = False
         self._game = None 
+        self._profiler: Optional[BoardProfiler] = None
+        # Calls a rule, replaced with _apply_timed_rule while profiling
+        self._apply_rule: Callable[..., Any] = _apply_rule
+        # Incremented on every tile change, so rules can tell whether they changed anything
+        self._change_count: int = 0
+        self._do_resolve_cascades: bool = False
+        self._max_chain_depth: Optional[int] = None
+        self._last_cascade: Optional[CascadeResult] = None
     
+    def enable_profiling(self, capacity: int = 1024):
+        """
+        Start recording how long every stage of update takes
+        :param capacity: Number of recent updates the durations are kept for
+        """
+        self._profiler = BoardProfiler(capacity)
+        self._apply_rule = self._apply_timed_rule
+
+    def disable_profiling(self):
+        self._profiler = None
+        self._apply_rule = _apply_rule
+
+    def get_profiler(self) -> Optional[BoardProfiler]:
+        return self._profiler
+
+    def enable_cascade_resolution(self, *, max_chain_depth: Optional[int] = DEFAULT_MAX_CHAIN_DEPTH):
+        """
+        Resolve every cascade within a single update with resolve_cascade, instead of
+        running the match, generate and move rules once per update
+        :param max_chain_depth: Number of matches a single update resolves at most. A cascade cut short
+            keeps its dirty region, so the next update carries on with it. None never cuts a cascade short,
+            which never returns when every refill makes another match
+        """
+        if max_chain_depth is not None and max_chain_depth <= 0:
+            raise ValueError(f"chain depth needs to be greater than zero, not {max_chain_depth}")
+        self._do_resolve_cascades = True
+        self._max_chain_depth = max_chain_depth
+
+    def get_max_chain_depth(self) -> Optional[int]:
+        return self._max_chain_depth
+
+    def disable_cascade_resolution(self):
+        self._do_resolve_cascades = False
+
+    def is_cascade_resolution_enabled(self) -> bool:
+        return self._do_resolve_cascades
+
+    def get_last_cascade(self) -> Optional[CascadeResult]:
+        """
+        :return: The cascade resolved by the last update, None if cascade resolution is not enabled
+        """
+        return self._last_cascade
+
+    def get_change_count(self) -> int:
+        """
+        :return: Number of tile changes since the board was made. Only useful to compare with an earlier count
+        """
+        return self._change_count
+
     def set_game(self, game: Game):
         """Set the reference to the Game instance."""
         self._game = game
@@ -176,6 +429,44 @@ class Board:
     def get_cursor(self) -> Cursor:
         return self._cursor
 
+    def add_tile_change_listener(self, listener: TileChangeListener):
+        self._tile_change_listeners.append(listener)
+
+    def remove_tile_change_listener(self, listener: TileChangeListener):
+        self._tile_change_listeners.remove(listener)
+
+    def set_row_occupancy(self, row_occupancy: RowOccupancy):
+        """
+        Keep a bitmask of the occupied cells of every row alongside the tiles.
+        Rules which check for full rows or collisions use it when it is set
+        """
+        if self._row_occupancy is not None:
+            self.remove_tile_change_listener(self._row_occupancy)
+        self._row_occupancy = row_occupancy
+        self.add_tile_change_listener(row_occupancy)
+
+    def set_legal_swap_index(self, swap_index: LegalSwapIndex):
+        """
+        Keep an index of the legal swaps alongside the tiles, shared by everything which needs one,
+        see swap_index.get_legal_swap_index. A previous index stops being updated
+        """
+        if self._legal_swap_index is not None:
+            self.remove_tile_change_listener(self._legal_swap_index)
+        self._legal_swap_index = swap_index
+        self.add_tile_change_listener(swap_index)
+
+    def has_legal_swap_index(self) -> bool:
+        return self._legal_swap_index is not None
+
+    def get_legal_swap_index(self) -> LegalSwapIndex:
+        return self._legal_swap_index
+
+    def has_row_occupancy(self) -> bool:
+        return self._row_occupancy is not None
+
+    def get_row_occupancy(self) -> RowOccupancy:
+        return self._row_occupancy
+
     def set_tile_match_rule(self, match_rule: TileMatchRule):
         self._match_rule = match_rule
 
@@ -185,36 +476,94 @@ class Board:
     def set_tile_generator_rule(self, generator_rule: TileGeneratorRule):
         self._generator_rule = generator_rule
 
+    def get_tile_generator_rule(self) -> Optional[TileGeneratorRule]:
+        return self._generator_rule
+
     def add_user_input_rule(self, input_rule: UserInputRule, *, input_set: Set[DirectionButton | ActionButton]):
         self._input_rules.append(UserInputRuleSet(input_rule, input_set))
 
     def set_static_tile_move_rule(self, move_rule: TileMovementRule):
         self._static_move_rule = move_rule
 
+    def get_static_tile_move_rule(self) -> Optional[TileMovementRule]:
+        return self._static_move_rule
+
     def get_static_tile_move_direction(self) -> Optional[ShiftDirection]:
         return self._static_move_rule.get_shift_direction() if self._static_move_rule is not None else None
 
     def set_gravity_rule(self, gravity_rule: GravityRule):
         self._gravity_rule = gravity_rule
 
+    def get_gravity_rule(self) -> Optional[GravityRule]:
+        return self._gravity_rule
+
     def add_match_event_rule(self, match_event: MatchEventRule):
         self._match_events.append(match_event)
 
+    def get_match_event_rules(self) -> List[MatchEventRule]:
+        return self._match_events
+
     def add_game_condition_rule(self, game_condition: GameConditionRule):
         self._game_condition.append(game_condition)
 
     def get_user_input_rules(self) -> Iterable[UserInputRuleSet]:
         return self._input_rules
 
+    def get_user_input_rule(self, button: Union[DirectionButton, ActionButton]) -> Optional[UserInputRule]:
+        """
+        :return: The input rule which handles a button, the last one added when several handle it
+        """
+        input_rule = None
+        for ruleset in self._input_rules:
+            if button in ruleset.input_set:
+                input_rule = ruleset.input_rule
+        return input_rule
+
+    def queue_input(self, button: Union[DirectionButton, ActionButton], *, time_ms: int = 0):
+        """
+        Queue a button press, to be handled at the start of the first update at or after `time_ms`.
+        Presses are handled in the order of their time, then in the order they were queued,
+        and any run of presses of the same button is handed to its input rule at once,
+        see UserInputRule.handle_repeated_input. Presses are ignored once the game is over
+        """
+        if self._is_game_over:
+            return
+        bisect.insort_right(self._input_queue, (time_ms, button), key=lambda queued_input: queued_input[0])
+
+    def has_queued_inputs(self) -> bool:
+        return len(self._input_queue) > 0
+
     def get_height(self) -> int:
         return self._tiles.rows
 
     def get_width(self) -> int:
         return self._tiles.cols
 
+    def get_coordinate(self, x: int, y: int) -> Coordinate:
+        """
+        Returns the board's own coordinate of a cell, so looking up a cell
+        does not create a new coordinate every time.
+        Coordinates outside the board are not kept, and are created on every call
+        """
+        if 0 <= y < self._tiles.rows and 0 <= x < self._tiles.cols:
+            return self._coordinates[y][x]
+        return Coordinate(x, y)
+
     def get_tile_at(self, coordinate: Coordinate) -> TileElement:
         return self._tiles.get_mutable(coordinate.y, coordinate.x)
 
+    def get_dirty_region(self) -> DirtyRegion:
+        """
+        Returns the region of tiles which changed since the match rule last checked the board
+        """
+        return self._dirty_region
+
+    def get_tile_row(self, y: int) -> List[TileElement]:
+        return self._tiles.get_row_mutable(y)
+
+    def get_tile_column(self, x: int) -> List[TileElement]:
+        return self._tiles.get_column_mutable(x)
+
     def is_valid_coordinate(self, coordinate: Coordinate):
         return (coordinate.x in range(self._tiles.cols) and
                 coordinate.y in range(self._tiles.rows))
@@ -226,37 +575,230 @@ class Board:
         :param c1: coordinate 1
         :param c2: coordinate 2
         """
-        self._tiles.swap(c1.y, c1.x, c2.y, c2.x)
+        self.get_tile_at(c1).swap_contents(self.get_tile_at(c2))
+
+    def rearrange_rows(self, sources: List[int]):
+        """
+        Move the contents of whole rows at once, where row y ends up with the contents row sources[y] had.
+        Listeners are notified once with TileChangeListener.on_rows_rearranged instead of once per tile
+        :param sources: A permutation of the row indices
+        """
+        moved_rows = {source: [tile._elements for tile in self._tiles.get_row_mutable(source)]
+                      for y, source in enumerate(sources) if source != y}
+        row_snapshots = self._row_snapshots[:]
+        changed_coordinates = []
+        for y, source in enumerate(sources):
+            if source == y:
+                continue
+            for x, (tile, elements) in enumerate(zip(self._tiles.get_row_mutable(y), moved_rows[source])):
+                if tile._elements is not elements:
+                    if tile._elements or elements:
+                        changed_coordinates.append(self._coordinates[y][x])
+                    tile._elements = elements
+            # The contents did not change, only where they are
+            self._row_snapshots[y] = row_snapshots[source]
+        if not changed_coordinates:
+            return
+
+        self._change_count += len(changed_coordinates)
+        for coordinate in changed_coordinates:
+            self._dirty_region.add(coordinate)
+        for listener in self._tile_change_listeners:
+            listener.on_rows_rearranged(self, sources, changed_coordinates)
 
     def lock_live_tiles_to_board(self):
         for pair in self._live_tiles.get_element_pairs():
             self.get_tile_at(pair.coordinate).add_game_element(pair.element)
         self._live_tiles = None
 
+    def take_snapshot(self) -> BoardSnapshot:
+        """
+        Save the tiles, live tiles, cursor, rule state and last cascade of the board, so it can be restored later.
+        Rows which did not change since the last snapshot are shared with it instead of being copied
+
+        Note:
+            Queued input is not saved, and the change count keeps counting up, as restoring changes tiles too
+        """
+        for y, row_snapshot in enumerate(self._row_snapshots):
+            if row_snapshot is None:
+                self._row_snapshots[y] = tuple(tuple(element.spawn() for element in tile._elements)
+                                               for tile in self._tiles.get_row_mutable(y))
+        cursor_state = None
+        if self._cursor is not None:
+            cursor_state = (self._cursor.get_primary_position(), self._cursor.get_secondary_position(),
+                            self._cursor.is_in_swapping_state())
+        return BoardSnapshot(
+            board=self,
+            rows=tuple(self._row_snapshots),
+            live_tiles=self._live_tiles,
+            cursor_state=cursor_state,
+            is_game_over=self._is_game_over,
+            dirty_rows=frozenset(self._dirty_region.get_rows()),
+            dirty_columns=frozenset(self._dirty_region.get_columns()),
+            rule_states=tuple((rule, rule.save_state()) for rule in self._get_rules()),
+            last_cascade=self._last_cascade,
+        )
+
+    def restore_snapshot(self, snapshot: BoardSnapshot):
+        """
+        Bring the board back to the state it was in when the snapshot was taken.
+        Only rows which changed since then are written, and listeners are notified
+        of every tile which changed. Queued input is dropped, since it was meant for the state before the restore
+        """
+        if snapshot.board is not self:
+            raise ValueError("snapshot was taken from a different board")
+        for y, row_snapshot in enumerate(snapshot.rows):
+            if self._row_snapshots[y] is row_snapshot:
+                continue
+            for tile, elements in zip(self._tiles.get_row_mutable(y), row_snapshot):
+                if len(tile._elements) != len(elements) or any(a is not b for a, b in zip(tile._elements, elements)):
+                    tile.set_elements(element.spawn() for element in elements)
+            self._row_snapshots[y] = row_snapshot
+
+        self._live_tiles = snapshot.live_tiles
+        if snapshot.cursor_state is None:
+            self._cursor = None
+        else:
+            primary, secondary, is_in_swapping_state = snapshot.cursor_state
+            self._cursor = Cursor()
+            self._cursor.set_primary_position(primary)
+            if is_in_swapping_state:
+                self._cursor.set_swapping_state()
+            self._cursor.set_secondary_position(secondary)
+        self._is_game_over = snapshot.is_game_over
+        self._last_cascade = snapshot.last_cascade
+        self._input_queue.clear()
+
+        # Restoring the tiles marked them as changed, although the match rule only has to check what it
+        # had not checked when the snapshot was taken
+        self._dirty_region = DirtyRegion.from_lines(snapshot.dirty_rows, snapshot.dirty_columns)
+        for rule, state in snapshot.rule_states:
+            rule.restore_state(state)
+
+    def _get_rules(self) -> List[Rule]:
+        rules = [self._match_rule, self._generator_rule, self._static_move_rule, self._gravity_rule]
+        rules.extend(self._match_events)
+        rules.extend(self._game_condition)
+        rules.extend(ruleset.input_rule for ruleset in self._input_rules)
+        return [rule for rule in rules if rule is not None]
+
+    def _on_tile_change(self, coordinate: Coordinate):
+        self._change_count += 1
+        self._row_snapshots[coordinate.y] = None
+        self._dirty_region.add(coordinate)
+        for listener in self._tile_change_listeners:
+            listener.on_tile_change(self, coordinate)
+
     def update(self, time_ms: int) -> None:
         """
         update the game after a single tick has passed
         """
         if not self._is_game_over:
             try:
-                self._try_apply_match_rule()
-                self._try_apply_generate_rule()
-                self._try_apply_move_rules()
-                self._try_apply_gravity_rule(time_ms)
-                self._try_apply_game_condition_rule()
+                if self._profiler is not None:
+                    self._profiled_update(time_ms)
+                    return
+                for _, _, apply_stage in self._get_update_stages():
+                    apply_stage(self, time_ms)
             except GameOverException:
                 self._is_game_over = True
                 self._cursor = None
 
-    def _try_apply_match_rule(self):
-        if self._match_rule is None:
+    def _get_update_stages(self) -> Tuple[UpdateStage, ...]:
+        return _CASCADE_UPDATE_STAGES if self._do_resolve_cascades else _UPDATE_STAGES
+
+    def _profiled_update(self, time_ms: int):
+        """
+        Same as the stages of update, while recording how long each takes
+        """
+        profiler = self._profiler
+        update_start = time.perf_counter_ns()
+        try:
+            for stage, rule_attribute, apply_stage in self._get_update_stages():
+                start = time.perf_counter_ns()
+                try:
+                    apply_stage(self, time_ms)
+                finally:
+                    duration = time.perf_counter_ns() - start
+                    profiler.record_stage(stage, duration)
+                    rule = getattr(self, rule_attribute) if rule_attribute is not None else None
+                    if rule is not None:
+                        profiler.record_rule(rule, duration)
+        finally:
+            profiler.record_stage('update', time.perf_counter_ns() - update_start)
+
+    def _apply_timed_rule(self, rule: object, apply, *args, **kwargs):
+        """
+        Same as _apply_rule, while recording how long the rule takes
+        """
+        start = time.perf_counter_ns()
+        try:
+            return apply(*args, **kwargs)
+        finally:
+            self._profiler.record_rule(rule, time.perf_counter_ns() - start)
+
+    def resolve_cascade(self, *, max_chain_depth: Optional[int] = None) -> CascadeResult:
+        """
+        Run the match rule and its events, then the generate and move rules until no tile changes,
+        over and over until the match rule has nothing left to check, so the board is stable.
+        Every match scores the same as it does in update, so a longer chain scores more
+        :param max_chain_depth: Stop once the match rule removed tiles this many times
+        :return: The tiles removed by every match of the cascade
+        """
+        cleared_per_match: List[int] = []
+        while True:
+            destroyed_tiles = self._try_apply_match_rule()
+            if destroyed_tiles:
+                cleared_per_match.append(len(destroyed_tiles))
+            # Refilled tiles might have to fall before the generator can place more
+            while True:
+                change_count = self._change_count
+                if self._generator_rule is not None:
+                    self._apply_rule(self._generator_rule, self._try_apply_generate_rule)
+                if self._static_move_rule is not None:
+                    self._apply_rule(self._static_move_rule, self._try_apply_move_rules)
+                if self._change_count == change_count:
+                    break
+            if self._match_rule is None or self._dirty_region.is_empty():
+                return CascadeResult(cleared_per_match=tuple(cleared_per_match), is_settled=True)
+            if max_chain_depth is not None and len(cleared_per_match) >= max_chain_depth:
+                return CascadeResult(cleared_per_match=tuple(cleared_per_match), is_settled=False)
+
+    def _try_apply_queued_inputs(self, time_ms: int):
+        if not self._input_queue:
             return
-        destroyed_tiles = self._match_rule.remove_matches(self)
+        due_count = bisect.bisect_right(self._input_queue, time_ms, key=lambda queued_input: queued_input[0])
+        due_buttons = [button for _, button in self._input_queue[:due_count]]
+        del self._input_queue[:due_count]
+
+        start = 0
+        while start < len(due_buttons):
+            button = due_buttons[start]
+            end = start + 1
+            while end < len(due_buttons) and due_buttons[end] == button:
+                end += 1
+            input_rule = self.get_user_input_rule(button)
+            if input_rule is not None:
+                self._apply_rule(input_rule, input_rule.handle_repeated_input, self, event=button,
+                                 count=end - start)
+            start = end
+
+    def _try_apply_match_rule(self) -> Set[Coordinate]:
+        """
+        :return: The coordinates of every tile the match rule removed
+        """
+        if self._match_rule is None or self._dirty_region.is_empty():
+            return set()
+        # Any tile destroyed from here on should be checked on the next tick
+        dirty_region, self._dirty_region = self._dirty_region, DirtyRegion()
+        destroyed_tiles = self._apply_rule(self._match_rule, self._match_rule.remove_matches_in_region,
+                                           self, dirty_region)
         if len(destroyed_tiles) > 0:
             if self._game:
                 self._game.update_score(self,1)
             for event in self._match_events:
-                event.trigger(self, destroyed_tiles)
+                self._apply_rule(event, event.trigger, self, destroyed_tiles)
+        return destroyed_tiles
 
     def _try_apply_generate_rule(self):
         if self._generator_rule is None or ( generated_tiles := self._generator_rule.produce_tiles(self) ) is None:
@@ -274,4 +816,32 @@ class Board:
 
     def _try_apply_game_condition_rule(self):
         for condition in self._game_condition:
-            condition.check_game_condition(self)
+            self._apply_rule(condition, condition.check_game_condition, self)
+
+
+def _apply_rule(rule: object, apply, *args, **kwargs):
+    """
+    Call a rule. Boards call their rules through this, or through Board._apply_timed_rule while profiling
+    """
+    return apply(*args, **kwargs)
+
+
+def _apply_cascade_stage(board: Board, time_ms: int):
+    board._last_cascade = board.resolve_cascade(max_chain_depth=board._max_chain_depth)
+
+
+# Every stage of Board.update, in order. Stages without a rule attribute time their own rules,
+# since several rules can run inside them
+_UPDATE_STAGES: Tuple[UpdateStage, ...] = (
+    ('input', None, Board._try_apply_queued_inputs),
+    ('match', None, lambda board, time_ms: board._try_apply_match_rule()),
+    ('generate', '_generator_rule', lambda board, time_ms: board._try_apply_generate_rule()),
+    ('move', '_static_move_rule', lambda board, time_ms: board._try_apply_move_rules()),
+    ('gravity', '_gravity_rule', Board._try_apply_gravity_rule),
+    ('game_condition', None, lambda board, time_ms: board._try_apply_game_condition_rule()),
+)
+# Same as _UPDATE_STAGES, with the match, generate and move stages resolved as a whole cascade
+_CASCADE_UPDATE_STAGES: Tuple[UpdateStage, ...] = (
+    _UPDATE_STAGES[0],
+    ('cascade', None, _apply_cascade_stage),
+) + _UPDATE_STAGES[4:]
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-import copy
 from typing import TYPE_CHECKING, Any
 
+import copy
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List
+from typing import ClassVar, List
 
 from constants import Color
 
@@ -36,6 +36,18 @@ class GameElement(ABC):
     supports_move_through: bool = field(default=False)
     # The element "absorbs" a destroy
     do_block_destroy: bool = field(default=False)
+    # Element types which change after being placed on a board need their own copy in every tile.
+    # Every other element is a flyweight, and the same instance is shared between tiles
+    has_mutable_state: ClassVar[bool] = False
+
+    def spawn(self) -> GameElement:
+        """
+        Returns an element to place on a board.
+        Elements without mutable state are returned as they are, others are copied
+        """
+        if self.has_mutable_state:
+            return copy.deepcopy(self)
+        return self
 
     @abstractmethod
     def draw(self, canvas, x1: int, y1: int, x2: int, y2: int):
@@ -72,14 +84,22 @@ class ElementSet(ABC):
     def has_elements(self) -> bool:
         return len(self._elements) > 0
 
+    def spawn(self) -> ElementSet:
+        """
+        Returns a set which can be moved and rotated without affecting this one.
+        Coordinates are immutable so they are shared, and every element is spawned
+        """
+        spawned_set = self.__class__()
+        for pair in self._elements:
+            spawned_set.add_element(pair.element.spawn(), pair.coordinate)
+        return spawned_set
+
     @classmethod
     def shift_elements(cls, e_set: ElementSet, *, horizontal: int = 0, vertical: int = 0) -> ElementSet:
         shifted_set = e_set.__class__()
         for pair in e_set.get_element_pairs():
-            shift_coordinate = copy.deepcopy(pair.coordinate)
-            shift_coordinate.x += horizontal
-            shift_coordinate.y += vertical
-            shifted_set.add_element(pair.element, shift_coordinate)
+            shifted_set.add_element(pair.element, Coordinate(pair.coordinate.x + horizontal,
+                                                             pair.coordinate.y + vertical))
         return shifted_set
 
     def __repr__(self):
@@ -121,7 +141,7 @@ class RelativeElementSet(ElementSet):
 
         # plain 90 degree rotation
         for pair in self.get_element_pairs():
-            pair.coordinate.x, pair.coordinate.y = -1 * pair.coordinate.y, pair.coordinate.x
+            pair.coordinate = Coordinate(-1 * pair.coordinate.y, pair.coordinate.x)
 
         # reorganize the origin to the new top right
         top_right = Coordinate(
@@ -140,7 +160,7 @@ class RelativeElementSet(ElementSet):
 
         # plain 90 degree rotation
         for pair in self.get_element_pairs():
-            pair.coordinate.x, pair.coordinate.y = pair.coordinate.y, -1 * pair.coordinate.x
+            pair.coordinate = Coordinate(pair.coordinate.y, -1 * pair.coordinate.x)
 
         # reorganize the origin to the new top right
         top_right = Coordinate(
@@ -169,8 +189,13 @@ class BoardElementSet(ElementSet):
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Coordinate:
+    """
+    A position on a board, or relative to another position.
+    Coordinates are immutable and hashable, so they can be shared and stored in sets.
+    Boards keep a single instance per cell, see Board.get_coordinate
+    """
     x: int
     y: int
 
@@ -184,7 +209,9 @@ class Coordinate:
             return NotImplemented
         return Coordinate(self.x - other.x, self.y - other.y)
 
-    def __eq__(self, other: Any) -> bool:
-        if not isinstance(other, Coordinate):
-            return False
-        return self.x == other.x and self.y == other.y
+    # Immutable, so copies can share the same instance
+    def __copy__(self) -> Coordinate:
+        return self
+
+    def __deepcopy__(self, memo) -> Coordinate:
+        return self
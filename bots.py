@@ -0,0 +1,140 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import random
+from abc import abstractmethod
+
+from button_controller import DirectionButton, ActionButton
+from input_rules import RotateLiveTilesRule
+from placement import enumerate_placements
+from simulation import InputSource, ScriptedInput
+from swap_solver import SwapSolver
+
+if TYPE_CHECKING:
+    from typing import List, Optional, Sequence, Union
+    from board import Board
+    from placement import Placement
+    from simulation import HeadlessGame
+
+    Button = Union[DirectionButton, ActionButton]
+
+
+class Bot(InputSource):
+    """
+    Presses buttons for a single board of a headless game, based on what is on the board.
+    Every button is pressed before the update it is polled for, the same as a scripted input
+    """
+
+    def __init__(self, game: HeadlessGame, board_index: int = 0, *, seed: Optional[int] = None):
+        self._game = game
+        self._board_index = board_index
+        self._random = random.Random(seed)
+
+    def poll(self, current_time_ms: int) -> List[ScriptedInput]:
+        board = self._game.get_board(self._board_index)
+        if board.is_game_over():
+            return []
+        return [ScriptedInput(time_ms=current_time_ms, board_index=self._board_index, button=button)
+                for button in self.choose_buttons(board)]
+
+    @abstractmethod
+    def choose_buttons(self, board: Board) -> List[Button]:
+        """
+        :return: Buttons to press before the next update, in order
+        """
+        ...
+
+
+class RandomBot(Bot):
+    """
+    Presses a random button on some updates
+    """
+
+    def __init__(self, game: HeadlessGame, board_index: int = 0, *, seed: Optional[int] = None,
+                 buttons: Sequence[Button] = tuple(DirectionButton.as_set() | ActionButton.as_set()),
+                 presses_per_tick: float = 0.5):
+        super().__init__(game, board_index, seed=seed)
+        # sets have no stable order between processes, so the buttons are sorted by name
+        self._buttons = sorted(buttons, key=str)
+        self._presses_per_tick = presses_per_tick
+
+    def choose_buttons(self, board: Board) -> List[Button]:
+        if self._random.random() < self._presses_per_tick:
+            return [self._random.choice(self._buttons)]
+        return []
+
+
+class BestSwapBot(Bot):
+    """
+    Moves the cursor to the swap found by a SwapSolver and makes it, once the board stopped changing
+    """
+
+    def __init__(self, game: HeadlessGame, board_index: int = 0, *, seed: Optional[int] = None,
+                 max_cascade_depth: int = 3):
+        super().__init__(game, board_index, seed=seed)
+        self._solver = SwapSolver(max_cascade_depth=max_cascade_depth)
+
+    def choose_buttons(self, board: Board) -> List[Button]:
+        if not board.get_dirty_region().is_empty():
+            return []
+        best = self._solver.find_best_swap(board)
+        if best is None:
+            return []
+
+        cursor = board.get_cursor()
+        buttons: List[Button] = []
+        if cursor.is_in_swapping_state():
+            buttons.append(ActionButton.SECONDARY)
+        position = cursor.get_primary_position()
+        dx, dy = best.first.x - position.x, best.first.y - position.y
+        buttons += [DirectionButton.RIGHT if dx > 0 else DirectionButton.LEFT] * abs(dx)
+        buttons += [DirectionButton.DOWN if dy > 0 else DirectionButton.UP] * abs(dy)
+        buttons.append(ActionButton.PRIMARY)
+        buttons.append(DirectionButton.RIGHT if best.second.x > best.first.x else DirectionButton.DOWN)
+        buttons.append(ActionButton.PRIMARY)
+        return buttons
+
+
+class PlacementBot(Bot):
+    """
+    Steers the live tiles to the placement with the best weighted sum of its features,
+    turning them one rotation per update, then shifting and dropping them in one go.
+    The placement is chosen again on every update, so the bot follows the tiles as they fall
+    """
+
+    def __init__(self, game: HeadlessGame, board_index: int = 0, *, seed: Optional[int] = None,
+                 lines_cleared_weight: float = 0.76, holes_weight: float = -0.36,
+                 aggregate_height_weight: float = -0.51, bumpiness_weight: float = -0.18):
+        super().__init__(game, board_index, seed=seed)
+        self._weights = (lines_cleared_weight, holes_weight, aggregate_height_weight, bumpiness_weight)
+
+    def choose_buttons(self, board: Board) -> List[Button]:
+        if not board.has_live_tiles():
+            return []
+        placements = enumerate_placements(board, rotate_rule=self._get_rotate_rule(board))
+        if not placements:
+            return []
+        best = max(placements, key=self._rate)
+
+        if best.rotation == 3:
+            return [ActionButton.SECONDARY]
+        if best.rotation != 0:
+            return [ActionButton.PRIMARY]
+        position = board.get_live_tiles().get_top_right()
+        dx = best.x - position.x
+        buttons: List[Button] = [DirectionButton.RIGHT if dx > 0 else DirectionButton.LEFT] * abs(dx)
+        # the tiles lock once they are pushed down any further
+        buttons += [DirectionButton.DOWN] * (best.y - position.y)
+        return buttons
+
+    def _rate(self, placement: Placement) -> float:
+        lines_cleared_weight, holes_weight, aggregate_height_weight, bumpiness_weight = self._weights
+        return (placement.lines_cleared * lines_cleared_weight + placement.holes * holes_weight +
+                placement.aggregate_height * aggregate_height_weight + placement.bumpiness * bumpiness_weight)
+
+    @staticmethod
+    def _get_rotate_rule(board: Board) -> Optional[RotateLiveTilesRule]:
+        for ruleset in board.get_user_input_rules():
+            if ActionButton.PRIMARY in ruleset.input_set and isinstance(ruleset.input_rule, RotateLiveTilesRule):
+                return ruleset.input_rule
+        return None
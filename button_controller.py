@@ -3,10 +3,10 @@ from __future__ import annotations
 from enum import Enum
 from typing import TYPE_CHECKING
 from abc import ABC, abstractmethod
-import tkinter as tk
 
 if TYPE_CHECKING:
-    from typing import Any, Optional, Callable, Dict, List
+    import tkinter as tk
+    from typing import Any, Optional, Callable, Dict, List, Tuple
 
 DEFAULT_KEYBOARD_KEYBINDS = {
     'UP' : 'Up',
@@ -68,7 +68,18 @@ class StateError(BaseException):
 
 
 class _KeyboardControllerManager:
-    _keyboard_methods: List[Callable[[tk.Event], None]] = []
+    """
+    Routes the key presses of a window to every keyboard controller.
+
+    Note:
+        Every key is looked up in a single map from keysym to the buttons bound to it,
+        so a key press costs the same no matter how many controllers there are, and keys
+        which are not bound to anything are dropped right away. The map is rebuilt on the
+        first key press after any controller changed its keybinds or button functions
+    """
+    _keyboard_controllers: List[KeyboardController] = []
+    # keysym -> (button, function) of every controller which binds it, None when it has to be rebuilt
+    _dispatch_map: Optional[Dict[str, List[Tuple[DirectionButton | ActionButton, Callable[[Any], Any]]]]] = None
     is_bound_to_window: bool = False
     _window_to_bind: Optional[tk.Tk] = None
 
@@ -78,13 +89,35 @@ class _KeyboardControllerManager:
             _KeyboardControllerManager._window_to_bind = window
 
     @staticmethod
-    def add_keyboard_input_handler(handler: Callable[[tk.Event], None]):
-        _KeyboardControllerManager._keyboard_methods.append(handler)
+    def add_keyboard_controller(controller: KeyboardController):
+        _KeyboardControllerManager._keyboard_controllers.append(controller)
+        _KeyboardControllerManager.invalidate()
+
+    @staticmethod
+    def invalidate():
+        """
+        Rebuild the dispatch map on the next key press
+        """
+        _KeyboardControllerManager._dispatch_map = None
 
     @staticmethod
     def run_methods(event: tk.Event):
-        for method in _KeyboardControllerManager._keyboard_methods:
-            method(event)
+        dispatch_map = _KeyboardControllerManager._dispatch_map
+        if dispatch_map is None:
+            dispatch_map = _KeyboardControllerManager._dispatch_map = _KeyboardControllerManager._build_dispatch_map()
+        handlers = dispatch_map.get(event.keysym)
+        if handlers is None:
+            return
+        for button, fn in handlers:
+            fn(button)
+
+    @staticmethod
+    def _build_dispatch_map() -> Dict[str, List[Tuple[DirectionButton | ActionButton, Callable[[Any], Any]]]]:
+        dispatch_map: Dict[str, List[Tuple[DirectionButton | ActionButton, Callable[[Any], Any]]]] = {}
+        for controller in _KeyboardControllerManager._keyboard_controllers:
+            for keysym, button, fn in controller.get_key_handlers():
+                dispatch_map.setdefault(keysym, []).append((button, fn))
+        return dispatch_map
 
     @staticmethod
     def start():
@@ -94,6 +127,15 @@ class _KeyboardControllerManager:
             _KeyboardControllerManager._window_to_bind.bind('<KeyPress>', _KeyboardControllerManager.run_methods)
 
 
+# Order in which a keyboard controller checks its keybinds, only the first button bound to a key is pressed by it
+_KEYBIND_ORDER = (DirectionButton.UP, DirectionButton.DOWN, DirectionButton.LEFT, DirectionButton.RIGHT,
+                  ActionButton.PRIMARY, ActionButton.SECONDARY)
+
+
+def _raise_missing_function(button: DirectionButton | ActionButton):
+    raise KeyError(button)
+
+
 class KeyboardController(ButtonController):
     """
     Default keymaps for tkinter
@@ -101,36 +143,44 @@ class KeyboardController(ButtonController):
     def __init__(self):
         super().__init__()
         self._keybinds_set: bool = False
-        _KeyboardControllerManager.add_keyboard_input_handler(lambda event: self._handle_button_event(event))
+        _KeyboardControllerManager.add_keyboard_controller(self)
+
+    def on_button(self, *, button: DirectionButton | ActionButton, fn: Callable[[DirectionButton | ActionButton], Any]):
+        super().on_button(button=button, fn=fn)
+        _KeyboardControllerManager.invalidate()
 
     def export_keybind(self) -> Dict[str, str]:
         return self._keybinds
 
     def set_keybinds(self, keybinds: Dict[str, str]):
-        self._keybinds = keybinds
+        """
+        :param keybinds: Keysym of every button, by button name. The keybinds are copied,
+            so changing them afterwards takes another call
+        """
+        self._keybinds = dict(keybinds)
         self._keybinds_set = True
+        _KeyboardControllerManager.invalidate()
 
     def bind_to_board_window(self, window: tk.Tk):
         _KeyboardControllerManager.set_window_to_bind(window)
 
-    def _handle_button_event(self, event: tk.Event):
-        if event.keysym == self._keybinds['UP']:
-            self._direction_fn_map[DirectionButton.UP](DirectionButton.UP)
-
-        elif event.keysym == self._keybinds['DOWN']:
-            self._direction_fn_map[DirectionButton.DOWN](DirectionButton.DOWN)
-
-        elif event.keysym == self._keybinds['LEFT']:
-            self._direction_fn_map[DirectionButton.LEFT](DirectionButton.LEFT)
-
-        elif event.keysym == self._keybinds['RIGHT']:
-            self._direction_fn_map[DirectionButton.RIGHT](DirectionButton.RIGHT)
-
-        elif event.keysym == self._keybinds['PRIMARY']:
-            self._action_fn_map[ActionButton.PRIMARY](ActionButton.PRIMARY)
-
-        elif event.keysym == self._keybinds['SECONDARY']:
-            self._action_fn_map[ActionButton.SECONDARY](ActionButton.SECONDARY)
+    def get_key_handlers(self) -> List[Tuple[str, DirectionButton | ActionButton, Callable[[Any], Any]]]:
+        """
+        :return: (keysym, button, function) of every button which is bound to a key. Pressing a key whose button
+            has no function raises KeyError, the same as checking the keybinds one by one did
+        """
+        if not self._keybinds_set:
+            return []
+        handlers = []
+        used_keysyms = set()
+        for button in _KEYBIND_ORDER:
+            keysym = self._keybinds.get(str(button))
+            if keysym is None or keysym in used_keysyms:
+                continue
+            used_keysyms.add(keysym)
+            fn_map = self._direction_fn_map if isinstance(button, DirectionButton) else self._action_fn_map
+            handlers.append((keysym, button, fn_map.get(button, _raise_missing_function)))
+        return handlers
 
     def pause_controller(self):
         pass
@@ -139,4 +189,3 @@ class KeyboardController(ButtonController):
         if not self._keybinds_set:
             raise StateError('Keyboard controller keybinds were not set')
         _KeyboardControllerManager.start()
-
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+
+
+class Clock(ABC):
+    """
+    A source of time for anything that drives board updates.
+
+    Boards only ever see time as an integer number of milliseconds, so
+    implementing classes are free to decide where that time comes from
+    """
+
+    @abstractmethod
+    def now_ms(self) -> int:
+        """
+        :return: The current time in milliseconds
+        """
+        ...
+
+
+class MonotonicClock(Clock):
+    """
+    Wall clock time which is guaranteed to never go backwards
+    """
+
+    def now_ms(self) -> int:
+        return time.monotonic_ns() // 1_000_000
+
+
+class VirtualClock(Clock):
+    """
+    A clock which only moves when it is told to. This allows a game to be
+    simulated as fast as possible while the rules still see time passing
+    at the expected rate
+    """
+
+    def __init__(self, start_ms: int = 0):
+        self._current_ms = start_ms
+
+    def now_ms(self) -> int:
+        return self._current_ms
+
+    def advance(self, delta_ms: int):
+        if delta_ms < 0:
+            raise ValueError(f"a clock cannot go backwards, delta_ms={delta_ms}")
+        self._current_ms += delta_ms
@@ -1,8 +1,48 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
 from board import Board
+from match_rules import MatchNOfColorRule
 from rules import GameConditionRule, NoMoreMatchesPossibleException
+from swap_index import get_legal_swap_index
+
+if TYPE_CHECKING:
+    from swap_index import LegalSwapIndex
 
 
 class CheckIfMatchPossibleRule(GameConditionRule):
+    """
+    Ends the game once the board has settled and there is no swap
+    of two neighbouring tiles which would make a match.
+
+    Note:
+        The board is considered settled when every tile has an element and
+        nothing changed since the match rule last checked the board. Until then,
+        new matches can still appear on their own.
+        Swaps are checked against the match length of the board's MatchNOfColorRule,
+        `match_length` is only used when the board has another match rule
+    """
+    def __init__(self, match_length: int = 3):
+        self._match_length = match_length
+
+    def set_match_length(self, match_length: int):
+        self._match_length = match_length
+
+    def get_match_length(self, board: Board) -> int:
+        match_rule = board.get_tile_match_rule()
+        if isinstance(match_rule, MatchNOfColorRule):
+            return match_rule.get_match_length()
+        return self._match_length
+
+    def get_swap_index(self, board: Board) -> LegalSwapIndex:
+        """
+        Returns the board's index of legal swaps, which is rebuilt whenever the match length changes
+        """
+        return get_legal_swap_index(board, self.get_match_length(board))
+
     def check_game_condition(self, board: Board):
-        # Algorithm was too complex so this was not done
-        pass
\ No newline at end of file
+        swap_index = self.get_swap_index(board)
+        if swap_index.has_empty_tiles() or not board.get_dirty_region().is_empty():
+            return
+        if not swap_index.has_legal_swaps():
+            raise NoMoreMatchesPossibleException()
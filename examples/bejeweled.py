@@ -1,3 +1,4 @@
+from __future__ import annotations
 from typing import TYPE_CHECKING
 import math
 
@@ -11,43 +12,45 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from generator_rules import FillAllSpotsRule, FillEmptyTopRowSpotsRule
 from input_rules import CursorApplyDirectionRule, CursorApplySelectionRule
 from match_rules import MatchNOfColorRule
-from game import Game
 from button_controller import KeyboardController, DirectionButton, ActionButton
 from board import Board
 from board_elements import  GameElement
+from sprite_cache import CachedSpriteElement, Sprite
 from provider import UniformRandomElementProvider
 from constants import Color, darken_color, TK_COLOR_MAP
 from shift_rules import ShiftStaticTilesRule, ShiftDirection
 from user import User
 
 if TYPE_CHECKING:
-    pass
+    from typing import List, Optional, Tuple
 
 
-class Gem(GameElement):
+class Gem(CachedSpriteElement):
     def __init__(self, *, name: str, color: Color):
         self.element_name = name
         self.element_color = color
 
-    def draw(self, canvas, x1: int, y1: int, x2: int, y2: int):
+    def make_sprite(self, width: float, height: float) -> Sprite:
         # Get the corresponding tkinter color
         tile_color = TK_COLOR_MAP.get(self.element_color, "white")
+        outline_color = darken_color(self.element_color, percentage=25)
+        # The sprite is drawn relative to the top left corner of the tile
+        x1, y1, x2, y2 = 0, 0, width, height
         if self.element_name == 'GemRed':
             #Diamond
-            tile_width = x2 - x1
-            tile_height = y2 - y1
-            center_x = x1 + tile_width // 2
-            center_y = y1 + tile_height // 2
+            center_x = x1 + width // 2
+            center_y = y1 + height // 2
             points = [
                 (center_x, y1 + 5),
                 (x2 - 5, center_y),
-                (center_x, y2 - 5), 
+                (center_x, y2 - 5),
                 (x1 + 5, center_y)
             ]
-            canvas.create_polygon(points, fill=tile_color, outline=darken_color(self.element_color, percentage=25), width=2)
+            return _polygon_sprite(points, fill=tile_color, outline=outline_color)
         elif self.element_name == 'GemOrange':
             #Circle
-            canvas.create_oval(x1 + 5, y1 + 5, x2 - 5, y2 - 5, fill=tile_color, outline=darken_color(self.element_color, percentage=25), width=2)
+            return Sprite(item_type='oval', points=(x1 + 5, y1 + 5, x2 - 5, y2 - 5),
+                          options=(('fill', tile_color), ('outline', outline_color), ('width', 2)))
         elif self.element_name == 'GemGreen':
             #Triangle
             center_x = (x1 + x2) // 2
@@ -56,19 +59,10 @@ class Gem(GameElement):
                 (x1 + 10, y2 - 10),
                 (x2 - 10, y2 - 10)
             ]
-            canvas.create_polygon(points, fill=tile_color, outline=darken_color(self.element_color, percentage=25), width=2)
+            return _polygon_sprite(points, fill=tile_color, outline=outline_color)
         elif self.element_name == 'GemBlue':
             #Pentagon
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-            radius = min((x2 - x1), (y2 - y1)) // 2.5
-            points = []
-            for i in range(5):
-                angle = math.radians(90 + i * 72)
-                px = center_x + radius * math.cos(angle)
-                py = center_y - radius * math.sin(angle)
-                points.append((px, py))
-            canvas.create_polygon(points, fill=tile_color, outline=darken_color(self.element_color, percentage=25), width=2)
+            return _polygon_sprite(_regular_polygon_points(width, height, sides=5), fill=tile_color, outline=outline_color)
         elif self.element_name == 'GemPurple':
             #Upsidedown Triangle
             center_x = (x1 + x2) // 2
@@ -77,22 +71,33 @@ class Gem(GameElement):
                 (x2 - 10, y1 + 10),
                 (center_x, y2 - 10)
             ]
-            canvas.create_polygon(points, fill=tile_color, outline=darken_color(self.element_color, percentage=25), width=2)
+            return _polygon_sprite(points, fill=tile_color, outline=outline_color)
         elif self.element_name == 'GemWhite':
             # Octagon
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-            radius = min((x2 - x1), (y2 - y1)) // 2.5
-            points = []
-            for i in range(6):
-                angle = math.radians(90 + i * 60)
-                px = center_x + radius * math.cos(angle)
-                py = center_y - radius * math.sin(angle)
-                points.append((px, py))
-            canvas.create_polygon(points, fill=tile_color, outline=darken_color(self.element_color, percentage=25), width=2)
+            return _polygon_sprite(_regular_polygon_points(width, height, sides=6), fill=tile_color, outline=outline_color)
         else:
             #Square
-            canvas.create_rectangle(x1 + 10, y1 + 10, x2 - 10, y2 - 10, fill=tile_color, outline=darken_color(self.element_color, percentage=25), width=3)
+            return Sprite(item_type='rectangle', points=(x1 + 10, y1 + 10, x2 - 10, y2 - 10),
+                          options=(('fill', tile_color), ('outline', outline_color), ('width', 3)))
+
+
+def _polygon_sprite(points: List[Tuple[float, float]], *, fill: str, outline: str) -> Sprite:
+    return Sprite(item_type='polygon',
+                  points=tuple(value for point in points for value in point),
+                  options=(('fill', fill), ('outline', outline), ('width', 2)))
+
+
+def _regular_polygon_points(width: float, height: float, *, sides: int) -> List[Tuple[float, float]]:
+    center_x = width // 2
+    center_y = height // 2
+    radius = min(width, height) // 2.5
+    points = []
+    for i in range(sides):
+        angle = math.radians(90 + i * 360 / sides)
+        px = center_x + radius * math.cos(angle)
+        py = center_y - radius * math.sin(angle)
+        points.append((px, py))
+    return points
 
 # class Blocker(GameElement):
 #     def __init__(self):
@@ -106,10 +111,10 @@ class Gem(GameElement):
 #         canvas.create_rectangle(x1, y1, x2, y2, fill="gray", outline="black", width=3)
 
 
-def apply_bejeweled_rule(board: Board):
+def apply_bejeweled_rule(board: Board, *, seed: Optional[int] = None):
     # Set rules dictating how tiles are meant to be filled up
     generate_rule = FillEmptyTopRowSpotsRule()
-    provider: UniformRandomElementProvider[GameElement] = UniformRandomElementProvider()
+    provider: UniformRandomElementProvider[GameElement] = UniformRandomElementProvider(seed=seed)
     provider.add_choice(option=Gem(name='GemRed', color=Color.RED))
     provider.add_choice(option=Gem(name='GemOrange', color=Color.ORANGE))
     provider.add_choice(option=Gem(name='GemYellow', color=Color.YELLOW))
@@ -150,6 +155,9 @@ def apply_bejeweled_rule(board: Board):
     board.add_game_condition_rule(CheckIfMatchPossibleRule())
 
 if __name__ == '__main__':
+    # tkinter is only needed when the game is played in a window
+    from game import Game
+
     game = Game()
 
     board1 = Board(height=10, width=10)
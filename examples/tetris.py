@@ -6,34 +6,39 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from game import Game
 from board import Board
-from board_elements import GameElement, RelativeElementSet, Coordinate
+from board_elements import RelativeElementSet, Coordinate
 from button_controller import KeyboardController, DirectionButton, ActionButton
 
 from input_rules import HorizontalShiftLiveTileRule, DownwardsShiftLiveTileRule, RotateLiveTilesRule, DoNothingRule
 from match_rules import MatchARowRule, ShiftToFillRowEventRule, MatchNOfColorRule
 from generator_rules import DropElementSetRule
 from provider import RandomRepeatingQueueElementProvider
+from rotation import RotationTable, WALL_KICK_OFFSETS
 from gravity_rules import DownwardGravityRule
-from constants import Color, darken_color
+from constants import Color, darken_color, TK_COLOR_MAP
+from bitboard import RowOccupancy
+from sprite_cache import CachedSpriteElement, Sprite
 from user import User
 
 if TYPE_CHECKING:
-    pass
+    from typing import Optional
 
 
-class TetrisTile(GameElement):
+class TetrisTile(CachedSpriteElement):
     def __init__(self, *, name: str, color: Color):
         self.element_name = name
         self.element_color = color
 
-    def draw(self, canvas, x1: int, y1: int, x2: int, y2: int):
-        # Get the corresponding tkinter color
-        from constants import TK_COLOR_MAP
-        tile_color = TK_COLOR_MAP.get(self.element_color, "white")
+    def make_sprite(self, width: float, height: float) -> Sprite:
         # Draw a colored rectangle with black border
-        canvas.create_rectangle(x1, y1, x2, y2, fill=tile_color, outline=darken_color(self.element_color, percentage=20), width=3)
+        return Sprite(
+            item_type='rectangle',
+            points=(0, 0, width, height),
+            options=(('fill', TK_COLOR_MAP.get(self.element_color, "white")),
+                     ('outline', darken_color(self.element_color, percentage=20)),
+                     ('width', 3))
+        )
 
 
 light_blue_tile = TetrisTile(name="LightBlueTile", color=Color.LIGHT_BLUE)
@@ -89,12 +94,22 @@ l_block.add_element(orange_tile, Coordinate(0, 2))
 l_block.add_element(orange_tile, Coordinate(1, 2))
 
 
-def apply_tetris_rule(board: Board):
+def apply_tetris_rule(board: Board, *, seed: Optional[int] = None):
+    # Track occupied cells per row so full rows and collisions are cheap to check
+    board.set_row_occupancy(RowOccupancy(board))
+
     # User input rules
     board.add_user_input_rule(HorizontalShiftLiveTileRule(), input_set={DirectionButton.LEFT, DirectionButton.RIGHT})
     board.add_user_input_rule(DownwardsShiftLiveTileRule(), input_set={DirectionButton.DOWN})
     board.add_user_input_rule(DoNothingRule(), input_set={DirectionButton.UP})
-    board.add_user_input_rule(RotateLiveTilesRule(), input_set={ActionButton.PRIMARY, ActionButton.SECONDARY})
+    # Every rotation of every piece is looked up instead of computed, and
+    # pieces next to a wall are pushed away from it when they rotate
+    rotation_table = RotationTable()
+    for piece in (line_block, o_block, t_block, s_block, z_block, l_block, j_block):
+        rotation_table.add_element_set(piece)
+    rotate_rule = RotateLiveTilesRule(rotation_table)
+    rotate_rule.set_kick_offsets(WALL_KICK_OFFSETS)
+    board.add_user_input_rule(rotate_rule, input_set={ActionButton.PRIMARY, ActionButton.SECONDARY})
 
     # Tile matching rules
     match_rule = MatchARowRule()
@@ -106,7 +121,7 @@ def apply_tetris_rule(board: Board):
 
     # Board tile generation rules
     generator = DropElementSetRule()
-    tetris_tile_provider = RandomRepeatingQueueElementProvider()
+    tetris_tile_provider = RandomRepeatingQueueElementProvider(seed=seed)
     tetris_tile_provider.add_choice(line_block)
     tetris_tile_provider.add_choice(o_block)
     tetris_tile_provider.add_choice(t_block)
@@ -124,6 +139,9 @@ def apply_tetris_rule(board: Board):
 
 
 if __name__ == '__main__':
+    # tkinter is only needed when the game is played in a window
+    from game import Game
+
     game = Game()
 
     board1 = Board(height=40, width=10)
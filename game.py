@@ -3,23 +3,24 @@ from typing import TYPE_CHECKING
 
 from dataclasses import dataclass
 import tkinter as tk
-import time
 
-from button_controller import ButtonController
-from board_elements import Coordinate
+from button_controller import ButtonController, DirectionButton, ActionButton
+from clock import MonotonicClock
 from constants import TK_COLOR_MAP
+from renderer import BoardRenderer
+from scheduler import FixedStepScheduler, get_step_ms
 from constants import Color
 
 if TYPE_CHECKING:
-    from typing import List
+    from typing import List, Optional, Tuple, Union
     from board import Board
-
-_GAME_OVER_TEXT = 'Game Over!'
+    from replay import InputRecorder
 
 @dataclass
 class BoardWindow:
     board: Board
     canvas: tk.Canvas
+    renderer: BoardRenderer
 
 class Game:
     TOTAL_BOARD_WIDTH = 500
@@ -30,9 +31,14 @@ class Game:
         self._window.attributes('-topmost', True)
 
         self._window.title("Tile Matching Game")
-        self.update_interval = 100  # 100ms (10 updates per second)
+        # 100ms (10 updates per second), shortened when a gravity rule drops tiles more often, see get_step_ms
+        self.update_interval = 100
+        self.render_interval = 33  # ~30 frames per second, independent of the update rate
+        self.max_catch_up_updates = 5  # updates allowed back to back when the game falls behind
+        self._scheduler: Optional[FixedStepScheduler] = None
         self._boards: List[BoardWindow] = []
         self._controllers: List[ButtonController] = []
+        self._input_recorder: Optional[InputRecorder] = None
 
         self.scores = {}
         self.score_labels = {}
@@ -44,29 +50,38 @@ class Game:
         self.score_labels[board].config(text=f"Score: {self.scores[board]}")
 
 
+    def record_inputs(self, recorder: InputRecorder):
+        """
+        Write every button press routed to a board to the recorder, so the game can be replayed.
+        The recorder is closed when the window is closed
+        """
+        self._input_recorder = recorder
+
     def bind(self, controller: ButtonController, *, board_index: int):
         board = self.get_board(board_index)
         self._controllers.append(controller)
         for ruleset in board.get_user_input_rules():
             for button in ruleset.input_set:
-                # If you want to know why this looks weird, look up "lambda late binding"
-                controller.on_button(button=button,
-                                     fn=lambda event, rs=ruleset: rs.input_rule.handle_input(board, event=event))
+                controller.on_button(button=button, fn=lambda event: self._handle_input(board_index, event))
 
-    def add_board(self, board: Board):
-        frame = tk.Frame(self._window, bg="black")
-        frame.grid(row=0, column=len(self._boards), padx=20, pady=10)  
+    def _handle_input(self, board_index: int, event: Union[DirectionButton, ActionButton]):
+        board = self.get_board(board_index)
+        if board.is_game_over():
+            return
+        # The press takes effect at the start of the next update, which is when it is replayed as well
+        simulation_time = self._get_simulation_time()
+        if self._input_recorder is not None:
+            self._input_recorder.record(simulation_time, board_index, event)
+        board.queue_input(event, time_ms=simulation_time)
 
-        score_label = tk.Label(frame, text=f"Score: 0", font=("Arial", 16, "bold"), bg="black", fg="white")
-        score_label.pack(pady=5) 
+    def _get_simulation_time(self) -> int:
+        return self._scheduler.get_simulation_time_ms() if self._scheduler is not None else 0
 
-        canvas = tk.Canvas(frame, width=Game.TOTAL_BOARD_WIDTH, height=Game.TOTAL_BOARD_HEIGHT, bg=TK_COLOR_MAP[Color.BLACK])
+    def add_board(self, board: Board):
         board.set_game(self)  
-        board_window = BoardWindow(board=board, canvas=canvas)
+        board_window, score_label = make_board_window(self._window, board, column=len(self._boards))
 
         self._boards.append(board_window)
-        
-        canvas.pack()
 
         self.score_labels[board] = score_label
         self.scores[board] = 0
@@ -88,92 +103,57 @@ class Game:
 
     @staticmethod
     def _render_board(board_window: BoardWindow):
-        board = board_window.board
-        canvas = board_window.canvas
-
-        # Calculate individual tile dimensions to stretch and fill the fixed board area
-        board_height = board.get_height()
-        board_width = board.get_width()
-
-        # Instead of using min to get square cells, calculate separate dimensions
-        # This will stretch tiles to fill the entire board area
-        cell_width = Game.TOTAL_BOARD_WIDTH / board_width
-        cell_height = Game.TOTAL_BOARD_HEIGHT / board_height
-
-        # First, clear the canvas to prevent overlapping elements
-        canvas.delete("all")
-
-        # Draw the grid and static tiles
-        for y in range(board.get_height()):
-            for x in range(board.get_width()):
-                # Calculate coordinates using separate width/height
-                x1 = x * cell_width
-                x2 = x1 + cell_width
-                y1 = y * cell_height
-                y2 = y1 + cell_height
-
-                canvas.create_rectangle(x1, y1, x2, y2, outline=TK_COLOR_MAP[Color.WHITE], width=0)
-
-                tile_element = board.get_tile_at(Coordinate(x,y))
-                if tile_element and tile_element.has_elements():
-                    elements = tile_element.get_elements()
-                    # Use each element's draw method instead of drawing directly
-                    for element in elements:
-                        element.draw(canvas, x1, y1, x2, y2)
-
-        # Draw any live tiles on top of the static board elements
-        if board.has_live_tiles():
-            live_tiles = board.get_live_tiles()
-            for pair in live_tiles.get_element_pairs():
-                coord = pair.coordinate
-                # Use separate width/height for live tiles too
-                x1 = coord.x * cell_width
-                x2 = x1 + cell_width
-                y1 = coord.y * cell_height
-                y2 = y1 + cell_height
-
-                # Draw the live tile (similar to static tiles)
-                element = pair.element
-                element.draw(canvas, x1, y1, x2, y2)
-
-        # Draw cursor on board if supported by game
-        if board.has_cursor():
-            board.get_cursor().draw(canvas, cell_height, cell_width)
-
-        if board.is_game_over():
-            Game._write_game_over(canvas)
-
-    @staticmethod
-    def _write_game_over(canvas: tk.Canvas):
-        canvas.create_text(
-            Game.TOTAL_BOARD_WIDTH // 2,
-            Game.TOTAL_BOARD_HEIGHT // 2,
-            text=_GAME_OVER_TEXT,
-            anchor='center',
-            fill=TK_COLOR_MAP[Color.RED],
-            font=('Impact', min(Game.TOTAL_BOARD_WIDTH // 7, Game.TOTAL_BOARD_HEIGHT // 7))
-        )
+        board_window.renderer.render()
 
     def update(self):
         """Update game state and redraw."""
-        # Apply gravity if needed
-        current_time = int(time.time() * 1000)  # Get current time in milliseconds
-
-        for board_window in self._boards:
-            board_window.board.update(current_time)
+        # Boards are updated with the simulation time, which moves forward by
+        # exactly one update interval per update, even when an update runs late
+        for simulation_time in self._scheduler.take_due_steps():
+            for board_window in self._boards:
+                board_window.board.update(simulation_time)
 
         # Redraw the board
-        self._render_boards()
-        
+        if self._scheduler.take_render_due():
+            self._render_boards()
+
         # Schedule the next update
-        self._window.after(self.update_interval, self.update)
+        self._window.after(self._scheduler.get_delay_until_next_ms(), self.update)
 
     def start(self):
         for controller in self._controllers:
             controller.start_controller()
-        
+
+        self._scheduler = FixedStepScheduler(clock=MonotonicClock(),
+                                             step_ms=get_step_ms(self.update_interval,
+                                                                 [board_window.board for board_window in self._boards]),
+                                             render_interval_ms=self.render_interval,
+                                             max_catch_up_steps=self.max_catch_up_updates)
+        self._scheduler.start()
+
         # Start the update loop
         self.update()
 
         # Start the main event loop
         self._window.mainloop()
+
+        for board_window in self._boards:
+            board_window.renderer.detach()
+        if self._input_recorder is not None:
+            self._input_recorder.close(self._get_simulation_time())
+
+
+def make_board_window(window: tk.Tk, board: Board, *, column: int) -> Tuple[BoardWindow, tk.Label]:
+    """
+    Add a score label and a canvas drawing the board to the window
+    """
+    frame = tk.Frame(window, bg="black")
+    frame.grid(row=0, column=column, padx=20, pady=10)
+
+    score_label = tk.Label(frame, text=f"Score: 0", font=("Arial", 16, "bold"), bg="black", fg="white")
+    score_label.pack(pady=5)
+
+    canvas = tk.Canvas(frame, width=Game.TOTAL_BOARD_WIDTH, height=Game.TOTAL_BOARD_HEIGHT, bg=TK_COLOR_MAP[Color.BLACK])
+    renderer = BoardRenderer(board, canvas, width=Game.TOTAL_BOARD_WIDTH, height=Game.TOTAL_BOARD_HEIGHT)
+    canvas.pack()
+    return BoardWindow(board=board, canvas=canvas, renderer=renderer), score_label
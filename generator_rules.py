@@ -8,7 +8,7 @@ from provider import ElementProvider
 from rules import TileGeneratorRule, ElementGenerationFailException
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Any, Optional
 
 
 class FillEmptyTopRowSpotsRule(TileGeneratorRule):
@@ -18,16 +18,27 @@ class FillEmptyTopRowSpotsRule(TileGeneratorRule):
     def set_provider(self, provider: ElementProvider[GameElement]):
         self._provider = provider
 
+    def get_provider(self) -> Optional[ElementProvider[GameElement]]:
+        return self._provider
+
+    def save_state(self) -> Any:
+        return self._provider.save_state() if self._provider is not None else None
+
+    def restore_state(self, state: Any):
+        if self._provider is not None:
+            self._provider.restore_state(state)
+
     def produce_tiles(self, board: Board) -> Optional[BoardElementSet]:
         if self._provider is None:
             raise ValueError("Element Provider is missing")
         # Check the top row of the board has any sports which
         # can have a tiled spawn on them
         top_row_elements = BoardElementSet()
+        spawn_coordinates = [board.get_coordinate(x, 0) for x in range(board.get_width())
+                             if board.get_tile_at(board.get_coordinate(x, 0)).can_support_tile_spawn()]
 
-        for x in range(board.get_width()):
-            if board.get_tile_at(Coordinate(x, 0)).can_support_tile_spawn():
-                top_row_elements.add_element(self._provider.provide(), Coordinate(x=x, y=0))
+        for coordinate, element in zip(spawn_coordinates, self._provider.provide_many(len(spawn_coordinates))):
+            top_row_elements.add_element(element, coordinate)
 
         return top_row_elements if top_row_elements.has_elements() else None
 
@@ -39,6 +50,19 @@ class DropElementSetRule(TileGeneratorRule):
     def set_provider(self, provider: ElementProvider[RelativeElementSet]):
         self._provider = provider
 
+    def get_provider(self) -> Optional[ElementProvider[RelativeElementSet]]:
+        """
+        The provider of upcoming element sets, which can be peeked at to preview the next pieces
+        """
+        return self._provider
+
+    def save_state(self) -> Any:
+        return self._provider.save_state() if self._provider is not None else None
+
+    def restore_state(self, state: Any):
+        if self._provider is not None:
+            self._provider.restore_state(state)
+
     def produce_tiles(self, board: Board) -> None:
         if self._provider is None:
             raise ValueError("Element Provider is missing")
@@ -71,12 +95,17 @@ class FillAllSpotsRule(TileGeneratorRule):
     def set_provider(self, provider: ElementProvider[GameElement]):
         self._provider = provider
 
+    def save_state(self) -> Any:
+        return self._provider.save_state() if self._provider is not None else None
+
+    def restore_state(self, state: Any):
+        if self._provider is not None:
+            self._provider.restore_state(state)
+
     def produce_tiles(self, board: Board) -> Optional[BoardElementSet]:
         generated_tiles = BoardElementSet()
-        for y in range(board.get_height()):
-            for x in range(board.get_width()):
-                target_coordinate = Coordinate(x, y)
-                if board.get_tile_at(target_coordinate).can_support_tile_spawn():
-                    new_tile = self._provider.provide()
-                    generated_tiles.add_element(new_tile, target_coordinate)
+        spawn_coordinates = [board.get_coordinate(x, y) for y in range(board.get_height()) for x in range(board.get_width())
+                             if board.get_tile_at(board.get_coordinate(x, y)).can_support_tile_spawn()]
+        for coordinate, new_tile in zip(spawn_coordinates, self._provider.provide_many(len(spawn_coordinates))):
+            generated_tiles.add_element(new_tile, coordinate)
         return generated_tiles if generated_tiles.has_elements() else None
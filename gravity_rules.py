@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from board import Board
 from board_elements import Coordinate, BoardElementSet
+from input_rules import _can_move_live_tiles
 from rules import GravityRule
 
 
@@ -20,31 +21,20 @@ class DownwardGravityRule(GravityRule):
             self._drop_piece(board)
             self.last_drop_time = current_time
 
+    def save_state(self) -> int:
+        return self.last_drop_time
+
+    def restore_state(self, state: int):
+        self.last_drop_time = state
+
     def _drop_piece(self, board: Board):
         """Move the piece down one cell."""
         direction = Coordinate(0, 1)  # Down
         live_tiles = board.get_live_tiles()
         new_positions = BoardElementSet()
 
-        # Check if downward movement is valid
-        can_move = True
-        for pair in live_tiles.get_element_pairs():
-            new_pos = pair.coordinate + direction
-
-            # Check if new position is out of bounds
-            if new_pos.y >= board.get_height():
-                can_move = False
-                break
-
-            # Check collision with static elements
-            tile = board.get_tile_at(new_pos)
-            if tile and tile.has_elements():
-                # If there's any element in this tile, we can't move there
-                can_move = False
-                break
-
         # If can move down, update positions
-        if can_move:
+        if _can_move_live_tiles(board, live_tiles, direction):
             for pair in live_tiles.get_element_pairs():
                 new_pos = pair.coordinate + direction
                 new_positions.add_element(pair.element, new_pos)
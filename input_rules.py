@@ -1,17 +1,67 @@
-from typing import Union
+from typing import Optional, Sequence, Tuple, Union
 
-from board import Board
-from board_elements import RelativeElementSet, BoardElementSet, Coordinate
+from board import Board, DirtyRegion
+from board_elements import BoardElementSet, Coordinate, ElementSet
 from button_controller import DirectionButton, ActionButton
+from rotation import RotationTable, get_shape
 from rules import UserInputRule
 
 
+def _can_move_live_tiles(board: Board, live_tiles: BoardElementSet, direction: Coordinate) -> bool:
+    """Check if the live tiles can move in a direction without a collision."""
+    if board.has_row_occupancy():
+        return not board.get_row_occupancy().overlaps_occupied(
+            live_tiles, horizontal=direction.x, vertical=direction.y)
+
+    for pair in live_tiles.get_element_pairs():
+        new_pos = pair.coordinate + direction
+
+        # Check boundaries
+        if (new_pos.x < 0 or new_pos.x >= board.get_width() or
+                new_pos.y < 0 or new_pos.y >= board.get_height()):
+            return False
+
+        # Check collision with static elements
+        tile = board.get_tile_at(new_pos)
+        if tile and tile.has_elements():
+            # If there's any element in this tile, we can't move there
+            return False
+    return True
+
+
 class DoNothingRule(UserInputRule):
     def handle_input(self, board: Board, *, event: Union[DirectionButton, ActionButton]):
         pass
 
 
 class RotateLiveTilesRule(UserInputRule):
+    """
+    Rotates the live tiles clockwise with the primary button, and counterclockwise with the secondary one.
+
+    Note:
+        Rotations are looked up in a RotationTable. When the rotated tiles do not fit where they are,
+        each kick offset is tried in order and the first one which fits is used. There are no
+        kick offsets by default, so a rotation which does not fit is refused
+    """
+    def __init__(self, rotation_table: Optional[RotationTable] = None):
+        self._rotation_table = rotation_table if rotation_table is not None else RotationTable()
+        self._kick_offsets: Tuple[Tuple[int, int], ...] = ((0, 0),)
+
+    def get_rotation_table(self) -> RotationTable:
+        return self._rotation_table
+
+    def set_kick_offsets(self, kick_offsets: Sequence[Tuple[int, int]]):
+        """
+        :param kick_offsets: (x, y) offsets to try when the rotated tiles do not fit where they are
+        """
+        self._kick_offsets = ((0, 0),) + tuple(offset for offset in kick_offsets if offset != (0, 0))
+
+    def get_kick_offsets(self) -> Tuple[Tuple[int, int], ...]:
+        """
+        :return: Every offset which is tried, starting with no offset at all
+        """
+        return self._kick_offsets
+
     def handle_input(self, board: Board, *, event: Union[DirectionButton, ActionButton]):
         if not board.has_live_tiles():
             return
@@ -19,69 +69,65 @@ class RotateLiveTilesRule(UserInputRule):
             return
 
         tile_set: BoardElementSet = board.get_live_tiles()
-        rotated_set: RelativeElementSet = tile_set.as_relative_coordinates()
-        if event is ActionButton.PRIMARY:
-            rotated_set.rotate_clockwise()
-        elif event is ActionButton.SECONDARY:
-            rotated_set.rotate_counterclockwise()
-
-        rotated_test_set: BoardElementSet = rotated_set.as_board_coordinates(board, tile_set.get_top_right())
-        for pair in rotated_test_set.get_element_pairs():
-            if (not board.is_valid_coordinate(pair.coordinate) or
-                    not board.get_tile_at(pair.coordinate).can_move_through()):
+        top_right = tile_set.get_top_right()
+        rotated_shape = self._rotation_table.get_rotated_shape(get_shape(tile_set),
+                                                               clockwise=event is ActionButton.PRIMARY)
+        for kick_x, kick_y in self._kick_offsets:
+            x, y = top_right.x + kick_x, top_right.y + kick_y
+            if _can_place_shape(board, rotated_shape, x, y):
+                rotated_set = BoardElementSet()
+                for pair, (dx, dy) in zip(tile_set.get_element_pairs(), rotated_shape):
+                    rotated_set.add_element(pair.element, board.get_coordinate(x + dx, y + dy))
+                board.set_live_tile(rotated_set)
                 return
 
-        board.set_live_tile(rotated_test_set)
+
+def _can_place_shape(board: Board, shape: Tuple[Tuple[int, int], ...], x: int, y: int) -> bool:
+    """
+    Check if live tiles of a shape, with their top left corner at (x, y), would be
+    on the board and only on tiles which live tiles can move through
+    """
+    row_occupancy = board.get_row_occupancy() if board.has_row_occupancy() else None
+    for dx, dy in shape:
+        tile_x, tile_y = x + dx, y + dy
+        if not (0 <= tile_x < board.get_width() and 0 <= tile_y < board.get_height()):
+            return False
+        if row_occupancy is not None:
+            if row_occupancy.get_blocked_mask(tile_y) & (1 << tile_x):
+                return False
+        elif not board.get_tile_at(board.get_coordinate(tile_x, tile_y)).can_move_through():
+            return False
+    return True
 
 
 class HorizontalShiftLiveTileRule(UserInputRule):
+    """
+    Shifts the live tiles one tile left or right, unless a tile with any elements is in the way,
+    the same collision check DownwardsShiftLiveTileRule makes. Presses of the same button queued in a row
+    are made as a single shift of several tiles, which stops at the first tile in the way
+    """
     def handle_input(self, board: Board, *, event):
+        self.handle_repeated_input(board, event=event, count=1)
+
+    def handle_repeated_input(self, board: Board, *, event, count: int):
         if not board.has_live_tiles():
             return
 
         # Get the direction to move
-        direction = None
         if event == DirectionButton.LEFT:
-            direction = Coordinate(-1, 0)
+            step = -1
         elif event == DirectionButton.RIGHT:
-            direction = Coordinate(1, 0)
-
-        if direction:
-            # Try to move the live tiles in the specified direction
-            self._move_live_tiles(board, direction)
+            step = 1
+        else:
+            return
 
-    def _move_live_tiles(self, board: Board, direction: Coordinate):
-        """Move the live tiles if the move is valid."""
+        # Move as far as the live tiles can, one tile at a time
         live_tiles = board.get_live_tiles()
-        # Create a new set with the moved positions
-        new_positions = BoardElementSet()
-
-        # Check if the move is valid (no collisions)
-        can_move = True
-        for pair in live_tiles.get_element_pairs():
-            new_pos = pair.coordinate + direction
-
-            # Check boundaries
-            if (new_pos.x < 0 or new_pos.x >= board.get_width() or
-                new_pos.y < 0 or new_pos.y >= board.get_height()):
-                can_move = False
-                break
-
-            # Check collision with static elements
-            tile = board.get_tile_at(new_pos)
-            if tile and tile.has_elements():
-                # If there's any element in this tile, we can't move there
-                can_move = False
-                break
-
-        # If move is valid, update live tiles positions
-        if can_move:
-            for pair in live_tiles.get_element_pairs():
-                new_pos = pair.coordinate + direction
-                new_positions.add_element(pair.element, new_pos)
-
-            # Update the board's live tiles
-            board.set_live_tile(new_positions)
+        distance = 0
+        while distance < count and _can_move_live_tiles(board, live_tiles, Coordinate((distance + 1) * step, 0)):
+            distance += 1
+        if distance > 0:
+            board.set_live_tile(ElementSet.shift_elements(live_tiles, horizontal=distance * step))
 
 
 class DownwardsShiftLiveTileRule(UserInputRule):
@@ -101,25 +147,8 @@ class DownwardsShiftLiveTileRule(UserInputRule):
         live_tiles = board.get_live_tiles()
         new_positions = BoardElementSet()
 
-        # Check if downward movement is valid
-        can_move = True
-        for pair in live_tiles.get_element_pairs():
-            new_pos = pair.coordinate + direction
-
-            # Check if new position is out of bounds
-            if new_pos.y >= board.get_height():
-                can_move = False
-                break
-
-            # Check collision with static elements
-            tile = board.get_tile_at(new_pos)
-            if tile and tile.has_elements():
-                # If there's any element in this tile, we can't move there
-                can_move = False
-                break
-
         # If can move down, update positions
-        if can_move:
+        if _can_move_live_tiles(board, live_tiles, direction):
             for pair in live_tiles.get_element_pairs():
                 new_pos = pair.coordinate + direction
                 new_positions.add_element(pair.element, new_pos)
@@ -160,8 +189,10 @@ class CursorApplySelectionRule(UserInputRule):
                 if (board.get_tile_at(cursor.get_primary_position()).can_support_move() and
                         board.get_tile_at(cursor.get_secondary_position()).can_support_move()):
                     board.swap_tile_contents(cursor.get_primary_position(), cursor.get_secondary_position())
-                    # A match was not made, revert
-                    if not len(board.get_tile_match_rule().check_matches(board)) > 0:
+                    # A match was not made, revert. Any match made by the swap
+                    # is in the rows or columns of the swapped tiles
+                    swapped_region = DirtyRegion([cursor.get_primary_position(), cursor.get_secondary_position()])
+                    if not len(board.get_tile_match_rule().check_matches_in_region(board, swapped_region)) > 0:
                         board.swap_tile_contents(cursor.get_primary_position(), cursor.get_secondary_position())
                     else:
                         cursor.set_movement_state()
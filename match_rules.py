@@ -2,33 +2,63 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
-from board import Board
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, runs are found in plain python without it
+    np = None
+
+from board import Board, DirtyRegion, TileElement
 from board_elements import Coordinate
 from rules import TileMatchRule, MatchEventRule
+from shift_rules import shift_line
 
 if TYPE_CHECKING:
-    from typing import Iterable, List
+    from typing import Dict, Iterable, List, Set, Tuple
 
 
 class MatchARowRule(TileMatchRule):
 
-    def check_matches(self, board) -> List[Coordinate]:
-        matches = []
-        for y in reversed(range(board.get_height())):
-            coordinate_row = [Coordinate(x, y) for x in range(board.get_width())]
-            if all(map(lambda coordinate: board.get_tile_at(coordinate).has_elements(), coordinate_row)):
-                matches.extend(coordinate_row)
+    def check_matches(self, board) -> Set[Coordinate]:
+        return self.check_matches_in_region(board, DirtyRegion.whole_board(board))
+
+    def check_matches_in_region(self, board: Board, region: DirtyRegion) -> Set[Coordinate]:
+        matches = set()
+        for y in region.get_rows():
+            if self._is_row_full(board, y):
+                matches.update(board.get_coordinate(x, y) for x in range(board.get_width()))
         return matches
 
-    def remove_matches(self, board: Board) -> List[Coordinate]:
-        to_destroy = self.check_matches(board)
+    def remove_matches(self, board: Board) -> Set[Coordinate]:
+        return self.remove_matches_in_region(board, DirtyRegion.whole_board(board))
+
+    def remove_matches_in_region(self, board: Board, region: DirtyRegion) -> Set[Coordinate]:
+        to_destroy = self.check_matches_in_region(board, region)
 
         for coordinate in to_destroy:
             board.get_tile_at(coordinate).apply_destroy()
 
         return to_destroy
 
+    @staticmethod
+    def _is_row_full(board: Board, y: int) -> bool:
+        if board.has_row_occupancy():
+            return board.get_row_occupancy().is_row_full(y)
+        return all(tile.has_elements() for tile in board.get_tile_row(y))
+
+
 class MatchNOfColorRule(TileMatchRule):
+    """
+    Matches lines of at least `match_length` tiles which all share a color,
+    either horizontally or vertically.
+
+    Note:
+        Runs are found by comparing every line of the board against itself
+        shifted by one to `match_length - 1` tiles, using the color masks of the tiles.
+        NumPy is used for this when it is installed.
+        When only a region is checked, horizontal runs are searched for in the rows of
+        the region and vertical runs in its columns, since any new run has to go
+        through a tile which changed.
+    """
 
     def __init__(self, match_length: int = 3):
         self._match_length = match_length
@@ -36,67 +66,135 @@ class MatchNOfColorRule(TileMatchRule):
     def set_match_length(self, match_length: int):
         self._match_length = match_length
 
-    def check_matches(self, board) -> List[Coordinate]:
-        matches = []
-        for x in range(board.get_width()):
-            for y in range(board.get_height()):
-                for coordinate in self._check_at(board, Coordinate(x, y)):
-                    if coordinate not in matches:
-                        matches.append(coordinate)
-        return matches
+    def get_match_length(self) -> int:
+        return self._match_length
+
+    def check_matches(self, board) -> Set[Coordinate]:
+        return self.check_matches_in_region(board, DirtyRegion.whole_board(board))
 
-    def remove_matches(self, board: Board) -> List[Coordinate]:
-        to_destroy = self.check_matches(board)
+    def check_matches_in_region(self, board: Board, region: DirtyRegion) -> Set[Coordinate]:
+        rows = sorted(region.get_rows())
+        columns = sorted(region.get_columns())
+        row_masks = [[tile.get_color_mask() for tile in board.get_tile_row(y)] for y in rows]
+        column_masks = [[tile.get_color_mask() for tile in board.get_tile_column(x)] for x in columns]
+
+        matched: Set[Coordinate] = set()
+        for line, position in find_color_runs(row_masks, self._match_length):
+            matched.add(board.get_coordinate(position, rows[line]))
+        for line, position in find_color_runs(column_masks, self._match_length):
+            matched.add(board.get_coordinate(columns[line], position))
+        return matched
+
+    def remove_matches(self, board: Board) -> Set[Coordinate]:
+        return self.remove_matches_in_region(board, DirtyRegion.whole_board(board))
+
+    def remove_matches_in_region(self, board: Board, region: DirtyRegion) -> Set[Coordinate]:
+        to_destroy = self.check_matches_in_region(board, region)
 
         for coordinate in to_destroy:
             board.get_tile_at(coordinate).apply_destroy()
         return to_destroy
 
-    def _check_at(self, board: Board, coordinate: Coordinate) -> Iterable[Coordinate]:
-        coordinate_set = []
-        vertical_coords = [Coordinate(coordinate.x, coordinate.y + i) for i in range(self._match_length)]
-        horizontal_coords = [Coordinate(coordinate.x + i, coordinate.y) for i in range(self._match_length)]
-        if all(map(lambda c: board.is_valid_coordinate(c) and board.get_tile_at(c).has_colors(), vertical_coords)):
-            if len(set.intersection(*[set(board.get_tile_at(c).get_colors()) for c in vertical_coords])) > 0:
-                coordinate_set.extend(vertical_coords)
-        if all(map(lambda c: board.is_valid_coordinate(c) and board.get_tile_at(c).has_colors(), horizontal_coords)):
-            if len(set.intersection(*[set(board.get_tile_at(c).get_colors()) for c in horizontal_coords])) > 0:
-                coordinate_set.extend(horizontal_coords)
-        return coordinate_set
 
+def find_color_runs(lines: List[List[int]], match_length: int) -> Iterable[Tuple[int, int]]:
+    """
+    Find every cell which is part of a run of `match_length` cells along a line
+    whose color masks have a common bit. NumPy is used when it is installed
+    :param lines: Color masks of the lines to check, all of the same length
+    :return: (line index, position in line) of every cell in a run
+    """
+    if np is not None:
+        return _find_color_runs_numpy(lines, match_length)
+    return _find_color_runs(lines, match_length)
+
+
+def _find_color_runs(lines: List[List[int]], match_length: int) -> Iterable[Tuple[int, int]]:
+    """
+    Same as find_color_runs, in plain python
+    """
+    matched: Set[Tuple[int, int]] = set()
+    for line_index, line in enumerate(lines):
+        for start in range(len(line) - match_length + 1):
+            common = line[start]
+            for i in range(1, match_length):
+                common &= line[start + i]
+            if common:
+                matched.update((line_index, start + i) for i in range(match_length))
+    return matched
+
+
+def _find_color_runs_numpy(lines: List[List[int]], match_length: int) -> Iterable[Tuple[int, int]]:
+    """
+    Same as find_color_runs, except every window of every line is checked at once
+    """
+    if len(lines) == 0:
+        return []
+    grid = np.array(lines, dtype=np.int64)
+    window_count = grid.shape[1] - match_length + 1
+    if window_count <= 0:
+        return []
+    common = grid[:, 0:window_count]
+    for i in range(1, match_length):
+        common = common & grid[:, i:i + window_count]
+    is_run_start = common != 0
+    matched = np.zeros(grid.shape, dtype=bool)
+    for i in range(match_length):
+        matched[:, i:i + window_count] |= is_run_start
+    return zip(*(axis.tolist() for axis in np.nonzero(matched)))
 
-class ShiftToFillRowEventRule(MatchEventRule):
 
-    def trigger(self, board: Board, coordinates: List[Coordinate]):
-        rows: List[List[Coordinate]] = []
+class ShiftToFillRowEventRule(MatchEventRule):
+    """
+    Moves every tile above a cleared row down by one tile, the same as shifting them one tile at a time
+    from the bottom up, where a tile only moves into an empty tile.
+
+    Note:
+        When the cleared rows are empty and every tile above them can move, every cleared row is moved
+        to the top at once with Board.rearrange_rows. Otherwise, every column is rearranged at once,
+        one cleared row at a time
+    """
+
+    def trigger(self, board: Board, coordinates: Set[Coordinate]):
+        # count the cleared tiles of every row
+        cleared_tile_counts: Dict[int, int] = {}
         for coordinate in coordinates:
-            # if any row has its y coordinate, then add it to the list
-            # if it does not make a new let and append it
-            needs_new_row = True
-            for row in rows:
-                if len(row) > 0 and row[0].y == coordinate.y:
-                    needs_new_row = False
-                    row.append(coordinate)
-                    break
-            if needs_new_row:
-                rows.append([coordinate])
+            cleared_tile_counts[coordinate.y] = cleared_tile_counts.get(coordinate.y, 0) + 1
         # remove any rows which don't have their entire row cleared
-        cleared_rows = sorted([row[0].y for row in rows if len(row) == board.get_width()])
+        cleared_rows = sorted(y for y, count in cleared_tile_counts.items() if count == board.get_width())
+        if not cleared_rows:
+            return
+        if ShiftToFillRowEventRule._can_shift_rows(board, cleared_rows):
+            # the empty cleared rows end up on top, the other rows keep their order
+            cleared = set(cleared_rows)
+            board.rearrange_rows(cleared_rows + [y for y in range(board.get_height()) if y not in cleared])
+            return
         for row in cleared_rows:
             ShiftToFillRowEventRule._shift_down_all_by_one(board, row)
 
     @staticmethod
     def _shift_down_all_by_one(board: Board, cleared_row: int):
-        for y in reversed(range(cleared_row)):
-            for x in range(board.get_width()):
-                source_coordinate = Coordinate(x,y)
-                target_coordinate = Coordinate(x, y + 1)
-                if (not board.is_valid_coordinate(target_coordinate) or
-                        board.get_tile_at(target_coordinate).has_elements() or
-                        not board.get_tile_at(source_coordinate).can_support_move()):
-                    continue
-                board.swap_tile_contents(source_coordinate, target_coordinate)
+        if ShiftToFillRowEventRule._can_shift_rows(board, [cleared_row]):
+            board.rearrange_rows([cleared_row] + list(range(cleared_row)) +
+                                 list(range(cleared_row + 1, board.get_height())))
+            return
+        for x in range(board.get_width()):
+            column = board.get_tile_column(x)[:cleared_row + 1]
+            sources = shift_line([not tile.has_elements() for tile in column],
+                                 [tile.can_support_move() for tile in column], 1)
+            TileElement.rearrange_contents(column, sources)
 
+    @staticmethod
+    def _can_shift_rows(board: Board, cleared_rows: List[int]) -> bool:
+        """
+        :param cleared_rows: Sorted from the top down
+        """
+        for row in cleared_rows:
+            if board.has_row_occupancy():
+                if not board.get_row_occupancy().is_row_empty(row):
+                    return False
+            elif any(tile.has_elements() for tile in board.get_tile_row(row)):
+                return False
+        return all(tile.can_support_move() for y in range(cleared_rows[-1]) for tile in board.get_tile_row(y))
 
 
 
@@ -0,0 +1,244 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from dataclasses import dataclass
+
+from board_elements import BoardElementSet, Coordinate
+from rotation import RotationTable, get_shape
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+    from board import Board
+    from board_elements import GameElement
+    from input_rules import RotateLiveTilesRule
+    from rotation import Shape
+
+
+@dataclass(frozen=True, slots=True)
+class Placement:
+    """
+    A spot a live tile set can come to rest at, and what the board looks like afterwards.
+
+    `rotation` is the number of clockwise rotations from the live tile set, `x` and `y`
+    are the top left corner of the placed set. The features describe the board once
+    the set is locked and full rows are cleared:
+        - lines_cleared: number of full rows
+        - holes: empty tiles with an occupied tile somewhere above them
+        - aggregate_height: sum of the heights of every column
+        - bumpiness: sum of the height differences between neighbouring columns
+    """
+    rotation: int
+    x: int
+    y: int
+    coordinates: Tuple[Coordinate, ...]
+    elements: Tuple[GameElement, ...]
+    lines_cleared: int
+    holes: int
+    aggregate_height: int
+    bumpiness: int
+
+    def get_element_set(self) -> BoardElementSet:
+        """
+        :return: The live tile set moved to this placement
+        """
+        element_set = BoardElementSet()
+        for element, coordinate in zip(self.elements, self.coordinates):
+            element_set.add_element(element, coordinate)
+        return element_set
+
+
+class _Orientation:
+    """
+    A rotation of a tile set, as one bit mask per row of the set
+    """
+
+    def __init__(self, rotation: int, shape: Shape, elements: Tuple[GameElement, ...]):
+        self.rotation = rotation
+        self.cells = shape
+        self.elements = elements
+        self.width = max(x for x, _ in self.cells) + 1
+        self.height = max(y for _, y in self.cells) + 1
+        self.row_masks: List[int] = [0] * self.height
+        for x, y in self.cells:
+            self.row_masks[y] |= 1 << x
+
+
+def enumerate_placements(board: Board, element_set: Optional[BoardElementSet] = None, *,
+                         rotate_rule: Optional[RotateLiveTilesRule] = None) -> List[Placement]:
+    """
+    Find every spot the live tile set can be dropped to: each rotation it can be turned to without
+    moving down, then each horizontal offset it can be shifted to from there, dropped straight down until it rests.
+
+    Note:
+        The board is looked at as one bit mask per row, taken from its RowOccupancy when it has one.
+        Tile sets are moved by shifting their row masks, and dropped using the first occupied tile
+        below each of their tiles, so nothing is moved tile by tile.
+        Like RotateLiveTilesRule, rotations only stop at tiles live tiles can't move through, while shifts stop
+        at any tile with elements, like HorizontalShiftLiveTileRule.
+        Rotating and shifting is only tried in the row the tile set starts in, so spots which can only be
+        reached by turning or sliding the set after it has dropped, such as under an overhang, are not found
+    :param board: The board to place the tile set on
+    :param element_set: The tile set to place, the board's live tiles by default
+    :param rotate_rule: The rule rotating the tile set, whose rotation table and kick offsets are used.
+        By default, rotations without any kick offsets are used
+    :return: Every placement, once for every distinct set of tiles the tile set can end up covering
+    """
+    if element_set is None:
+        element_set = board.get_live_tiles()
+    if element_set is None or not element_set.has_elements():
+        raise ValueError("there is no live tile set to place")
+
+    width = board.get_width()
+    height = board.get_height()
+    occupied, blocked = _get_row_masks(board)
+    full_row = (1 << width) - 1
+
+    # first occupied row at or below every row of every column, the floor counts as occupied
+    next_occupied: List[List[int]] = [[height] * (height + 1) for _ in range(width)]
+    for x in range(width):
+        column = next_occupied[x]
+        bit = 1 << x
+        for y in reversed(range(height)):
+            column[y] = y if occupied[y] & bit else column[y + 1]
+
+    if rotate_rule is not None:
+        rotation_table, kick_offsets = rotate_rule.get_rotation_table(), rotate_rule.get_kick_offsets()
+    else:
+        rotation_table, kick_offsets = RotationTable(), ((0, 0),)
+    orientations = _get_orientations(element_set, rotation_table)
+    rotated = _get_reachable_rotations(orientations, element_set.get_top_right(), kick_offsets,
+                                       blocked, width, height)
+
+    placements: List[Placement] = []
+    seen = set()
+    for orientation, anchor in rotated:
+        for x in _get_reachable_offsets(orientation, anchor, occupied, width, height):
+            drop = min(next_occupied[x + cx][anchor.y + cy + 1] - (anchor.y + cy) - 1 for cx, cy in orientation.cells)
+            y = anchor.y + drop
+            key = frozenset((x + cx, y + cy) for cx, cy in orientation.cells)
+            if key in seen:
+                continue
+            seen.add(key)
+            lines_cleared, holes, aggregate_height, bumpiness = _evaluate(occupied, orientation, x, y, full_row)
+            placements.append(Placement(
+                rotation=orientation.rotation, x=x, y=y,
+                coordinates=tuple(board.get_coordinate(x + cx, y + cy) for cx, cy in orientation.cells),
+                elements=orientation.elements,
+                lines_cleared=lines_cleared, holes=holes, aggregate_height=aggregate_height, bumpiness=bumpiness,
+            ))
+    return placements
+
+
+def _get_row_masks(board: Board) -> Tuple[List[int], List[int]]:
+    """
+    :return: The occupied and blocked masks of every row, see RowOccupancy
+    """
+    if board.has_row_occupancy():
+        row_occupancy = board.get_row_occupancy()
+        return ([row_occupancy.get_occupied_mask(y) for y in range(board.get_height())],
+                [row_occupancy.get_blocked_mask(y) for y in range(board.get_height())])
+    occupied = []
+    blocked = []
+    for y in range(board.get_height()):
+        occupied_mask = 0
+        blocked_mask = 0
+        for x, tile in enumerate(board.get_tile_row(y)):
+            if tile.has_elements():
+                occupied_mask |= 1 << x
+            if not tile.can_move_through():
+                blocked_mask |= 1 << x
+        occupied.append(occupied_mask)
+        blocked.append(blocked_mask)
+    return occupied, blocked
+
+
+def _get_orientations(element_set: BoardElementSet, rotation_table: RotationTable) -> List[_Orientation]:
+    """
+    :return: The tile set after 0 to 3 clockwise rotations
+    """
+    elements = tuple(pair.element for pair in element_set.get_element_pairs())
+    shape = get_shape(element_set)
+    orientations = [_Orientation(0, shape, elements)]
+    for rotation in range(1, 4):
+        shape = rotation_table.get_rotated_shape(shape, clockwise=True)
+        orientations.append(_Orientation(rotation, shape, elements))
+    return orientations
+
+
+def _fits(orientation: _Orientation, x: int, y: int, row_masks: List[int], width: int, height: int) -> bool:
+    if x < 0 or y < 0 or x + orientation.width > width or y + orientation.height > height:
+        return False
+    for i, mask in enumerate(orientation.row_masks):
+        if row_masks[y + i] & (mask << x):
+            return False
+    return True
+
+
+def _get_reachable_rotations(orientations: List[_Orientation], anchor: Coordinate,
+                             kick_offsets: Tuple[Tuple[int, int], ...], blocked: List[int],
+                             width: int, height: int) -> List[Tuple[_Orientation, Coordinate]]:
+    """
+    :return: Every orientation the tile set can be rotated to, turning either way any number of
+        times, with the top left corner it ends up at after being kicked
+    """
+    start = (0, anchor.x, anchor.y)
+    reached = [start]
+    seen = {start}
+    for rotation, x, y in reached:
+        for turn in (1, 3):
+            orientation = orientations[(rotation + turn) % 4]
+            for kick_x, kick_y in kick_offsets:
+                if _fits(orientation, x + kick_x, y + kick_y, blocked, width, height):
+                    state = (orientation.rotation, x + kick_x, y + kick_y)
+                    if state not in seen:
+                        seen.add(state)
+                        reached.append(state)
+                    break
+    return [(orientations[rotation], Coordinate(x, y)) for rotation, x, y in reached]
+
+
+def _get_reachable_offsets(orientation: _Orientation, anchor: Coordinate, occupied: List[int],
+                           width: int, height: int) -> List[int]:
+    """
+    :return: Every column the left side of the tile set can be shifted to, in the row it was rotated in
+    """
+    offsets = [anchor.x]
+    for step in (-1, 1):
+        x = anchor.x + step
+        while _fits(orientation, x, anchor.y, occupied, width, height):
+            offsets.append(x)
+            x += step
+    return sorted(offsets)
+
+
+def _evaluate(occupied: List[int], orientation: _Orientation, x: int, y: int, full_row: int) -> Tuple[int, int, int, int]:
+    """
+    :return: Lines cleared, holes, aggregate height and bumpiness once the tile set is locked at (x, y)
+    """
+    placed_rows: Dict[int, int] = {y + i: occupied[y + i] | (mask << x) for i, mask in enumerate(orientation.row_masks)}
+    lines_cleared = sum(1 for mask in placed_rows.values() if mask == full_row)
+
+    height = len(occupied)
+    width = full_row.bit_length()
+    column_heights = [0] * width
+    holes = 0
+    covered = 0
+    cleared_above = 0
+    for row_y in range(height):
+        mask = placed_rows.get(row_y, occupied[row_y])
+        if mask == full_row and row_y in placed_rows:
+            # cleared rows are removed, which moves every row above them down
+            cleared_above += 1
+            continue
+        newly_covered = mask & ~covered
+        if newly_covered:
+            row_height = height - row_y - (lines_cleared - cleared_above)
+            while newly_covered:
+                bit = newly_covered & -newly_covered
+                column_heights[bit.bit_length() - 1] = row_height
+                newly_covered ^= bit
+        holes += bin(covered & ~mask).count('1')
+        covered |= mask
+    aggregate_height = sum(column_heights)
+    bumpiness = sum(abs(column_heights[i] - column_heights[i + 1]) for i in range(width - 1))
+    return lines_cleared, holes, aggregate_height, bumpiness
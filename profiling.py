@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, List
+
+
+class RollingHistogram:
+    """
+    Keeps the most recent `capacity` durations so that percentiles reflect
+    how the board is behaving now, rather than since it was created
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity <= 0:
+            raise ValueError(f"capacity needs to be greater than zero, not {capacity}")
+        self._capacity = capacity
+        self._samples: List[int] = []
+        self._next_index = 0
+        self._total_count = 0
+
+    def record(self, duration_ns: int):
+        if len(self._samples) < self._capacity:
+            self._samples.append(duration_ns)
+        else:
+            self._samples[self._next_index] = duration_ns
+        self._next_index = (self._next_index + 1) % self._capacity
+        self._total_count += 1
+
+    def get_count(self) -> int:
+        """
+        :return: Number of durations recorded, including ones which have rolled out of the window
+        """
+        return self._total_count
+
+    def get_percentile_ms(self, percentile: float) -> float:
+        """
+        :param percentile: A number from 0 to 100
+        :return: Duration in milliseconds, using the nearest rank of the recent durations
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError(f"percentile={percentile} not in range [0-100]")
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = max(0, -(-len(ordered) * percentile // 100) - 1)
+        return ordered[int(rank)] / 1_000_000
+
+    def get_max_ms(self) -> float:
+        return max(self._samples, default=0) / 1_000_000
+
+    def get_summary(self) -> Dict[str, float]:
+        return {
+            'count': self._total_count,
+            'p50_ms': self.get_percentile_ms(50),
+            'p95_ms': self.get_percentile_ms(95),
+            'max_ms': self.get_max_ms(),
+        }
+
+
+class BoardProfiler:
+    """
+    Records how long each stage of Board.update takes, and how long each
+    rule class takes within those stages.
+
+    Stages are named after the Board.update steps: 'input', 'match', 'generate',
+    'move', 'gravity' and 'game_condition'. With cascade resolution enabled, 'match',
+    'generate' and 'move' are recorded together as 'cascade'. The whole update is recorded as 'update'
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._capacity = capacity
+        self._stages: Dict[str, RollingHistogram] = {}
+        self._rules: Dict[str, RollingHistogram] = {}
+
+    def record_stage(self, stage: str, duration_ns: int):
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages[stage] = RollingHistogram(self._capacity)
+        histogram.record(duration_ns)
+
+    def record_rule(self, rule: object, duration_ns: int):
+        name = type(rule).__name__
+        histogram = self._rules.get(name)
+        if histogram is None:
+            histogram = self._rules[name] = RollingHistogram(self._capacity)
+        histogram.record(duration_ns)
+
+    def get_stage_summaries(self) -> Dict[str, Dict[str, float]]:
+        return {stage: histogram.get_summary() for stage, histogram in self._stages.items()}
+
+    def get_rule_summaries(self) -> Dict[str, Dict[str, float]]:
+        return {rule: histogram.get_summary() for rule, histogram in self._rules.items()}
+
+    def reset(self):
+        self._stages.clear()
+        self._rules.clear()
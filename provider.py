@@ -1,35 +1,133 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
-import copy
+import hashlib
+import math
 import random
 
 from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
 from typing import Generic, TypeVar, Union
 
 from board_elements import ElementSet, GameElement
 
 if TYPE_CHECKING:
-    from typing import List, Tuple
+    from typing import Any, Deque, Hashable, List, Optional, Tuple
 
 
 T = TypeVar("T", bound=Union[GameElement, ElementSet])
 
 
+def derive_seed(seed: int, stream: Hashable) -> int:
+    """
+    Derive an independent seed from a base seed, such as one per board or per process.
+    The result only depends on the arguments, so it is the same in every process
+    :param seed: The base seed
+    :param stream: Anything which identifies the stream, with a stable string form, e.g. a board index
+    :return: A 64 bit seed
+    """
+    digest = hashlib.sha256(f'{seed}:{stream!r}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
 class ElementProvider(ABC, Generic[T]):
+    """
+    Provides elements, or element sets, to place on a board.
+
+    Every provider draws from its own random number generator, so a provider
+    created with a seed always provides the same sequence, no matter what
+    else uses random numbers.
+
+    Note:
+        Upcoming choices can be looked at with peek. They are kept in a buffer of
+        at most `lookahead` choices, and are provided in the same order afterwards
+    """
+
+    def __init__(self, *, seed: Optional[int] = None, lookahead: int = 8):
+        if lookahead <= 0:
+            raise ValueError(f"lookahead needs to be greater than zero, not {lookahead}")
+        self._random = random.Random(seed)
+        self._lookahead = lookahead
+        self._upcoming: Deque[T] = deque()
+
+    def set_seed(self, seed: Optional[int]):
+        """
+        Restart the random sequence from a seed, dropping any choices which were peeked at
+        """
+        self._random.seed(seed)
+        self._upcoming.clear()
+
+    def save_state(self) -> Any:
+        """
+        :return: The state of the random number generator and the choices peeked at
+        """
+        return self._random.getstate(), tuple(self._upcoming)
+
+    def restore_state(self, state: Any):
+        random_state, upcoming = state
+        self._random.setstate(random_state)
+        self._upcoming = deque(upcoming)
+
     @abstractmethod
+    def _choose(self) -> T:
+        """
+        Draw the next choice using the provider's random number generator.
+        Choices are spawned before they are provided, so the original can be returned
+        :return: Any object of type T
+        """
+        ...
+
+    def _choose_many(self, count: int) -> List[T]:
+        """
+        Same as _choose, except for `count` choices at once.
+        Implementing classes can override this when drawing in bulk is faster
+        """
+        return [self._choose() for _ in range(count)]
+
     def provide(self) -> T:
         """
         Returns an instance of T.
 
-        It is up to the implementing class as how to return a value
+        Choices are returned through their spawn method, so immutable
+        elements are shared instead of copied
         :return: Any object of type T
         """
-        ...
+        if self._upcoming:
+            return self._upcoming.popleft().spawn()
+        return self._choose().spawn()
+
+    def provide_many(self, count: int) -> List[T]:
+        """
+        Same as calling provide `count` times
+        """
+        if count < 0:
+            raise ValueError(f"count needs to be at least zero, not {count}")
+        upcoming_count = min(count, len(self._upcoming))
+        choices = [self._upcoming.popleft() for _ in range(upcoming_count)]
+        if count > upcoming_count:
+            choices.extend(self._choose_many(count - upcoming_count))
+        return [choice.spawn() for choice in choices]
+
+    def peek(self, count: int = 1) -> List[T]:
+        """
+        Look at the next choices without providing them, e.g. to preview the next piece.
+        The returned choices are shared with the provider, and should not be modified
+        :param count: Number of choices to look at, up to the lookahead of the provider
+        :return: The next `count` choices, in the order they will be provided
+        """
+        if count > self._lookahead:
+            raise ValueError(f"count={count} is greater than the lookahead of {self._lookahead}")
+        missing = count - len(self._upcoming)
+        if missing > 0:
+            self._upcoming.extend(self._choose_many(missing))
+        return list(islice(self._upcoming, count))
+
 
 class UniformRandomElementProvider(ElementProvider, Generic[T]):
 
-    def __init__(self):
+    def __init__(self, *, seed: Optional[int] = None, lookahead: int = 8):
+        super().__init__(seed=seed, lookahead=lookahead)
         self._elementChoices: List[T] = []
 
     def add_choice(self, option: T):
@@ -39,16 +137,39 @@ class UniformRandomElementProvider(ElementProvider, Generic[T]):
         """
         self._elementChoices.append(option)
 
-    def provide(self) -> T:
+    def _choose(self) -> T:
+        self._check_choices()
+        # Draws the same way as random.choices, so single and bulk draws share a sequence
+        return self._elementChoices[math.floor(self._random.random() * len(self._elementChoices))]
+
+    def _choose_many(self, count: int) -> List[T]:
+        self._check_choices()
+        return self._random.choices(self._elementChoices, k=count)
+
+    def _check_choices(self):
         if len(self._elementChoices) == 0:
             raise ValueError("Provider has no elements to provide")
-        return copy.deepcopy(random.choice(self._elementChoices))
 
 
 class WeightedRandomElementProvider(ElementProvider, Generic[T]):
+    """
+    Chooses elements at random, each with its own chance of being chosen.
+
+    Note:
+        The weights are compiled into an alias table whenever a choice is added,
+        so every draw takes a single random number and constant time, no matter
+        how many choices there are
+    """
 
-    def __init__(self):
+    def __init__(self, *, seed: Optional[int] = None, lookahead: int = 8):
+        super().__init__(seed=seed, lookahead=lookahead)
         self._elementChoices: List[Tuple[T, int]] = []
+        self._total_weight = 0
+        # Alias table: slot i keeps its own option with probability _probabilities[i],
+        # and gives way to option _aliases[i] otherwise
+        self._options: List[T] = []
+        self._probabilities: List[float] = []
+        self._aliases: List[int] = []
 
     def add_choice(self, *, option: T, weight: int):
         """
@@ -60,40 +181,92 @@ class WeightedRandomElementProvider(ElementProvider, Generic[T]):
         """
         if weight < 0 or weight > 100:
             raise ValueError(f"weight={weight} not in range [0-100]")
-        if sum(map(lambda t: t[1], self._elementChoices), start=weight) > 100:
+        if self._total_weight + weight > 100:
             raise ValueError("Percent of element chances exceeds 100")
         self._elementChoices.append((option, weight))
+        self._total_weight += weight
+        self._compile_alias_table()
 
-    def _generate_random(self) -> T:
-        options, weights = zip(*self._elementChoices)  # Unpack elements and weights
-        return copy.deepcopy(random.choices(options, weights=weights)[0])
+    def _compile_alias_table(self):
+        """
+        Build the alias table with Vose's method. Weights are scaled by the number
+        of choices and kept as integers, so the table is exact
+        """
+        self._options = [option for option, _ in self._elementChoices]
+        count = len(self._elementChoices)
+        total = self._total_weight
+        if total == 0:
+            return
+        scaled = [weight * count for _, weight in self._elementChoices]
+        self._probabilities = [1.0] * count
+        self._aliases = list(range(count))
+        small = [i for i, weight in enumerate(scaled) if weight < total]
+        large = [i for i, weight in enumerate(scaled) if weight >= total]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._probabilities[less] = scaled[less] / total
+            self._aliases[less] = more
+            scaled[more] -= total - scaled[less]
+            (small if scaled[more] < total else large).append(more)
 
-    def provide(self) -> T:
-        if sum(map(lambda t: t[1], self._elementChoices)) != 100:
+    def _check_weights(self):
+        if self._total_weight != 100:
             raise ValueError("Sum of weights is not equal to 100")
-        return self._generate_random()
+
+    def _choose(self) -> T:
+        self._check_weights()
+        scaled = self._random.random() * len(self._options)
+        slot = int(scaled)
+        if scaled - slot < self._probabilities[slot]:
+            return self._options[slot]
+        return self._options[self._aliases[slot]]
+
+    def _choose_many(self, count: int) -> List[T]:
+        self._check_weights()
+        options, probabilities, aliases = self._options, self._probabilities, self._aliases
+        next_random, option_count = self._random.random, len(options)
+        choices = []
+        for _ in range(count):
+            scaled = next_random() * option_count
+            slot = int(scaled)
+            choices.append(options[slot] if scaled - slot < probabilities[slot] else options[aliases[slot]])
+        return choices
+
 
 class RandomRepeatingQueueElementProvider(ElementProvider, Generic[T]):
 
-    def __init__(self):
+    def __init__(self, *, seed: Optional[int] = None, lookahead: int = 8):
+        super().__init__(seed=seed, lookahead=lookahead)
         self._element_choices: List[T] = []
         self._queue: List[T] = []
 
     def add_choice(self, option: T):
         self._element_choices.append(option)
         self._queue = self._element_choices[:]
-        random.shuffle(self._queue)
+        self._random.shuffle(self._queue)
+
+    def set_seed(self, seed: Optional[int]):
+        super().set_seed(seed)
+        self._reshuffle()
+
+    def save_state(self) -> Any:
+        return super().save_state(), tuple(self._queue)
+
+    def restore_state(self, state: Any):
+        provider_state, queue = state
+        super().restore_state(provider_state)
+        self._queue = list(queue)
 
     def _reshuffle(self):
         if self._element_choices:
             self._queue = self._element_choices[:]
-            random.shuffle(self._queue)
+            self._random.shuffle(self._queue)
 
-    def provide(self) -> T:
+    def _choose(self) -> T:
         if not self._element_choices:
             raise ValueError("Provider has no elements to provide")
 
         if not self._queue:
             self._reshuffle()
 
-        return copy.deepcopy(self._queue.pop())
+        return self._queue.pop()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from board import TileChangeListener
+from constants import TK_COLOR_MAP, Color
+from sprite_cache import CachedSpriteElement
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Set, Tuple
+    import tkinter as tk
+    from board import Board
+    from board_elements import Coordinate, ElementSet, GameElement
+    from sprite_cache import Sprite
+
+    # (item, sprite, x1, y1) of a canvas item drawn from a sprite in the cell with its top left corner at (x1, y1)
+    DrawnSprite = Tuple[int, Sprite, float, float]
+
+_GAME_OVER_TEXT = 'Game Over!'
+
+_GRID_TAG = 'grid'
+_LIVE_TILES_TAG = 'live'
+_CURSOR_TAG = 'cursor'
+_GAME_OVER_TAG = 'game_over'
+
+
+class _TaggedCanvas:
+    """
+    Forwards everything to a canvas, adding a tag to every item which is created.
+    This lets element and cursor draw methods stay unaware of the renderer,
+    while the renderer can still find and delete what they drew
+    """
+    def __init__(self, canvas: tk.Canvas, tag: str):
+        self._canvas = canvas
+        self._tag = tag
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._canvas, name)
+        if not name.startswith('create_'):
+            return attribute
+
+        def create_tagged(*args, **kwargs):
+            tags = kwargs.get('tags', ())
+            if isinstance(tags, str):
+                tags = (tags,)
+            kwargs['tags'] = (*tags, self._tag)
+            return attribute(*args, **kwargs)
+        return create_tagged
+
+
+class BoardRenderer(TileChangeListener):
+    """
+    Draws a board onto a canvas, keeping the canvas items between frames.
+
+    Note:
+        Only tiles which changed since the last frame are redrawn. Live tiles,
+        the cursor and the game over text are redrawn when they change, and are
+        kept above the tiles.
+        Elements drawn from cached sprites keep their canvas items, which are moved and
+        reconfigured with coords and itemconfigure when they change. Items are only created
+        when there is no item of the same kind to reuse. Any other element, and the cursor,
+        is drawn from scratch, deleting what was drawn before
+    """
+
+    def __init__(self, board: Board, canvas: tk.Canvas, *, width: int, height: int):
+        self._board = board
+        self._canvas = canvas
+        self._width = width
+        self._height = height
+        self._cell_width = width / board.get_width()
+        self._cell_height = height / board.get_height()
+        self._changed_tiles: Set[Coordinate] = {board.get_coordinate(x, y) for y in range(board.get_height())
+                                                for x in range(board.get_width())}
+        self._has_drawn_grid = False
+        self._drawn_live_tiles: Optional[ElementSet] = None
+        # Items of every tile drawn from sprites, tiles which are not in here may have items drawn another way
+        self._tile_items: Dict[Coordinate, List[DrawnSprite]] = {}
+        self._live_tile_items: Optional[List[DrawnSprite]] = []
+        self._drawn_cursor_state: Optional[Tuple] = None
+        self._has_drawn_game_over = False
+        board.add_tile_change_listener(self)
+
+    def on_tile_change(self, board: Board, coordinate: Coordinate):
+        self._changed_tiles.add(coordinate)
+
+    def detach(self):
+        """
+        Stop following the changes of the board, e.g. once the canvas is destroyed.
+        Nothing can be rendered afterwards
+        """
+        self._board.remove_tile_change_listener(self)
+
+    def get_cell_size(self) -> Tuple[float, float]:
+        return self._cell_width, self._cell_height
+
+    def render(self):
+        if not self._has_drawn_grid:
+            self._draw_grid()
+        tile_items_created = False
+        for coordinate in self._changed_tiles:
+            tile_items_created |= self._draw_tile(coordinate)
+        self._changed_tiles.clear()
+
+        live_tile_items_created = False
+        if self._board.get_live_tiles() is not self._drawn_live_tiles:
+            live_tile_items_created = self._draw_live_tiles()
+        cursor_changed = self._get_cursor_state() != self._drawn_cursor_state
+        if cursor_changed:
+            self._draw_cursor()
+
+        # Created items are placed on top of everything else, so restore the layering
+        if tile_items_created:
+            self._canvas.tag_raise(_LIVE_TILES_TAG)
+        if tile_items_created or live_tile_items_created:
+            self._canvas.tag_raise(_CURSOR_TAG)
+
+        if self._board.is_game_over() and not self._has_drawn_game_over:
+            self._draw_game_over()
+        elif self._has_drawn_game_over and (tile_items_created or live_tile_items_created or cursor_changed):
+            self._canvas.tag_raise(_GAME_OVER_TAG)
+
+    def _draw_grid(self):
+        for y in range(self._board.get_height()):
+            for x in range(self._board.get_width()):
+                x1, y1, x2, y2 = self._get_cell_bounds(x, y)
+                self._canvas.create_rectangle(x1, y1, x2, y2, outline=TK_COLOR_MAP[Color.WHITE], width=0,
+                                              tags=_GRID_TAG)
+        self._has_drawn_grid = True
+
+    def _draw_tile(self, coordinate: Coordinate) -> bool:
+        """
+        :return: True if any item was created
+        """
+        bounds = self._get_cell_bounds(coordinate.x, coordinate.y)
+        elements = [(element, bounds) for element in self._board.get_tile_at(coordinate).get_elements()]
+        items, items_created = self._draw_elements(elements, self._tile_items.pop(coordinate, None),
+                                                   f'tile_{coordinate.x}_{coordinate.y}')
+        if items is not None:
+            self._tile_items[coordinate] = items
+        return items_created
+
+    def _draw_live_tiles(self) -> bool:
+        """
+        :return: True if any item was created
+        """
+        live_tiles = self._board.get_live_tiles()
+        self._drawn_live_tiles = live_tiles
+        elements = []
+        if live_tiles is not None:
+            elements = [(pair.element, self._get_cell_bounds(pair.coordinate.x, pair.coordinate.y))
+                        for pair in live_tiles.get_element_pairs()]
+        self._live_tile_items, items_created = self._draw_elements(elements, self._live_tile_items, _LIVE_TILES_TAG)
+        return items_created
+
+    def _draw_elements(self, elements: List[Tuple[GameElement, Tuple[float, float, float, float]]],
+                       items: Optional[List[DrawnSprite]], tag: str) -> Tuple[Optional[List[DrawnSprite]], bool]:
+        """
+        Draw elements over what was drawn with the same tag before
+        :param elements: Every element to draw, with the bounds of its cell
+        :param items: What was drawn with the tag before, None if it was not drawn from sprites
+        :return: What was drawn, None if it was not drawn from sprites, and whether any item was created
+        """
+        if not all(isinstance(element, CachedSpriteElement) for element, _ in elements):
+            self._canvas.delete(tag)
+            tagged_canvas = _TaggedCanvas(self._canvas, tag)
+            for element, bounds in elements:
+                element.draw(tagged_canvas, *bounds)
+            return None, len(elements) > 0
+        if items is None:
+            self._canvas.delete(tag)
+            items = []
+
+        drawn: List[DrawnSprite] = []
+        tagged_canvas = None
+        for i, (element, (x1, y1, x2, y2)) in enumerate(elements):
+            sprite = element.get_cell_sprite(x1, y1, x2, y2)
+            # Once an item is created, the items after it are created as well so they stay on top of it
+            if tagged_canvas is None and i < len(items) and sprite.can_redraw(items[i][1]):
+                item, previous, previous_x1, previous_y1 = items[i]
+                if sprite is not previous or (x1, y1) != (previous_x1, previous_y1):
+                    sprite.redraw(self._canvas, item, x1, y1, previous=previous)
+            else:
+                if tagged_canvas is None:
+                    tagged_canvas = _TaggedCanvas(self._canvas, tag)
+                if i < len(items):
+                    self._canvas.delete(items[i][0])
+                item = sprite.draw(tagged_canvas, x1, y1)
+            drawn.append((item, sprite, x1, y1))
+        for item, *_ in items[len(elements):]:
+            self._canvas.delete(item)
+        return drawn, tagged_canvas is not None
+
+    def _get_cursor_state(self) -> Optional[Tuple]:
+        if not self._board.has_cursor():
+            return None
+        cursor = self._board.get_cursor()
+        primary = cursor.get_primary_position()
+        secondary = cursor.get_secondary_position() if cursor.has_secondary_position() else None
+        return ((primary.x, primary.y),
+                (secondary.x, secondary.y) if secondary is not None else None,
+                cursor.is_in_swapping_state())
+
+    def _draw_cursor(self):
+        self._canvas.delete(_CURSOR_TAG)
+        self._drawn_cursor_state = self._get_cursor_state()
+        if self._drawn_cursor_state is None:
+            return
+        self._board.get_cursor().draw(_TaggedCanvas(self._canvas, _CURSOR_TAG), self._cell_height, self._cell_width)
+
+    def _draw_game_over(self):
+        self._canvas.create_text(
+            self._width // 2,
+            self._height // 2,
+            text=_GAME_OVER_TEXT,
+            anchor='center',
+            fill=TK_COLOR_MAP[Color.RED],
+            font=('Impact', min(self._width // 7, self._height // 7)),
+            tags=_GAME_OVER_TAG
+        )
+        self._has_drawn_game_over = True
+
+    def _get_cell_bounds(self, x: int, y: int) -> Tuple[float, float, float, float]:
+        x1 = x * self._cell_width
+        y1 = y * self._cell_height
+        return x1, y1, x1 + self._cell_width, y1 + self._cell_height
@@ -0,0 +1,149 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import json
+
+from button_controller import DirectionButton, ActionButton
+from simulation import HeadlessGame, InputSource, ScriptedInput
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterator, List, Optional, TextIO, Union
+    from board import Board
+
+_LOG_FORMAT = 'tgme-input-log'
+_LOG_VERSION = 1
+_END_MARKER = 'end'
+
+_BUTTONS: Dict[str, Union[DirectionButton, ActionButton]] = {
+    str(button): button for button in DirectionButton.as_set() | ActionButton.as_set()
+}
+
+
+class InputRecorder:
+    """
+    Writes every button press of a game to a log, so the game can be replayed with InputLogReplay.
+
+    The first line of a log is a JSON header with the seed and update interval
+    of the game, alongside any other configuration needed to rebuild its boards.
+    Every press after that is a single line, written as soon as it happens:
+
+        <simulation time in ms> <board index> <button>
+
+    Presses are recorded with the simulation time of the next update, since that
+    is the update they take effect before. Closing the recorder writes the time
+    the game ended at, so a replay runs for exactly as long as the game did
+    """
+
+    def __init__(self, stream: TextIO, *, seed: Optional[int], update_interval: int,
+                 config: Optional[Dict[str, Any]] = None):
+        self._stream = stream
+        self._last_time_ms = 0
+        self._is_closed = False
+        header = {
+            'format': _LOG_FORMAT,
+            'version': _LOG_VERSION,
+            'seed': seed,
+            'update_interval': update_interval,
+            'config': config if config is not None else {},
+        }
+        self._stream.write(json.dumps(header, sort_keys=True) + '\n')
+
+    def record(self, time_ms: int, board_index: int, button: Union[DirectionButton, ActionButton]):
+        if self._is_closed:
+            raise ValueError("recorder was already closed")
+        if time_ms < self._last_time_ms:
+            raise ValueError(f"press at {time_ms}ms was recorded after a press at {self._last_time_ms}ms")
+        self._last_time_ms = time_ms
+        self._stream.write(f'{time_ms} {board_index} {button}\n')
+
+    def close(self, end_time_ms: int):
+        """
+        Mark the end of the game. The stream itself is left open
+        :param end_time_ms: Simulation time of the first update which did not run
+        """
+        if self._is_closed:
+            return
+        self._stream.write(f'{_END_MARKER} {end_time_ms}\n')
+        self._stream.flush()
+        self._is_closed = True
+
+
+class InputLogReplay(InputSource):
+    """
+    Replays a log written by InputRecorder. Presses are read from the stream
+    as the replay reaches them, so logs of any length can be replayed
+    """
+
+    def __init__(self, stream: TextIO):
+        header = json.loads(stream.readline())
+        if header.get('format') != _LOG_FORMAT:
+            raise ValueError("stream is not an input log")
+        if header.get('version') != _LOG_VERSION:
+            raise ValueError(f"input log version {header.get('version')} is not supported")
+        self._header = header
+        self._lines: Iterator[str] = iter(stream)
+        self._end_time_ms: Optional[int] = None
+        self._next_input: Optional[ScriptedInput] = self._read_next_input()
+
+    def get_seed(self) -> Optional[int]:
+        return self._header['seed']
+
+    def get_update_interval(self) -> int:
+        return self._header['update_interval']
+
+    def get_config(self) -> Dict[str, Any]:
+        return self._header['config']
+
+    def get_end_time_ms(self) -> Optional[int]:
+        """
+        :return: Time the recorded game ended at, None if it has not been read yet or was never written
+        """
+        return self._end_time_ms
+
+    def has_pending_inputs(self) -> bool:
+        return self._next_input is not None
+
+    def poll(self, current_time_ms: int) -> List[ScriptedInput]:
+        inputs = []
+        while self._next_input is not None and self._next_input.time_ms <= current_time_ms:
+            inputs.append(self._next_input)
+            self._next_input = self._read_next_input()
+        return inputs
+
+    def _read_next_input(self) -> Optional[ScriptedInput]:
+        for line in self._lines:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == _END_MARKER:
+                self._end_time_ms = int(fields[1])
+                return None
+            time_ms, board_index, button = fields
+            return ScriptedInput(time_ms=int(time_ms), board_index=int(board_index), button=_BUTTONS[button])
+        return None
+
+
+def replay_input_log(replay: InputLogReplay, boards: List[Board], *, max_ticks: Optional[int] = None) -> HeadlessGame:
+    """
+    Replay a recorded game as fast as possible.
+    The boards need to be set up the same way as in the recorded game, using the seed of the log
+    :param replay: The log to replay
+    :param boards: Boards in the same order they were added to the recorded game
+    :param max_ticks: Upper limit of ticks to run. By default, the replay runs until the recorded
+        game ended, or until the last press when the log has no end
+    :return: The game the log was replayed in, after the last tick
+    """
+    game = HeadlessGame(update_interval=replay.get_update_interval())
+    for board in boards:
+        game.add_board(board)
+    game.add_input_source(replay)
+
+    while max_ticks is None or game.get_tick_count() < max_ticks:
+        end_time_ms = replay.get_end_time_ms()
+        if end_time_ms is not None:
+            if game.get_clock().now_ms() >= end_time_ms:
+                break
+        elif not replay.has_pending_inputs():
+            break
+        game.tick()
+    return game
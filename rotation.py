@@ -0,0 +1,69 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Tuple
+    from board_elements import ElementSet
+
+    # Coordinates of the elements of a set relative to its top left corner, in the order of its element pairs
+    Shape = Tuple[Tuple[int, int], ...]
+
+# Offsets tried, in order, when a rotated set does not fit where it is: one or two tiles
+# away from a wall, which is enough for the widest tetris piece, or one tile up from the floor
+WALL_KICK_OFFSETS: Tuple[Tuple[int, int], ...] = ((-1, 0), (1, 0), (-2, 0), (2, 0), (0, -1))
+
+
+class RotationTable:
+    """
+    Remembers how every shape of element set rotates, so a rotation is a single lookup.
+
+    Note:
+        Shapes are rotated the same way as RelativeElementSet.rotate_clockwise and
+        rotate_counterclockwise, the elements keep their order. Every rotation of the
+        sets added with add_element_set is computed up front, any other shape is
+        computed the first time it is rotated
+    """
+
+    def __init__(self):
+        self._rotations: Dict[Tuple[Shape, bool], Shape] = {}
+
+    def add_element_set(self, element_set: ElementSet):
+        """
+        Compute every rotation of an element set, such as one of the choices of a provider
+        """
+        shape = get_shape(element_set)
+        for clockwise in (True, False):
+            rotated_shape = shape
+            for _ in range(4):
+                rotated_shape = self.get_rotated_shape(rotated_shape, clockwise=clockwise)
+
+    def get_rotated_shape(self, shape: Shape, *, clockwise: bool) -> Shape:
+        """
+        :param shape: Coordinates relative to the top left corner, see get_shape
+        :return: The shape turned 90 degrees, relative to its new top left corner
+        """
+        key = (shape, clockwise)
+        rotated_shape = self._rotations.get(key)
+        if rotated_shape is None:
+            rotated_shape = self._rotations[key] = _rotate(shape, clockwise)
+        return rotated_shape
+
+
+def get_shape(element_set: ElementSet) -> Shape:
+    """
+    :return: The coordinates of the element set relative to its top left corner
+    """
+    pairs = element_set.get_element_pairs()
+    left_x = min(pair.coordinate.x for pair in pairs)
+    top_y = min(pair.coordinate.y for pair in pairs)
+    return tuple((pair.coordinate.x - left_x, pair.coordinate.y - top_y) for pair in pairs)
+
+
+def _rotate(shape: Shape, clockwise: bool) -> Shape:
+    if clockwise:
+        rotated = [(y, -x) for x, y in shape]
+    else:
+        rotated = [(-y, x) for x, y in shape]
+    left_x = min(x for x, _ in rotated)
+    top_y = min(y for _, y in rotated)
+    return tuple((x - left_x, y - top_y) for x, y in rotated)
@@ -5,8 +5,8 @@ from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, NamedTuple, Set
 
 if TYPE_CHECKING:
-    from typing import Optional, Union, List
-    from board import Board
+    from typing import Any, Optional, Union
+    from board import Board, DirtyRegion
     from board_elements import BoardElementSet, Coordinate
     from button_controller import DirectionButton, ActionButton
     from shift_rules import ShiftDirection
@@ -29,15 +29,33 @@ class NoMoreMatchesPossibleException(GameOverException):
     pass
 
 
-class MatchEventRule(ABC):
+class Rule(ABC):
+    """
+    Common base of every kind of rule.
+
+    Rules which keep state between updates, such as timers or random number
+    generators, override save_state and restore_state so that board snapshots
+    can include it. Rules without any state can keep the defaults
+    """
+    def save_state(self) -> Any:
+        """
+        :return: Anything restore_state can use to bring the rule back to its current state
+        """
+        return None
+
+    def restore_state(self, state: Any):
+        pass
+
+
+class MatchEventRule(Rule):
     """
     A single event to perform after an
     """
     @abstractmethod
-    def trigger(self, board: Board, coordinates: List[Coordinate]):
+    def trigger(self, board: Board, coordinates: Set[Coordinate]):
         ...
 
-class TileMatchRule(ABC):
+class TileMatchRule(Rule):
     """
     An interface defining how a board should check for tile matches.
 
@@ -53,28 +71,50 @@ class TileMatchRule(ABC):
     """
 
     @abstractmethod
-    def remove_matches(self, board: Board) -> List[Coordinate]:
+    def remove_matches(self, board: Board) -> Set[Coordinate]:
         """
         A single rule to check and delete matches on a board
         :param board: The board to check
-        :return: List of coordinates which were removed
+        :return: Set of coordinates which were removed
         """
         ...
 
     @abstractmethod
-    def check_matches(self, board) -> List[Coordinate]:
+    def check_matches(self, board) -> Set[Coordinate]:
         """
         A single rule to check matches on a board,
         Does not delete matches.
         This method is typically not used, except by other rules which
         might need this information
         :param board: The board to check
-        :return: List of coordinates where matches were found
+        :return: Set of coordinates where matches were found
         """
         ...
 
+    def check_matches_in_region(self, board: Board, region: DirtyRegion) -> Set[Coordinate]:
+        """
+        Same as check_matches, except that only matches which could have been
+        made by a change inside the region need to be found.
+        By default, the whole board is checked
+        :param board: The board to check
+        :param region: Rows and columns where tiles changed
+        :return: Set of coordinates where matches were found
+        """
+        return self.check_matches(board)
 
-class TileGeneratorRule(ABC):
+    def remove_matches_in_region(self, board: Board, region: DirtyRegion) -> Set[Coordinate]:
+        """
+        Same as remove_matches, except that only matches which could have been
+        made by a change inside the region need to be removed.
+        By default, the whole board is checked
+        :param board: The board to check
+        :param region: Rows and columns where tiles changed
+        :return: Set of coordinates which were removed
+        """
+        return self.remove_matches(board)
+
+
+class TileGeneratorRule(Rule):
     """
     An interface defining how a board should try to generate new tile on a single game tick
 
@@ -110,7 +150,7 @@ class TileGeneratorRule(ABC):
         ...
 
 
-class UserInputRule(ABC):
+class UserInputRule(Rule):
     """
     A single rule to determine how the board will handle user input
 
@@ -122,13 +162,22 @@ class UserInputRule(ABC):
     def handle_input(self, board: Board, *, event: Union[DirectionButton, ActionButton]):
         ...
 
+    def handle_repeated_input(self, board: Board, *, event: Union[DirectionButton, ActionButton], count: int):
+        """
+        Handle the same event `count` times in a row, which the board does when the event was queued
+        several times in a row. Rules which can do this in one go, such as moving by several tiles
+        at once, should override this, as long as the outcome is the same
+        """
+        for _ in range(count):
+            self.handle_input(board, event=event)
+
 
 class UserInputRuleSet(NamedTuple):
     input_rule: UserInputRule
     input_set: Set[DirectionButton | ActionButton]
 
 
-class TileMovementRule(ABC):
+class TileMovementRule(Rule):
     """
     A single rule to determine how tiles are intended to move
 
@@ -163,9 +212,15 @@ class TileMovementRule(ABC):
             raise ValueError(f"shift amount needs to be greater than one, not {shift_amount}")
         self._shift_amount = shift_amount
 
+    def get_shift_amount(self) -> int:
+        return self._shift_amount
+
     def enable_tile_movement(self):
         self._do_apply_move = True
 
+    def is_tile_movement_enabled(self) -> bool:
+        return self._do_apply_move
+
     def disable_tile_movement(self):
         self._do_apply_move = False
 
@@ -173,7 +228,7 @@ class TileMovementRule(ABC):
     def move_tiles(self, board: Board):
         ...
 
-class GravityRule(ABC):
+class GravityRule(Rule):
     def __init__(self):
         self.drop_interval = 1000
 
@@ -185,7 +240,7 @@ class GravityRule(ABC):
         ...
 
 
-class GameConditionRule(ABC):
+class GameConditionRule(Rule):
 
     @abstractmethod
     def check_game_condition(self, board: Board):
@@ -0,0 +1,114 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import math
+
+if TYPE_CHECKING:
+    from typing import Iterable, List, Optional
+    from board import Board
+    from clock import Clock
+
+
+def get_step_ms(update_interval_ms: int, boards: Iterable[Board]) -> int:
+    """
+    Boards only see time move on when they are updated, so a gravity rule which drops tiles more often
+    than the boards are updated would be slowed down to the update interval.
+    :return: The longest step, up to `update_interval_ms`, which every gravity rule's drop interval
+        is a multiple of
+    """
+    step_ms = update_interval_ms
+    for board in boards:
+        gravity_rule = board.get_gravity_rule()
+        if gravity_rule is not None and gravity_rule.drop_interval > 0:
+            step_ms = math.gcd(step_ms, gravity_rule.drop_interval)
+    return step_ms
+
+
+class FixedStepScheduler:
+    """
+    Decides when the simulation should step and when a frame should be drawn.
+
+    Every simulation step moves the simulation time forward by exactly `step_ms`,
+    no matter how late the step actually runs, so timed rules behave the same on
+    a slow machine as on a fast one. When steps are running late, the missed steps
+    are caught up back to back, up to `max_catch_up_steps` at a time. Anything past
+    that is dropped so that a machine which can't keep up slows the game down
+    instead of falling further and further behind.
+
+    Note:
+        Frames are never caught up. A late frame is drawn once and the next
+        frame is scheduled from the current time
+    """
+
+    def __init__(self, *, clock: Clock, step_ms: int, render_interval_ms: int, max_catch_up_steps: int = 5):
+        if step_ms <= 0:
+            raise ValueError(f"step_ms needs to be greater than zero, not {step_ms}")
+        if render_interval_ms <= 0:
+            raise ValueError(f"render_interval_ms needs to be greater than zero, not {render_interval_ms}")
+        if max_catch_up_steps <= 0:
+            raise ValueError(f"max_catch_up_steps needs to be greater than zero, not {max_catch_up_steps}")
+        self._clock = clock
+        self._step_ms = step_ms
+        self._render_interval_ms = render_interval_ms
+        self._max_catch_up_steps = max_catch_up_steps
+        self._simulation_time_ms = 0
+        self._next_step_at: Optional[int] = None
+        self._next_render_at: Optional[int] = None
+        self._dropped_step_count = 0
+
+    def start(self):
+        now = self._clock.now_ms()
+        self._next_step_at = now
+        self._next_render_at = now
+
+    def get_simulation_time_ms(self) -> int:
+        """
+        :return: The simulation time the next step will run at
+        """
+        return self._simulation_time_ms
+
+    def get_dropped_step_count(self) -> int:
+        return self._dropped_step_count
+
+    def take_due_steps(self) -> List[int]:
+        """
+        Collect every simulation step which is due, marking them as done
+        :return: The simulation time of each step, in order
+        """
+        self._check_started()
+        now = self._clock.now_ms()
+        steps = []
+        while self._next_step_at <= now and len(steps) < self._max_catch_up_steps:
+            steps.append(self._simulation_time_ms)
+            self._simulation_time_ms += self._step_ms
+            self._next_step_at += self._step_ms
+
+        if self._next_step_at <= now:
+            behind = (now - self._next_step_at) // self._step_ms + 1
+            self._dropped_step_count += behind
+            self._next_step_at += behind * self._step_ms
+        return steps
+
+    def take_render_due(self) -> bool:
+        """
+        Check if a frame should be drawn, marking it as done if so
+        """
+        self._check_started()
+        now = self._clock.now_ms()
+        if now < self._next_render_at:
+            return False
+        self._next_render_at += self._render_interval_ms
+        if self._next_render_at <= now:
+            self._next_render_at = now + self._render_interval_ms
+        return True
+
+    def get_delay_until_next_ms(self) -> int:
+        """
+        :return: Time until either a step or a frame is due
+        """
+        self._check_started()
+        return max(0, min(self._next_step_at, self._next_render_at) - self._clock.now_ms())
+
+    def _check_started(self):
+        if self._next_step_at is None:
+            raise RuntimeError("scheduler was not started")
@@ -4,10 +4,12 @@ from typing import TYPE_CHECKING
 
 from enum import Enum, auto
 
-from board_elements import ElementSet, Coordinate
+from board import TileElement
+from board_elements import ElementSet
 from rules import TileMovementRule
 
 if TYPE_CHECKING:
+    from typing import List
     from board import Board
 
 
@@ -19,80 +21,118 @@ class ShiftDirection(Enum):
 
 
 class ShiftStaticTilesRule(TileMovementRule):
+    """
+    Moves every static tile which is able to move by up to the shift amount in the shift direction.
+
+    Note:
+        Every column, or every row when shifting left or right, is worked out on its own as
+        a list of where the contents of each tile end up, after which only the tiles whose
+        contents changed are written. Lines without an empty tile are skipped, since nothing
+        can move in them. With settle to rest enabled, the shift amount is ignored and tiles
+        move as far as they can in a single update, stacking up on tiles which can't move
+    """
 
     def __init__(self):
         # by convenience
-        self._shift_direction: int = 1
+        self._shift_amount: int = 1
         self._shift_direction: ShiftDirection = ShiftDirection.DOWN
+        self._do_apply_move: bool = False
+        self._do_settle_to_rest: bool = False
+
+    def enable_settle_to_rest(self):
+        self._do_settle_to_rest = True
+
+    def disable_settle_to_rest(self):
+        self._do_settle_to_rest = False
+
+    def is_settle_to_rest_enabled(self) -> bool:
+        return self._do_settle_to_rest
 
     def move_tiles(self, board: Board):
         if not self._do_apply_move:
             return
+        for line in self._get_lines(board):
+            is_empty = [not tile.has_elements() for tile in line]
+            if not any(is_empty):
+                continue
+            can_move = [tile.can_support_move() for tile in line]
+            if self._do_settle_to_rest:
+                sources = settle_line(is_empty, can_move)
+            else:
+                sources = shift_line(is_empty, can_move, self._shift_amount)
+            TileElement.rearrange_contents(line, sources)
+
+    def _get_lines(self, board: Board) -> List[List[TileElement]]:
+        """
+        :return: Every line of tiles which move along each other, ordered in the shift direction
+        """
         if self._shift_direction == ShiftDirection.UP:
-            self._shift_all_up(board)
+            return [board.get_tile_column(x)[::-1] for x in range(board.get_width())]
         elif self._shift_direction == ShiftDirection.DOWN:
-            self._shift_all_down(board)
+            return [board.get_tile_column(x) for x in range(board.get_width())]
         elif self._shift_direction == ShiftDirection.LEFT:
-            self._shift_all_left(board)
+            return [board.get_tile_row(y)[::-1] for y in range(board.get_height())]
         elif self._shift_direction == ShiftDirection.RIGHT:
-            self._shift_all_right(board)
-
-    def _shift_all_up(self, board: Board):
-        for y in range(board.get_height()):
-            for x in range(board.get_width()):
-                for i in range(self._shift_amount):
-                    source_coordinate = Coordinate(x, y - i)
-                    target_coordinate = Coordinate(x, y - i - 1)
-                    if (not board.is_valid_coordinate(target_coordinate) or
-                            board.get_tile_at(target_coordinate).has_elements() or
-                            not board.get_tile_at(source_coordinate).can_support_move()):
-                        continue
-                    board.swap_tile_contents(source_coordinate, target_coordinate)
-
-    # This one was the original source
-    def _shift_all_down(self, board: Board):
-        for y in reversed(range(board.get_height())):
-            for x in range(board.get_width()):
-                for i in range(self._shift_amount):
-                    source_coordinate = Coordinate(x, y + i)
-                    target_coordinate = Coordinate(x, y + i + 1)
-                    if (not board.is_valid_coordinate(target_coordinate) or
-                            board.get_tile_at(target_coordinate).has_elements() or
-                            not board.get_tile_at(source_coordinate).can_support_move()):
-                        continue
-                    board.swap_tile_contents(source_coordinate, target_coordinate)
-
-    def _shift_all_left(self, board: Board):
-        for x in range(board.get_width()):  # Iterate left to right
-            for y in range(board.get_height()):
-                for i in range(self._shift_amount):
-                    source_coordinate = Coordinate(x - i, y)  # Move left
-                    target_coordinate = Coordinate(x - i - 1, y)
-                    if (not board.is_valid_coordinate(target_coordinate) or
-                            board.get_tile_at(target_coordinate).has_elements() or
-                            not board.get_tile_at(source_coordinate).can_support_move()):
-                        continue
-                    board.swap_tile_contents(source_coordinate, target_coordinate)
-
-    def _shift_all_right(self, board: Board):
-        for x in reversed(range(board.get_width())):  # Iterate right to left
-            for y in range(board.get_height()):
-                for i in range(self._shift_amount):
-                    source_coordinate = Coordinate(x + i, y)  # Move right
-                    target_coordinate = Coordinate(x + i + 1, y)
-                    if (not board.is_valid_coordinate(target_coordinate) or
-                            board.get_tile_at(target_coordinate).has_elements() or
-                            not board.get_tile_at(source_coordinate).can_support_move()):
-                        continue
-                    board.swap_tile_contents(source_coordinate, target_coordinate)
+            return [board.get_tile_row(y) for y in range(board.get_height())]
+        return []
+
+
+def shift_line(is_empty: List[bool], can_move: List[bool], shift_amount: int) -> List[int]:
+    """
+    Move tiles along a line the same way as shifting them one tile at a time, starting from
+    the far end of the line: a tile moves to the next tile while that one is empty, at most
+    `shift_amount` times, and each step also moves whatever tile is in the way of the previous one
+    :param is_empty: Whether each tile of the line is empty, ordered in the shift direction
+    :param can_move: Whether each tile of the line can move
+    :return: The index each tile of the line gets its contents from
+    """
+    is_empty = is_empty[:]
+    can_move = can_move[:]
+    sources = list(range(len(is_empty)))
+    for start in reversed(range(len(is_empty))):
+        for source in range(start, min(start + shift_amount, len(is_empty) - 1)):
+            target = source + 1
+            if not is_empty[target] or not can_move[source] or is_empty[source]:
+                continue
+            sources[source], sources[target] = sources[target], sources[source]
+            is_empty[source], is_empty[target] = True, False
+            can_move[source], can_move[target] = can_move[target], can_move[source]
+    return sources
+
+
+def settle_line(is_empty: List[bool], can_move: List[bool]) -> List[int]:
+    """
+    Move every tile which can move as far along a line as it can, keeping the tiles in order
+    :param is_empty: Whether each tile of the line is empty, ordered in the shift direction
+    :param can_move: Whether each tile of the line can move
+    :return: The index each tile of the line gets its contents from
+    """
+    sources = list(range(len(is_empty)))
+    # the furthest tile the next tile can move to
+    landing = len(is_empty) - 1
+    for index in reversed(range(len(is_empty))):
+        if is_empty[index]:
+            continue
+        if can_move[index]:
+            sources[index], sources[landing] = sources[landing], sources[index]
+            landing -= 1
+        else:
+            landing = index - 1
+    return sources
 
 
 class ShiftLiveTilesRule(TileMovementRule):
+    """
+    Shifts the live tiles by the shift amount on every move. A shift which is blocked anywhere along the way
+    is refused as a whole, and the live tiles stay where they are, locked to the board when they were
+    shifted the way static tiles move
+    """
 
     def __init__(self):
         # by convenience
-        self._shift_direction: int = 1
+        self._shift_amount: int = 1
         self._shift_direction: ShiftDirection = ShiftDirection.DOWN
+        self._do_apply_move: bool = False
 
     def move_tiles(self, board: Board):
         if not self._do_apply_move:
@@ -113,12 +153,10 @@ class ShiftLiveTilesRule(TileMovementRule):
         shifted_set = board.get_live_tiles()
         for i in range(self._shift_amount):
             test_set = ElementSet.shift_elements(shifted_set, vertical=-1)
-            for pair in test_set.get_element_pairs():
-                if not (board.is_valid_coordinate(pair.coordinate) and
-                        board.get_tile_at(pair.coordinate).can_move_through()):
-                    if board.get_static_tile_move_direction() == self._shift_direction:
-                        board.lock_live_tiles_to_board()
-                    return
+            if self._is_blocked(board, test_set):
+                if board.get_static_tile_move_direction() == self._shift_direction:
+                    board.lock_live_tiles_to_board()
+                return
             shifted_set = test_set
         board.set_live_tile(shifted_set)
 
@@ -126,12 +164,10 @@ class ShiftLiveTilesRule(TileMovementRule):
         shifted_set = board.get_live_tiles()
         for i in range(self._shift_amount):
             test_set = ElementSet.shift_elements(shifted_set, vertical=1)
-            for pair in test_set.get_element_pairs():
-                if not (board.is_valid_coordinate(pair.coordinate) and
-                        board.get_tile_at(pair.coordinate).can_move_through()):
-                    if board.get_static_tile_move_direction() == self._shift_direction:
-                        board.lock_live_tiles_to_board()
-                    return
+            if self._is_blocked(board, test_set):
+                if board.get_static_tile_move_direction() == self._shift_direction:
+                    board.lock_live_tiles_to_board()
+                return
             shifted_set = test_set
         board.set_live_tile(shifted_set)
 
@@ -142,14 +178,12 @@ class ShiftLiveTilesRule(TileMovementRule):
         for i in range(self._shift_amount):
             test_set = ElementSet.shift_elements(shifted_set, horizontal=-1)
             # check if the move was valid
-            for pair in test_set.get_element_pairs():
-                # If not, if it happens to be in the
-                # direction that static tiles move
-                if not (board.is_valid_coordinate(pair.coordinate) and
-                        board.get_tile_at(pair.coordinate).can_move_through()):
-                    if board.get_static_tile_move_direction() == self._shift_direction:
-                        board.lock_live_tiles_to_board()
-                    return
+            # If not, refuse the whole shift, and lock the tiles
+            # if it happens to be in the direction that static tiles move
+            if self._is_blocked(board, test_set):
+                if board.get_static_tile_move_direction() == self._shift_direction:
+                    board.lock_live_tiles_to_board()
+                return
             # otherwise, continue shifting
             shifted_set = test_set
         # when the full shift was complete, set the live tile
@@ -160,12 +194,19 @@ class ShiftLiveTilesRule(TileMovementRule):
         shifted_set = board.get_live_tiles()
         for i in range(self._shift_amount):
             test_set = ElementSet.shift_elements(shifted_set, horizontal=1)
-            for pair in test_set.get_element_pairs():
-                if not (board.is_valid_coordinate(pair.coordinate) and
-                        board.get_tile_at(pair.coordinate).can_move_through()):
-                    if board.get_static_tile_move_direction() == self._shift_direction:
-                        board.lock_live_tiles_to_board()
-                    return
+            if self._is_blocked(board, test_set):
+                if board.get_static_tile_move_direction() == self._shift_direction:
+                    board.lock_live_tiles_to_board()
+                return
             shifted_set = test_set
         board.set_live_tile(shifted_set)
-        
\ No newline at end of file
+
+    @staticmethod
+    def _is_blocked(board: Board, test_set: ElementSet) -> bool:
+        if board.has_row_occupancy():
+            return board.get_row_occupancy().overlaps_blocked(test_set)
+        for pair in test_set.get_element_pairs():
+            if not (board.is_valid_coordinate(pair.coordinate) and
+                    board.get_tile_at(pair.coordinate).can_move_through()):
+                return True
+        return False
@@ -0,0 +1,155 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import bisect
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from clock import VirtualClock
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Optional, Union
+    from board import Board
+    from button_controller import DirectionButton, ActionButton
+
+
+@dataclass(frozen=True)
+class ScriptedInput:
+    """
+    A single button press which is meant to happen at a specific time
+    """
+    time_ms: int
+    board_index: int
+    button: Union[DirectionButton, ActionButton]
+
+
+class InputSource(ABC):
+    """
+    Provides button presses to a headless game. This takes the place of a
+    ButtonController when there is no window to receive events from
+    """
+
+    @abstractmethod
+    def poll(self, current_time_ms: int) -> Iterable[ScriptedInput]:
+        """
+        Collect every input which should be applied before the boards are updated
+        :param current_time_ms: The time of the tick about to be run
+        :return: Inputs in the order they should be applied
+        """
+        ...
+
+
+class ScriptedInputSource(InputSource):
+    """
+    Replays a predetermined list of inputs. Inputs scheduled for the same
+    time are applied in the order they were added
+    """
+
+    def __init__(self, inputs: Iterable[ScriptedInput] = ()):
+        self._inputs: List[ScriptedInput] = []
+        self._next_index = 0
+        for scripted_input in inputs:
+            self.add_input(scripted_input)
+
+    def add_input(self, scripted_input: ScriptedInput):
+        if scripted_input.time_ms < self._last_polled_time():
+            raise ValueError(f"input at {scripted_input.time_ms}ms has already been passed")
+        bisect.insort_right(self._inputs, scripted_input, lo=self._next_index, key=lambda i: i.time_ms)
+
+    def has_pending_inputs(self) -> bool:
+        return self._next_index < len(self._inputs)
+
+    def poll(self, current_time_ms: int) -> List[ScriptedInput]:
+        start = self._next_index
+        while self._next_index < len(self._inputs) and self._inputs[self._next_index].time_ms <= current_time_ms:
+            self._next_index += 1
+        return self._inputs[start:self._next_index]
+
+    def _last_polled_time(self) -> int:
+        return self._inputs[self._next_index - 1].time_ms if self._next_index > 0 else 0
+
+
+class HeadlessGame:
+    """
+    Runs boards without a window. Unlike Game, time only passes when a tick
+    is run, so boards are updated as fast as the CPU allows while the rules
+    still see the same times they would in a real game.
+
+    Note:
+        Boards report their score to this class the same way they would
+        to Game, so scores can be compared between the two
+    """
+
+    def __init__(self, *, clock: Optional[VirtualClock] = None, update_interval: int = 100):
+        self._clock: VirtualClock = clock if clock is not None else VirtualClock()
+        self.update_interval = update_interval
+        self._boards: List[Board] = []
+        self._input_sources: List[InputSource] = []
+        self._tick_count = 0
+        self.scores: Dict[Board, int] = {}
+
+    def add_board(self, board: Board):
+        board.set_game(self)
+        self._boards.append(board)
+        self.scores[board] = 0
+
+    def get_board(self, index: int, /) -> Board:
+        if index not in range(len(self._boards)):
+            raise IndexError
+        return self._boards[index]
+
+    def get_boards(self) -> List[Board]:
+        return self._boards
+
+    def add_input_source(self, input_source: InputSource):
+        self._input_sources.append(input_source)
+
+    def get_clock(self) -> VirtualClock:
+        return self._clock
+
+    def get_tick_count(self) -> int:
+        return self._tick_count
+
+    def get_score(self, index: int, /) -> int:
+        return self.scores[self.get_board(index)]
+
+    def update_score(self, board: Board, points: int):
+        self.scores[board] = self.scores.get(board, 0) + points
+
+    def is_game_over(self) -> bool:
+        return len(self._boards) > 0 and all(board.is_game_over() for board in self._boards)
+
+    def tick(self):
+        """
+        Apply any inputs which are due, update every board once,
+        then move the clock forward by a single update interval
+        """
+        current_time = self._clock.now_ms()
+        for input_source in self._input_sources:
+            for scripted_input in input_source.poll(current_time):
+                self.press(scripted_input.button, board_index=scripted_input.board_index)
+
+        for board in self._boards:
+            board.update(current_time)
+
+        self._tick_count += 1
+        self._clock.advance(self.update_interval)
+
+    def run(self, *, max_ticks: int, stop_on_game_over: bool = True) -> int:
+        """
+        Run ticks back to back
+        :param max_ticks: Upper limit of ticks to run
+        :param stop_on_game_over: Stop early once every board has reached a game over
+        :return: Number of ticks which were run
+        """
+        ticks_run = 0
+        while ticks_run < max_ticks and not (stop_on_game_over and self.is_game_over()):
+            self.tick()
+            ticks_run += 1
+        return ticks_run
+
+    def press(self, button: Union[DirectionButton, ActionButton], *, board_index: int):
+        """
+        Queue a button press for the next update of a board, the same way Game.bind does
+        """
+        self.get_board(board_index).queue_input(button, time_ms=self._clock.now_ms())
@@ -0,0 +1,116 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from abc import abstractmethod
+from dataclasses import dataclass
+
+from board_elements import GameElement
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Sprite:
+    """
+    A single canvas item describing how an element looks inside a cell.
+    Points are relative to the top left corner of the cell, so the same
+    sprite can be drawn in any cell of the same size
+    """
+    # Name of the canvas item, e.g. 'polygon' for canvas.create_polygon
+    item_type: str
+    points: Tuple[float, ...]
+    options: Tuple[Tuple[str, Any], ...]
+
+    def draw(self, canvas, x1: float, y1: float) -> int:
+        return getattr(canvas, f'create_{self.item_type}')(*self.get_coordinates(x1, y1), **dict(self.options))
+
+    def can_redraw(self, previous: Sprite) -> bool:
+        """
+        Check if an item drawn from another sprite can be turned into this one, which needs the
+        same item type and options, since options the sprite does not set would be kept otherwise
+        """
+        return (self is previous or self.item_type == previous.item_type and
+                [name for name, _ in self.options] == [name for name, _ in previous.options])
+
+    def redraw(self, canvas, item: int, x1: float, y1: float, *, previous: Sprite):
+        """
+        Turn an item drawn from another sprite into this one without recreating it, see can_redraw
+        """
+        canvas.coords(item, *self.get_coordinates(x1, y1))
+        if self.options != previous.options:
+            canvas.itemconfigure(item, **dict(self.options))
+
+    def get_coordinates(self, x1: float, y1: float) -> list:
+        """
+        :return: The points of the sprite in a cell with its top left corner at (x1, y1)
+        """
+        return [point + (x1 if i % 2 == 0 else y1) for i, point in enumerate(self.points)]
+
+
+class SpriteCache:
+    """
+    Sprites built for a specific element look and cell size.
+
+    Note:
+        The cell size is part of every key, so a board with a different
+        cell size never reuses a sprite built for another size.
+        Sprites for sizes which are no longer used can be dropped with invalidate
+    """
+    def __init__(self):
+        self._sprites: Dict[Tuple[Hashable, float, float], Sprite] = {}
+
+    def get_sprite(self, element: CachedSpriteElement, width: float, height: float) -> Sprite:
+        key = (element.get_sprite_key(), width, height)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = element.make_sprite(width, height)
+            self._sprites[key] = sprite
+        return sprite
+
+    def invalidate(self, cell_size: Optional[Tuple[float, float]] = None):
+        """
+        Drop cached sprites
+        :param cell_size: Only drop sprites for this (width, height), every sprite otherwise
+        """
+        if cell_size is None:
+            self._sprites.clear()
+            return
+        self._sprites = {key: sprite for key, sprite in self._sprites.items() if key[1:] != cell_size}
+
+    def __len__(self):
+        return len(self._sprites)
+
+
+SPRITE_CACHE = SpriteCache()
+
+
+class CachedSpriteElement(GameElement):
+    """
+    A game element which is drawn from a cached sprite instead of being
+    drawn from scratch every time.
+
+    Implementing classes describe their look once per cell size in make_sprite.
+    Elements with the same sprite key must look the same
+    """
+
+    @abstractmethod
+    def make_sprite(self, width: float, height: float) -> Sprite:
+        """
+        Build the sprite of this element for a cell with the given size
+        """
+        ...
+
+    def get_sprite_key(self) -> Hashable:
+        return type(self), self.element_name, self.element_color
+
+    def get_cell_sprite(self, x1: float, y1: float, x2: float, y2: float) -> Sprite:
+        """
+        :return: The sprite of this element for a cell with the given bounds
+        """
+        # Cell bounds are floats, so cells of the same size can differ in their last digits
+        width, height = round(x2 - x1, 6), round(y2 - y1, 6)
+        return SPRITE_CACHE.get_sprite(self, width, height)
+
+    def draw(self, canvas, x1: int, y1: int, x2: int, y2: int):
+        self.get_cell_sprite(x1, y1, x2, y2).draw(canvas, x1, y1)
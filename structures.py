@@ -1,5 +1,5 @@
 import copy
-from typing import TypeVar, Generic, Callable
+from typing import TypeVar, Generic, Callable, List
 
 T = TypeVar('T')
 
@@ -54,6 +54,23 @@ class Matrix(Generic[T]):
         self._check_bounds(r, c)
         return self._entry[r][c]
 
+    def get_row_mutable(self, r: int) -> List[T]:
+        """
+        Returns references to every element in a row. The list itself is a copy,
+        so changing it does not change the matrix
+        :return: mutable instances of the row's elements
+        """
+        self._check_bounds(r, 0)
+        return self._entry[r][:]
+
+    def get_column_mutable(self, c: int) -> List[T]:
+        """
+        Same as get_row_mutable, except for a column
+        :return: mutable instances of the column's elements
+        """
+        self._check_bounds(0, c)
+        return [row[c] for row in self._entry]
+
     def get_copy(self, r: int, c: int) -> T:
         """
         Returns a copy which is safe to mutate, preserving the original value
@@ -0,0 +1,139 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from board import Board, TileChangeListener
+from board_elements import Coordinate
+
+if TYPE_CHECKING:
+    from typing import List, Set, Tuple
+
+    # (x, y, dx, dy) swaps the tile at (x, y) with the tile at (x + dx, y + dy)
+    Swap = Tuple[int, int, int, int]
+
+
+class LegalSwapIndex(TileChangeListener):
+    """
+    Keeps track of every swap of two neighbouring tiles which would make a
+    line of `match_length` tiles sharing a color through one of the swapped tiles.
+
+    Note:
+        Whether a swap makes a match only depends on the tiles within
+        `match_length - 1` of the swapped tiles along their row and column.
+        When a tile changes, only the swaps near it are checked again, and this
+        is delayed until the index is queried, so a tile which changes many
+        times in a single tick is only looked at once
+    """
+
+    def __init__(self, board: Board, match_length: int = 3):
+        self._width = board.get_width()
+        self._height = board.get_height()
+        self._match_length = match_length
+        self._color_masks: List[List[int]] = [[0] * self._width for _ in range(self._height)]
+        self._movable: List[List[bool]] = [[True] * self._width for _ in range(self._height)]
+        self._empty: List[List[bool]] = [[True] * self._width for _ in range(self._height)]
+        self._empty_tile_count = self._width * self._height
+        self._legal_swaps: Set[Swap] = set()
+        self._changed_tiles: Set[Tuple[int, int]] = set()
+
+        for y in range(self._height):
+            for x, tile in enumerate(board.get_tile_row(y)):
+                self._store_tile(x, y, tile)
+        for y in range(self._height):
+            for x in range(self._width):
+                for swap in ((x, y, 1, 0), (x, y, 0, 1)):
+                    if self._makes_match(swap):
+                        self._legal_swaps.add(swap)
+
+    def on_tile_change(self, board: Board, coordinate: Coordinate):
+        self._store_tile(coordinate.x, coordinate.y, board.get_tile_at(coordinate))
+        self._changed_tiles.add((coordinate.x, coordinate.y))
+
+    def get_match_length(self) -> int:
+        return self._match_length
+
+    def has_empty_tiles(self) -> bool:
+        return self._empty_tile_count > 0
+
+    def has_legal_swaps(self) -> bool:
+        self._refresh()
+        return len(self._legal_swaps) > 0
+
+    def get_legal_swaps(self) -> List[Tuple[Coordinate, Coordinate]]:
+        """
+        :return: Pairs of coordinates which would make a match if their contents were swapped
+        """
+        self._refresh()
+        return [(Coordinate(x, y), Coordinate(x + dx, y + dy)) for x, y, dx, dy in sorted(self._legal_swaps)]
+
+    def _store_tile(self, x: int, y: int, tile):
+        self._color_masks[y][x] = tile.get_color_mask()
+        self._movable[y][x] = tile.can_support_move()
+        is_empty = not tile.has_elements()
+        if is_empty != self._empty[y][x]:
+            self._empty_tile_count += 1 if is_empty else -1
+            self._empty[y][x] = is_empty
+
+    def _refresh(self):
+        if not self._changed_tiles:
+            return
+        reach = self._match_length - 1
+        affected: Set[Swap] = set()
+        for cx, cy in self._changed_tiles:
+            # any swap with an end on the same row or column, close enough to see this tile
+            ends = [(x, cy) for x in range(max(0, cx - reach), min(self._width, cx + reach + 1))]
+            ends += [(cx, y) for y in range(max(0, cy - reach), min(self._height, cy + reach + 1)) if y != cy]
+            for x, y in ends:
+                affected.update(((x, y, 1, 0), (x - 1, y, 1, 0), (x, y, 0, 1), (x, y - 1, 0, 1)))
+        self._changed_tiles.clear()
+
+        for swap in affected:
+            if self._makes_match(swap):
+                self._legal_swaps.add(swap)
+            else:
+                self._legal_swaps.discard(swap)
+
+    def _makes_match(self, swap: Swap) -> bool:
+        x1, y1, dx, dy = swap
+        x2, y2 = x1 + dx, y1 + dy
+        if not (0 <= x1 and 0 <= y1 and x2 < self._width and y2 < self._height):
+            return False
+        if not (self._movable[y1][x1] and self._movable[y2][x2]):
+            return False
+        masks = self._color_masks
+        mask1, mask2 = masks[y1][x1], masks[y2][x2]
+
+        def mask_at(x: int, y: int) -> int:
+            if x == x1 and y == y1:
+                return mask2
+            if x == x2 and y == y2:
+                return mask1
+            return masks[y][x]
+
+        for x, y in ((x1, y1), (x2, y2)):
+            if (self._has_run_through(x, y, 1, 0, mask_at) or
+                    self._has_run_through(x, y, 0, 1, mask_at)):
+                return True
+        return False
+
+    def _has_run_through(self, x: int, y: int, step_x: int, step_y: int, mask_at) -> bool:
+        length = self._match_length
+        for offset in range(-length + 1, 1):
+            start_x, start_y = x + offset * step_x, y + offset * step_y
+            end_x, end_y = start_x + (length - 1) * step_x, start_y + (length - 1) * step_y
+            if start_x < 0 or start_y < 0 or end_x >= self._width or end_y >= self._height:
+                continue
+            common = mask_at(start_x, start_y)
+            for i in range(1, length):
+                common &= mask_at(start_x + i * step_x, start_y + i * step_y)
+            if common:
+                return True
+        return False
+
+
+def get_legal_swap_index(board: Board, match_length: int) -> LegalSwapIndex:
+    """
+    :return: The legal swap index of the board, which is replaced when it was built for another match length
+    """
+    if not board.has_legal_swap_index() or board.get_legal_swap_index().get_match_length() != match_length:
+        board.set_legal_swap_index(LegalSwapIndex(board, match_length))
+    return board.get_legal_swap_index()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from board import Board, BoardSnapshot, DirtyRegion
+from board_elements import Coordinate
+from match_rules import MatchNOfColorRule
+from rules import MatchEventRule
+from swap_index import get_legal_swap_index
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from typing import FrozenSet, List, Optional, Sequence, Set, Tuple
+    from board_elements import GameElement
+    from rules import TileMatchRule, TileGeneratorRule, TileMovementRule
+
+    Row = Tuple[Tuple[GameElement, ...], ...]
+    # (x1, y1, x2, y2) swaps the tile at (x1, y1) with the tile at (x2, y2)
+    Swap = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True, slots=True)
+class SwapEvaluation:
+    """
+    The outcome of swapping two tiles, once the board settled again.
+    `cascade_depth` is the number of times the match rule removed tiles, which is
+    also the score the swap is worth, and `cleared_tiles` the number of tiles it removed
+    """
+    first: Coordinate
+    second: Coordinate
+    cascade_depth: int
+    cleared_tiles: int
+
+
+class _SearchState(NamedTuple):
+    """
+    Everything needed to play out a swap without the board, so it can be sent to other processes
+    """
+    rows: Tuple[Row, ...]
+    dirty_rows: FrozenSet[int]
+    dirty_columns: FrozenSet[int]
+    match_rule: TileMatchRule
+    generator_rule: Optional[TileGeneratorRule]
+    move_rule: Optional[TileMovementRule]
+    match_events: Tuple[MatchEventRule, ...]
+    resolve_cascades: bool
+    max_cascade_depth: int
+
+
+class SwapSolver:
+    """
+    Finds the swap of two neighbouring tiles which scores the most on a board
+    using the rules of cursor based match games, such as apply_bejeweled_rule.
+
+    Every swap which makes a match is played out on a scratch board running the board's own
+    match, generate and move rules and match events, tick by tick with Board.update, or
+    with Board.resolve_cascade when the board resolves cascades. This goes on until the board
+    settles or the match rule removed tiles `max_cascade_depth` times. The state of the rules,
+    such as the generator's provider, is restored after every swap, so generated tiles are
+    the ones the board would get and the rules are left as they were.
+
+    Note:
+        Gravity and game conditions are ignored. The scratch board is restored to the board's tiles
+        before every swap, which only rewrites the rows the last swap changed. With a MatchNOfColorRule,
+        the swaps to play out come from the board's legal swap index, which is shared with
+        CheckIfMatchPossibleRule, instead of being searched for on every call. With any other match rule,
+        every swap of two movable neighbouring tiles is tried the same way CursorApplySelectionRule does
+    """
+
+    def __init__(self, *, max_cascade_depth: int = 3, executor: Optional[Executor] = None, chunk_size: int = 64):
+        """
+        :param max_cascade_depth: Number of times the match rule can remove tiles before a swap stops being played out
+        :param executor: Plays out the swaps in parallel when set. Swaps are sent to it in chunks of `chunk_size`,
+            so with a ProcessPoolExecutor, the elements and rules of the board need to be picklable
+        """
+        if max_cascade_depth <= 0:
+            raise ValueError(f"cascade depth needs to be greater than zero, not {max_cascade_depth}")
+        if chunk_size <= 0:
+            raise ValueError(f"chunk size needs to be greater than zero, not {chunk_size}")
+        self._max_cascade_depth = max_cascade_depth
+        self._executor = executor
+        self._chunk_size = chunk_size
+        # Reused between calls as long as the board's size and rules stay the same
+        self._scratch: Optional[_ScratchBoard] = None
+
+    def set_max_cascade_depth(self, max_cascade_depth: int):
+        if max_cascade_depth <= 0:
+            raise ValueError(f"cascade depth needs to be greater than zero, not {max_cascade_depth}")
+        self._max_cascade_depth = max_cascade_depth
+
+    def get_max_cascade_depth(self) -> int:
+        return self._max_cascade_depth
+
+    def find_best_swap(self, board: Board) -> Optional[SwapEvaluation]:
+        """
+        :return: The swap with the deepest cascade, then the most cleared tiles.
+            Ties go to the swap closest to the top left. None if no swap makes a match
+        """
+        best = None
+        for evaluation in self.evaluate_swaps(board):
+            if best is None or (evaluation.cascade_depth, evaluation.cleared_tiles) > (best.cascade_depth,
+                                                                                       best.cleared_tiles):
+                best = evaluation
+        return best
+
+    def evaluate_swaps(self, board: Board) -> List[SwapEvaluation]:
+        """
+        Play out every swap which makes a match
+        :return: The outcome of every such swap, ordered by the swapped coordinates
+        """
+        match_rule = board.get_tile_match_rule()
+        if match_rule is None:
+            raise ValueError("swaps can only be played out on a board with a match rule")
+        if isinstance(match_rule, MatchNOfColorRule):
+            swaps: Optional[List[Swap]] = [
+                (first.x, first.y, second.x, second.y)
+                for first, second in get_legal_swap_index(board, match_rule.get_match_length()).get_legal_swaps()]
+            if not swaps:
+                return []
+        else:
+            # Found while playing the swaps out
+            swaps = None
+
+        snapshot = board.take_snapshot()
+        state = _SearchState(
+            rows=snapshot.rows,
+            dirty_rows=snapshot.dirty_rows,
+            dirty_columns=snapshot.dirty_columns,
+            match_rule=match_rule,
+            generator_rule=board.get_tile_generator_rule(),
+            move_rule=board.get_static_tile_move_rule(),
+            match_events=tuple(board.get_match_event_rules()),
+            resolve_cascades=board.is_cascade_resolution_enabled(),
+            max_cascade_depth=self._max_cascade_depth,
+        )
+
+        if self._executor is None:
+            scratch = self._get_scratch_board(board, state)
+            if swaps is None:
+                swaps = scratch.find_swaps()
+            outcomes = scratch.play_out_swaps(state, swaps)
+        else:
+            if swaps is None:
+                swaps = _ScratchBoard.from_state(state).find_swaps()
+            chunks = [swaps[i:i + self._chunk_size] for i in range(0, len(swaps), self._chunk_size)]
+            outcomes = [outcome for chunk in self._executor.map(_play_out_swaps, [state] * len(chunks), chunks)
+                        for outcome in chunk]
+
+        return [SwapEvaluation(first=board.get_coordinate(x1, y1), second=board.get_coordinate(x2, y2),
+                               cascade_depth=cascade_depth, cleared_tiles=cleared_tiles)
+                for (x1, y1, x2, y2), (cascade_depth, cleared_tiles) in zip(swaps, outcomes)]
+
+    def _get_scratch_board(self, board: Board, state: _SearchState) -> _ScratchBoard:
+        if self._scratch is None or not self._scratch.can_play_out(board.get_height(), board.get_width(), state):
+            self._scratch = _ScratchBoard.from_state(state)
+        else:
+            self._scratch.load(state)
+        return self._scratch
+
+
+class _MatchCounter(MatchEventRule):
+    """
+    Counts the matches of the scratch board, as the last of its match events
+    """
+
+    def __init__(self):
+        self.match_count = 0
+        self.cleared_tiles = 0
+
+    def trigger(self, board: Board, coordinates: Set[Coordinate]):
+        self.match_count += 1
+        self.cleared_tiles += len(coordinates)
+
+
+class _ScratchBoard:
+    """
+    A board without a game, listeners or cursor, which runs the match, generate and move rules
+    and the match events of another board on a copy of its tiles
+    """
+
+    def __init__(self, height: int, width: int, state: _SearchState):
+        self._board = Board(height=height, width=width)
+        self._rules = (state.match_rule, state.generator_rule, state.move_rule) + state.match_events
+        self._board.set_tile_match_rule(state.match_rule)
+        if state.generator_rule is not None:
+            self._board.set_tile_generator_rule(state.generator_rule)
+        if state.move_rule is not None:
+            self._board.set_static_tile_move_rule(state.move_rule)
+        for match_event in state.match_events:
+            self._board.add_match_event_rule(match_event)
+        self._counter = _MatchCounter()
+        self._board.add_match_event_rule(self._counter)
+        self._base: Optional[BoardSnapshot] = None
+        self.load(state)
+
+    @staticmethod
+    def from_state(state: _SearchState) -> _ScratchBoard:
+        return _ScratchBoard(len(state.rows), len(state.rows[0]), state)
+
+    def can_play_out(self, height: int, width: int, state: _SearchState) -> bool:
+        rules = (state.match_rule, state.generator_rule, state.move_rule) + state.match_events
+        return (self._board.get_height() == height and self._board.get_width() == width and
+                len(rules) == len(self._rules) and all(a is b for a, b in zip(rules, self._rules)))
+
+    def load(self, state: _SearchState):
+        """
+        Copy the tiles of the other board, and remember them along with the current state of the rules
+        """
+        self._board.restore_snapshot(BoardSnapshot(
+            board=self._board, rows=state.rows, live_tiles=None, cursor_state=None, is_game_over=False,
+            dirty_rows=state.dirty_rows, dirty_columns=state.dirty_columns, rule_states=(), last_cascade=None))
+        self._base = self._board.take_snapshot()
+
+    def find_swaps(self) -> List[Swap]:
+        """
+        :return: Every swap of two movable neighbouring tiles which makes a match, checked the same way
+            CursorApplySelectionRule does
+        """
+        board = self._board
+        match_rule = board.get_tile_match_rule()
+        swaps = []
+        for y in range(board.get_height()):
+            for x in range(board.get_width()):
+                for x2, y2 in ((x + 1, y), (x, y + 1)):
+                    if x2 >= board.get_width() or y2 >= board.get_height():
+                        continue
+                    first, second = board.get_coordinate(x, y), board.get_coordinate(x2, y2)
+                    if not (board.get_tile_at(first).can_support_move() and
+                            board.get_tile_at(second).can_support_move()):
+                        continue
+                    board.swap_tile_contents(first, second)
+                    if match_rule.check_matches_in_region(board, DirtyRegion([first, second])):
+                        swaps.append((x, y, x2, y2))
+                    board.swap_tile_contents(first, second)
+        board.restore_snapshot(self._base)
+        return swaps
+
+    def play_out_swaps(self, state: _SearchState, swaps: Sequence[Swap]) -> List[Tuple[int, int]]:
+        """
+        :return: (cascade depth, cleared tiles) of every swap
+        """
+        try:
+            return [self._play_out_swap(state, swap) for swap in swaps]
+        finally:
+            # leave the rules, such as the generator's provider, as they were
+            self._board.restore_snapshot(self._base)
+
+    def _play_out_swap(self, state: _SearchState, swap: Swap) -> Tuple[int, int]:
+        board = self._board
+        board.restore_snapshot(self._base)
+        self._counter.match_count = 0
+        self._counter.cleared_tiles = 0
+
+        x1, y1, x2, y2 = swap
+        board.swap_tile_contents(board.get_coordinate(x1, y1), board.get_coordinate(x2, y2))
+        if state.resolve_cascades:
+            board.resolve_cascade(max_chain_depth=state.max_cascade_depth)
+        else:
+            # the scratch board has no gravity, so the time does not matter
+            while (not board.get_dirty_region().is_empty() and not board.is_game_over() and
+                   self._counter.match_count < state.max_cascade_depth):
+                board.update(0)
+        return self._counter.match_count, self._counter.cleared_tiles
+
+
+def _play_out_swaps(state: _SearchState, swaps: Sequence[Swap]) -> List[Tuple[int, int]]:
+    """
+    Same as _ScratchBoard.play_out_swaps, on a scratch board made for this call, e.g. in another process
+    """
+    return _ScratchBoard.from_state(state).play_out_swaps(state, swaps)
@@ -0,0 +1,84 @@
+"""
+Random boards and edits shared by the tests, which check incremental structures
+against a recomputation from scratch after every edit
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from dataclasses import dataclass
+
+from board import Board
+from board_elements import GameElement
+from constants import Color
+from examples.bejeweled import Gem
+
+if TYPE_CHECKING:
+    import random
+    from typing import List, Tuple
+
+
+@dataclass
+class Stone(GameElement):
+    """
+    An element without a color which never moves, and which live tiles can't move through
+    """
+    element_name: str = 'Stone'
+    supports_color: bool = False
+    supports_tile_move: bool = False
+
+    def draw(self, canvas, x1: int, y1: int, x2: int, y2: int):
+        pass
+
+
+GEMS = [Gem(name='GemRed', color=Color.RED), Gem(name='GemGreen', color=Color.GREEN),
+        Gem(name='GemBlue', color=Color.BLUE), Gem(name='GemPurple', color=Color.PURPLE)]
+STONE = Stone()
+
+
+def make_random_board(rng: random.Random, height: int, width: int, *, fill: float = 0.7,
+                      elements: List[GameElement] = GEMS) -> Board:
+    board = Board(height=height, width=width)
+    for y in range(height):
+        for x in range(width):
+            if rng.random() < fill:
+                board.get_tile_at(board.get_coordinate(x, y)).set_elements([rng.choice(elements)])
+    return board
+
+
+def apply_random_edit(board: Board, rng: random.Random, elements: List[GameElement] = GEMS + [STONE]):
+    """
+    Change the board through one of the ways rules change tiles
+    """
+    width, height = board.get_width(), board.get_height()
+    coordinate = board.get_coordinate(rng.randrange(width), rng.randrange(height))
+    tile = board.get_tile_at(coordinate)
+    kind = rng.randrange(6)
+    if kind == 0:
+        tile.set_elements([rng.choice(elements)])
+    elif kind == 1:
+        tile.add_game_element(rng.choice(elements))
+    elif kind == 2:
+        tile.apply_destroy()
+    elif kind == 3:
+        neighbours = [board.get_coordinate(coordinate.x + dx, coordinate.y + dy)
+                      for dx, dy in ((1, 0), (0, 1), (-1, 0), (0, -1))
+                      if 0 <= coordinate.x + dx < width and 0 <= coordinate.y + dy < height]
+        if neighbours:
+            board.swap_tile_contents(coordinate, rng.choice(neighbours))
+    elif kind == 4:
+        column = board.get_tile_column(coordinate.x)
+        sources = list(range(height))
+        rng.shuffle(sources)
+        type(tile).rearrange_contents(column, sources)
+    else:
+        sources = list(range(height))
+        rng.shuffle(sources)
+        board.rearrange_rows(sources)
+
+
+def get_contents(board: Board) -> List[List[Tuple[str, ...]]]:
+    """
+    :return: Names of the elements of every tile, by row
+    """
+    return [[tuple(element.element_name for element in tile.get_elements()) for tile in board.get_tile_row(y)]
+            for y in range(board.get_height())]
@@ -0,0 +1,141 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import async_host
+from async_host import AsyncGameHost, OutputSink, QueuedInputSource, ScoreStreamSink
+from board import Board
+from button_controller import DirectionButton
+from clock import VirtualClock
+from examples.bejeweled import apply_bejeweled_rule
+from examples.tetris import apply_tetris_rule
+from simulation import HeadlessGame
+
+
+class _RecordingSink(OutputSink):
+    """
+    Records every call, and moves the clock on by one step after every update,
+    so a host on a VirtualClock never has to wait
+    """
+
+    def __init__(self, clock, step_ms, *, fail_on_tick=None):
+        self.clock = clock
+        self.step_ms = step_ms
+        self.fail_on_tick = fail_on_tick
+        self.calls = []
+
+    async def on_start(self, host):
+        self.calls.append(('start', len(host.get_boards())))
+
+    async def on_tick(self, host, simulation_time_ms):
+        self.calls.append(('tick', simulation_time_ms, host.get_score(0)))
+        if self.fail_on_tick is not None and host.get_tick_count() == self.fail_on_tick:
+            raise RuntimeError('sink failed')
+        self.clock.advance(self.step_ms)
+
+    async def on_frame(self, host):
+        self.calls.append(('frame',))
+
+    async def close(self):
+        self.calls.append(('close',))
+
+
+def _make_host(clock, sink, *, seed=0):
+    host = AsyncGameHost(clock=clock, update_interval=100)
+    board = Board(height=10, width=8)
+    apply_bejeweled_rule(board, seed=seed)
+    host.add_board(board)
+    host.add_output_sink(sink)
+    return host
+
+
+def test_host_updates_every_step_and_tells_the_sink():
+    clock = VirtualClock()
+    sink = _RecordingSink(clock, 100)
+    host = _make_host(clock, sink)
+
+    assert asyncio.run(host.run(max_ticks=10)) == 10
+    assert host.get_tick_count() == 10
+    assert not host.is_running()
+    assert sink.calls[0] == ('start', 1)
+    assert sink.calls[-1] == ('close',)
+    assert [call[1] for call in sink.calls if call[0] == 'tick'] == list(range(0, 1000, 100))
+    assert any(call[0] == 'frame' for call in sink.calls)
+
+
+def test_host_plays_out_the_same_as_a_headless_game():
+    clock = VirtualClock()
+    sink = _RecordingSink(clock, 100)
+    host = _make_host(clock, sink, seed=3)
+    asyncio.run(host.run(max_ticks=50))
+
+    game = HeadlessGame(update_interval=100)
+    board = Board(height=10, width=8)
+    apply_bejeweled_rule(board, seed=3)
+    game.add_board(board)
+    scores = []
+    for _ in range(50):
+        game.tick()
+        scores.append(game.get_score(0))
+    assert [call[2] for call in sink.calls if call[0] == 'tick'] == scores
+
+
+def test_host_steps_at_the_gravity_rate():
+    clock = VirtualClock()
+    sink = _RecordingSink(clock, 50)
+    host = AsyncGameHost(clock=clock, update_interval=100)
+    board = Board(height=10, width=8)
+    apply_tetris_rule(board, seed=0)
+    host.add_board(board)
+    host.add_output_sink(sink)
+    asyncio.run(host.run(max_ticks=4))
+    assert [call[1] for call in sink.calls if call[0] == 'tick'] == [0, 50, 100, 150]
+
+
+def test_queued_inputs_are_applied_on_the_next_update():
+    clock = VirtualClock()
+    sink = _RecordingSink(clock, 100)
+    host = _make_host(clock, sink)
+    inputs = QueuedInputSource()
+    host.add_input_source(inputs)
+    inputs.put(DirectionButton.RIGHT, board_index=0)
+    inputs.put(DirectionButton.DOWN, board_index=0)
+
+    asyncio.run(host.run(max_ticks=1))
+    position = host.get_board(0).get_cursor().get_primary_position()
+    assert (position.x, position.y) == (1, 1)
+    assert inputs.poll(0) == []
+
+
+def test_sinks_are_closed_when_a_sink_fails():
+    clock = VirtualClock()
+    sink = _RecordingSink(clock, 100, fail_on_tick=3)
+    host = _make_host(clock, sink)
+    with pytest.raises(RuntimeError):
+        asyncio.run(host.run())
+    assert sink.calls[-1] == ('close',)
+    assert not host.is_running()
+
+
+def test_score_stream_sink_writes_a_line_per_update():
+    clock = VirtualClock()
+    stream = io.BytesIO()
+    host = _make_host(clock, _RecordingSink(clock, 100))
+    host.add_output_sink(ScoreStreamSink(stream))
+    asyncio.run(host.run(max_ticks=3))
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line['time_ms'] for line in lines] == [0, 100, 200]
+    assert lines[-1]['scores'] == [host.get_score(0)]
+    assert lines[-1]['game_over'] == [False]
+
+
+def test_game_and_async_host_do_not_import_each_other():
+    code = ("import sys; import async_host, tk_sink; assert 'tkinter' not in sys.modules; "
+            "import game; assert game.__dict__.get('OutputSink') is None")
+    subprocess.run([sys.executable, '-c', code], check=True,
+                   cwd=os.path.dirname(os.path.abspath(async_host.__file__)))
@@ -0,0 +1,62 @@
+import pytest
+
+from batch import GameConfig, get_game_seed, play_game, run_batch
+from bots import BestSwapBot, PlacementBot, RandomBot
+from examples.bejeweled import apply_bejeweled_rule
+from examples.tetris import apply_tetris_rule
+
+_CONFIGS = [
+    GameConfig(apply_rules=apply_bejeweled_rule, controller=RandomBot, height=8, width=8, max_ticks=60),
+    GameConfig(apply_rules=apply_bejeweled_rule, controller=BestSwapBot, height=8, width=8, max_ticks=60),
+    GameConfig(apply_rules=apply_tetris_rule, controller=PlacementBot, height=12, width=6, max_ticks=150),
+]
+
+
+def _outcomes(batch):
+    return [(result.game_index, result.seed, result.score, result.ticks, result.is_game_over)
+            for result in batch.results]
+
+
+@pytest.mark.parametrize('config', _CONFIGS)
+def test_batch_with_a_fixed_seed_is_deterministic(config):
+    first = run_batch(config, 4, seed=42, workers=1)
+    assert _outcomes(first) == _outcomes(run_batch(config, 4, seed=42, workers=1))
+    assert _outcomes(first) != _outcomes(run_batch(config, 4, seed=43, workers=1))
+
+
+def test_every_game_gets_its_own_seed():
+    config = _CONFIGS[0]
+    batch = run_batch(config, 5, seed=7, workers=1, chunk_size=2)
+    assert [result.game_index for result in batch.results] == list(range(5))
+    assert [result.seed for result in batch.results] == [get_game_seed(7, i) for i in range(5)]
+    assert len({result.seed for result in batch.results}) == 5
+    # a game plays out the same on its own as in the batch
+    result = play_game(config, seed=get_game_seed(7, 3), game_index=3)
+    assert _outcomes(batch)[3] == (result.game_index, result.seed, result.score, result.ticks, result.is_game_over)
+
+
+def test_batch_does_not_depend_on_the_number_of_workers():
+    config = _CONFIGS[0]
+    assert _outcomes(run_batch(config, 4, seed=1, workers=1)) == _outcomes(run_batch(config, 4, seed=1, workers=2))
+
+
+def test_batch_summary():
+    batch = run_batch(_CONFIGS[0], 3, seed=0, workers=1)
+    scores = [result.score for result in batch.results]
+    assert batch.get_game_count() == 3
+    assert batch.get_mean_score() == pytest.approx(sum(scores) / 3)
+    assert (batch.get_min_score(), batch.get_max_score()) == (min(scores), max(scores))
+    assert batch.get_total_ticks() == sum(result.ticks for result in batch.results)
+
+
+def test_empty_batch():
+    batch = run_batch(_CONFIGS[0], 0, seed=0, workers=1)
+    assert batch.results == ()
+    assert (batch.get_mean_score(), batch.get_min_score(), batch.get_max_score()) == (0.0, 0, 0)
+
+
+def test_invalid_batch_arguments():
+    with pytest.raises(ValueError):
+        run_batch(_CONFIGS[0], -1, seed=0)
+    with pytest.raises(ValueError):
+        run_batch(_CONFIGS[0], 1, seed=0, chunk_size=0)
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from bitboard import RowOccupancy
+from board_elements import BoardElementSet
+from gravity_rules import DownwardGravityRule
+from helpers import GEMS, STONE, make_random_board, apply_random_edit
+
+
+def _brute_masks(board):
+    occupied, blocked = [], []
+    for y in range(board.get_height()):
+        row = board.get_tile_row(y)
+        occupied.append(sum(1 << x for x, tile in enumerate(row) if tile.has_elements()))
+        blocked.append(sum(1 << x for x, tile in enumerate(row) if not tile.can_move_through()))
+    return occupied, blocked
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_masks_follow_random_edits(seed):
+    rng = random.Random(seed)
+    board = make_random_board(rng, rng.randint(1, 12), rng.randint(1, 12), elements=GEMS + [STONE])
+    board.set_row_occupancy(RowOccupancy(board))
+    row_occupancy = board.get_row_occupancy()
+    for _ in range(200):
+        apply_random_edit(board, rng)
+        occupied, blocked = _brute_masks(board)
+        assert [row_occupancy.get_occupied_mask(y) for y in range(board.get_height())] == occupied
+        assert [row_occupancy.get_blocked_mask(y) for y in range(board.get_height())] == blocked
+        for y in range(board.get_height()):
+            assert row_occupancy.is_row_full(y) == all(tile.has_elements() for tile in board.get_tile_row(y))
+            assert row_occupancy.is_row_empty(y) == (occupied[y] == 0)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_overlaps_match_tile_checks(seed):
+    rng = random.Random(seed)
+    board = make_random_board(rng, 10, 8, fill=0.3, elements=GEMS + [STONE])
+    row_occupancy = RowOccupancy(board)
+    for _ in range(200):
+        element_set = BoardElementSet()
+        for _ in range(rng.randint(1, 4)):
+            element_set.add_element(GEMS[0], board.get_coordinate(rng.randrange(8), rng.randrange(10)))
+        horizontal, vertical = rng.randint(-3, 3), rng.randint(-3, 3)
+
+        moved = [(pair.coordinate.x + horizontal, pair.coordinate.y + vertical)
+                 for pair in element_set.get_element_pairs()]
+        off_board = any(not (0 <= x < 8 and 0 <= y < 10) for x, y in moved)
+        tiles = [] if off_board else [board.get_tile_at(board.get_coordinate(x, y)) for x, y in moved]
+        assert row_occupancy.overlaps_occupied(element_set, horizontal=horizontal, vertical=vertical) == (
+            off_board or any(tile.has_elements() for tile in tiles))
+        assert row_occupancy.overlaps_blocked(element_set, horizontal=horizontal, vertical=vertical) == (
+            off_board or any(not tile.can_move_through() for tile in tiles))
+
+
+@pytest.mark.parametrize('use_row_occupancy', [False, True])
+@pytest.mark.parametrize('width, height, stone_y', [(1, 4, None), (1, 4, 2), (3, 1, None), (4, 6, 5)])
+def test_gravity_locks_live_tiles_on_the_floor_or_on_a_tile(use_row_occupancy, width, height, stone_y):
+    board = make_random_board(random.Random(0), height, width, fill=0)
+    if stone_y is not None:
+        board.get_tile_at(board.get_coordinate(0, stone_y)).set_elements([STONE])
+    if use_row_occupancy:
+        board.set_row_occupancy(RowOccupancy(board))
+    gravity_rule = DownwardGravityRule(drop_interval=100)
+    board.set_gravity_rule(gravity_rule)
+    live_tiles = BoardElementSet()
+    live_tiles.add_element(GEMS[0], board.get_coordinate(0, 0))
+    board.set_live_tile(live_tiles)
+
+    for tick in range(1, height + 2):
+        gravity_rule.update(board, tick * 100)
+    landing_y = (height if stone_y is None else stone_y) - 1
+    assert not board.has_live_tiles()
+    assert board.get_tile_at(board.get_coordinate(0, landing_y)).get_elements() == [GEMS[0]]
@@ -0,0 +1,104 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from button_controller import (DirectionButton, ActionButton, KeyboardController, _KeyboardControllerManager,
+                               _KEYBIND_ORDER)
+
+_KEYSYMS = ['Up', 'Down', 'Left', 'Right', 'space', 'Return', 'w', 'a', 's', 'd']
+
+
+@pytest.fixture(autouse=True)
+def _isolated_manager(monkeypatch):
+    monkeypatch.setattr(_KeyboardControllerManager, '_keyboard_controllers', [])
+    monkeypatch.setattr(_KeyboardControllerManager, '_dispatch_map', None)
+
+
+def _scan_controllers(controllers, functions, keysym):
+    """
+    Every controller checks its keybinds in order, and presses the first button bound to the key.
+    A button without a function stops the scan with a KeyError
+
+    :return: The pressed buttons, and whether a KeyError stopped the scan
+    """
+    pressed = []
+    for index, controller in enumerate(controllers):
+        if not controller._keybinds_set:
+            continue
+        for button in _KEYBIND_ORDER:
+            if controller.export_keybind().get(str(button)) == keysym:
+                if (index, button) not in functions:
+                    return pressed, True
+                pressed.append((index, button))
+                break
+    return pressed, False
+
+
+def _random_keybinds(rng):
+    return {str(button): rng.choice(_KEYSYMS) for button in _KEYBIND_ORDER if rng.random() < 0.8}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_key_presses_match_scanning_every_controller(seed):
+    rng = random.Random(seed)
+    controllers = []
+    functions = set()
+    pressed = []
+
+    def add_controller():
+        controllers.append(KeyboardController())
+
+    def bind_button(index, button):
+        functions.add((index, button))
+        controllers[index].on_button(button=button, fn=lambda b, index=index: pressed.append((index, b)))
+
+    for _ in range(300):
+        kind = rng.randrange(4) if controllers else 0
+        if kind == 0:
+            add_controller()
+        elif kind == 1:
+            controllers[rng.randrange(len(controllers))].set_keybinds(_random_keybinds(rng))
+        elif kind == 2:
+            bind_button(rng.randrange(len(controllers)), rng.choice(_KEYBIND_ORDER))
+        else:
+            keysym = rng.choice(_KEYSYMS + ['Escape'])
+            pressed.clear()
+            expected_pressed, raises = _scan_controllers(controllers, functions, keysym)
+            if raises:
+                with pytest.raises(KeyError):
+                    _KeyboardControllerManager.run_methods(SimpleNamespace(keysym=keysym))
+            else:
+                _KeyboardControllerManager.run_methods(SimpleNamespace(keysym=keysym))
+            assert pressed == expected_pressed
+
+
+def test_keybinds_are_copied():
+    controller = KeyboardController()
+    pressed = []
+    controller.on_button(button=DirectionButton.UP, fn=pressed.append)
+    controller.on_button(button=ActionButton.PRIMARY, fn=pressed.append)
+    keybinds = {'UP': 'w', 'PRIMARY': 'space'}
+    controller.set_keybinds(keybinds)
+    keybinds['UP'] = 'Up'
+
+    _KeyboardControllerManager.run_methods(SimpleNamespace(keysym='w'))
+    _KeyboardControllerManager.run_methods(SimpleNamespace(keysym='Up'))
+    _KeyboardControllerManager.run_methods(SimpleNamespace(keysym='space'))
+    assert pressed == [DirectionButton.UP, ActionButton.PRIMARY]
+
+
+def test_bound_key_without_a_function_raises():
+    controller = KeyboardController()
+    pressed = []
+    controller.on_button(button=DirectionButton.UP, fn=pressed.append)
+    controller.set_keybinds({'UP': 'w', 'DOWN': 's'})
+
+    _KeyboardControllerManager.run_methods(SimpleNamespace(keysym='w'))
+    with pytest.raises(KeyError):
+        _KeyboardControllerManager.run_methods(SimpleNamespace(keysym='s'))
+    # keys which are not bound are ignored
+    _KeyboardControllerManager.run_methods(SimpleNamespace(keysym='x'))
+    controller.on_button(button=DirectionButton.DOWN, fn=pressed.append)
+    _KeyboardControllerManager.run_methods(SimpleNamespace(keysym='s'))
+    assert pressed == [DirectionButton.UP, DirectionButton.DOWN]
@@ -0,0 +1,135 @@
+import random
+
+import pytest
+
+from board import Board, DEFAULT_MAX_CHAIN_DEPTH
+from examples.bejeweled import apply_bejeweled_rule
+from generator_rules import FillEmptyTopRowSpotsRule
+from helpers import GEMS, get_contents
+from match_rules import MatchNOfColorRule
+from provider import UniformRandomElementProvider
+from rules import TileMatchRule
+from shift_rules import ShiftStaticTilesRule, ShiftDirection
+from simulation import HeadlessGame
+
+
+class _FullBoardMatchRule(TileMatchRule):
+    """
+    Checks the whole board on every call, by leaving out the region methods of the rule it wraps
+    """
+
+    def __init__(self, match_rule: TileMatchRule):
+        self._match_rule = match_rule
+
+    def remove_matches(self, board):
+        return self._match_rule.remove_matches(board)
+
+    def check_matches(self, board):
+        return self._match_rule.check_matches(board)
+
+
+def _make_scrambled_board(seed, *, full_board_matches=False):
+    board = Board(height=10, width=8)
+    apply_bejeweled_rule(board, seed=seed)
+    if full_board_matches:
+        board.set_tile_match_rule(_FullBoardMatchRule(board.get_tile_match_rule()))
+    game = HeadlessGame()
+    game.add_board(board)
+
+    rng = random.Random(seed)
+    for _ in range(30):
+        tile = board.get_tile_at(board.get_coordinate(rng.randrange(8), rng.randrange(10)))
+        if rng.random() < 0.3:
+            tile.apply_destroy()
+        else:
+            tile.set_elements([rng.choice(GEMS)])
+    return game, board
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_resolved_cascade_leaves_a_full_board_without_matches(seed):
+    game, board = _make_scrambled_board(seed)
+    reference_game, reference = _make_scrambled_board(seed, full_board_matches=True)
+
+    result = board.resolve_cascade()
+    reference_result = reference.resolve_cascade()
+
+    assert result == reference_result
+    assert result.is_settled
+    assert get_contents(board) == get_contents(reference)
+    assert game.get_score(0) == reference_game.get_score(0) == result.chain_depth
+    assert board.get_tile_match_rule().check_matches(board) == set()
+    assert all(tile.has_elements() for y in range(board.get_height()) for tile in board.get_tile_row(y))
+    assert board.get_dirty_region().is_empty()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_cascade_cut_short_resumes_where_it_stopped(seed):
+    _, board = _make_scrambled_board(seed)
+    _, reference = _make_scrambled_board(seed)
+
+    cleared_per_match = []
+    for _ in range(100):
+        result = board.resolve_cascade(max_chain_depth=1)
+        cleared_per_match += result.cleared_per_match
+        if result.is_settled:
+            break
+    reference_result = reference.resolve_cascade()
+
+    assert tuple(cleared_per_match) == reference_result.cleared_per_match
+    assert get_contents(board) == get_contents(reference)
+
+
+def _make_single_color_board(height, width):
+    """
+    A full board whose refills are all the same gem, so every refill makes another match
+    """
+    board = Board(height=height, width=width)
+    provider = UniformRandomElementProvider(seed=0)
+    provider.add_choice(GEMS[0])
+    generate_rule = FillEmptyTopRowSpotsRule()
+    generate_rule.set_provider(provider)
+    board.set_tile_generator_rule(generate_rule)
+    move_rule = ShiftStaticTilesRule()
+    move_rule.set_shift_amount(1)
+    move_rule.set_shift_direction(ShiftDirection.DOWN)
+    move_rule.enable_tile_movement()
+    board.set_static_tile_move_rule(move_rule)
+    board.set_tile_match_rule(MatchNOfColorRule(3))
+    for y in range(height):
+        for tile in board.get_tile_row(y):
+            tile.set_elements([GEMS[0]])
+    return board
+
+
+def test_endless_cascade_stops_at_the_chain_depth_and_carries_on_next_update():
+    board = _make_single_color_board(5, 5)
+    board.enable_cascade_resolution(max_chain_depth=4)
+
+    board.update(0)
+    assert board.get_last_cascade().chain_depth == 4
+    assert not board.get_last_cascade().is_settled
+    assert not board.get_dirty_region().is_empty()
+
+    board.update(100)
+    assert board.get_last_cascade().chain_depth == 4
+
+
+def test_cascade_resolution_is_capped_by_default():
+    board = _make_single_color_board(4, 4)
+    board.enable_cascade_resolution()
+    board.update(0)
+    assert board.get_last_cascade().chain_depth == DEFAULT_MAX_CHAIN_DEPTH
+    assert not board.get_last_cascade().is_settled
+
+
+def test_chain_depth_needs_to_be_positive():
+    with pytest.raises(ValueError):
+        Board(height=3, width=3).enable_cascade_resolution(max_chain_depth=0)
+
+
+def test_cascade_on_an_empty_board_settles_without_matches():
+    board = Board(height=4, width=1)
+    board.set_tile_match_rule(MatchNOfColorRule(3))
+    result = board.resolve_cascade()
+    assert result.chain_depth == 0 and result.is_settled
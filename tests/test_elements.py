@@ -0,0 +1,108 @@
+import copy
+import random
+from dataclasses import dataclass, field
+from typing import ClassVar, List
+
+import pytest
+
+from board import Board
+from board_elements import Coordinate, GameElement, RelativeElementSet
+from examples.bejeweled import Gem, apply_bejeweled_rule
+from examples.tetris import TetrisTile, apply_tetris_rule
+from button_controller import DirectionButton, ActionButton
+from constants import Color
+
+
+@dataclass
+class _Crystal(GameElement):
+    """
+    An element which keeps changing after it was placed, so every tile needs its own copy
+    """
+    element_name: str = 'Crystal'
+    has_mutable_state: ClassVar[bool] = True
+    cracks: List[int] = field(default_factory=list)
+
+    def draw(self, canvas, x1: int, y1: int, x2: int, y2: int):
+        pass
+
+
+class _RecordingCanvas:
+    def __init__(self):
+        self.items = []
+
+    def __getattr__(self, name):
+        if not name.startswith('create_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.items.append((name, args, kwargs)) or len(self.items)
+
+
+_EXAMPLE_ELEMENTS = [Gem(name='GemRed', color=Color.RED), Gem(name='GemBlue', color=Color.BLUE),
+                     TetrisTile(name='RedTile', color=Color.RED)]
+
+
+@pytest.mark.parametrize('element', _EXAMPLE_ELEMENTS)
+def test_immutable_elements_are_shared(element):
+    assert not element.has_mutable_state
+    assert element.spawn() is element
+
+
+def test_mutable_elements_are_deep_copied():
+    crystal = _Crystal(cracks=[1])
+    spawned = crystal.spawn()
+    assert spawned is not crystal and spawned == crystal
+    spawned.cracks.append(2)
+    assert crystal.cracks == [1]
+
+
+def test_spawned_sets_can_move_without_moving_the_original():
+    crystal, gem = _Crystal(), _EXAMPLE_ELEMENTS[0]
+    element_set = RelativeElementSet()
+    element_set.add_element(crystal, Coordinate(0, 0))
+    element_set.add_element(gem, Coordinate(1, 0))
+    spawned = element_set.spawn()
+    elements = {pair.coordinate: pair.element for pair in spawned.get_element_pairs()}
+    assert elements[Coordinate(1, 0)] is gem
+    assert elements[Coordinate(0, 0)] is not crystal
+    spawned.add_element(gem, Coordinate(2, 0))
+    assert len(list(element_set.get_element_pairs())) == 2
+
+
+@pytest.mark.parametrize('element', _EXAMPLE_ELEMENTS)
+def test_drawing_an_example_element_does_not_change_it(element):
+    state = copy.deepcopy(vars(element))
+    canvas = _RecordingCanvas()
+    for size in (10, 25.5, 40):
+        element.draw(canvas, 0, 0, size, size)
+        element.draw(canvas, size, size, size * 2, size * 2)
+    assert vars(element) == state
+    assert len(canvas.items) == 6
+
+
+@pytest.mark.parametrize('apply_rules', [apply_tetris_rule, apply_bejeweled_rule])
+def test_shared_elements_do_not_change_while_playing(apply_rules):
+    """
+    Elements without mutable state are shared by every tile they are placed in,
+    so playing a game must never change any of them
+    """
+    board = Board(height=12, width=8)
+    apply_rules(board, seed=0)
+    rng = random.Random(0)
+    buttons = sorted(DirectionButton.as_set() | ActionButton.as_set(), key=str)
+    states = {}
+
+    def record_elements():
+        elements = [element for y in range(board.get_height()) for tile in board.get_tile_row(y)
+                    for element in tile.get_elements()]
+        if board.has_live_tiles():
+            elements += [pair.element for pair in board.get_live_tiles().get_element_pairs()]
+        for element in elements:
+            assert not element.has_mutable_state
+            state = states.setdefault(id(element), (element, copy.deepcopy(vars(element))))[1]
+            assert vars(element) == state
+
+    for tick in range(300):
+        board.queue_input(rng.choice(buttons), time_ms=tick * 50)
+        board.update(tick * 50)
+        record_elements()
+    # the same few instances fill the whole board
+    assert len(states) <= 7
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from board import Board
+from button_controller import DirectionButton, ActionButton
+from examples.bejeweled import apply_bejeweled_rule
+from examples.tetris import apply_tetris_rule
+from helpers import get_contents
+
+
+def _get_live_tiles(board):
+    if not board.has_live_tiles():
+        return None
+    return sorted((pair.coordinate.x, pair.coordinate.y, pair.element.element_name)
+                  for pair in board.get_live_tiles().get_element_pairs())
+
+
+def _get_cursor(board):
+    cursor = board.get_cursor()
+    if cursor is None:
+        return None
+    position = cursor.get_primary_position()
+    return position.x, position.y, cursor.is_in_swapping_state()
+
+
+def _make_presses(rng, tick_count, interval):
+    """
+    Presses in the order they are queued, which is not the order of their times.
+    Buttons come in runs, so presses of the same button often follow each other
+    """
+    buttons = sorted(DirectionButton.as_set() | ActionButton.as_set(), key=str)
+    presses = []
+    while len(presses) < 200:
+        button = rng.choice(buttons)
+        time_ms = rng.randrange(tick_count) * interval + rng.choice((0, 0, interval // 2))
+        presses += [(time_ms, button)] * rng.randint(1, 4)
+    rng.shuffle(presses)
+    return presses
+
+
+@pytest.mark.parametrize('apply_rules', [apply_bejeweled_rule, apply_tetris_rule])
+@pytest.mark.parametrize('seed', range(5))
+def test_queued_presses_match_handling_each_press_in_time_order(apply_rules, seed):
+    interval, tick_count = 50, 150
+    presses = _make_presses(random.Random(seed), tick_count, interval)
+    queued, reference = Board(height=12, width=8), Board(height=12, width=8)
+    apply_rules(queued, seed=seed)
+    apply_rules(reference, seed=seed)
+
+    for time_ms, button in presses:
+        queued.queue_input(button, time_ms=time_ms)
+    # sorted keeps presses of the same time in the order they were queued
+    pending = sorted(presses, key=lambda press: press[0])
+
+    for tick in range(tick_count):
+        time_ms = tick * interval
+        queued.update(time_ms)
+        while pending and pending[0][0] <= time_ms:
+            _, button = pending.pop(0)
+            input_rule = reference.get_user_input_rule(button)
+            if input_rule is not None and not reference.is_game_over():
+                input_rule.handle_input(reference, event=button)
+        reference.update(time_ms)
+
+        assert get_contents(queued) == get_contents(reference)
+        assert _get_live_tiles(queued) == _get_live_tiles(reference)
+        assert _get_cursor(queued) == _get_cursor(reference)
+        assert queued.is_game_over() == reference.is_game_over()
@@ -0,0 +1,169 @@
+import random
+
+import pytest
+
+from bitboard import RowOccupancy
+from board import Board, TileChangeListener
+from helpers import GEMS, STONE, make_random_board, apply_random_edit, get_contents
+from match_rules import MatchNOfColorRule, ShiftToFillRowEventRule, _find_color_runs, _find_color_runs_numpy, np
+
+
+def _brute_color_runs(lines, match_length):
+    matched = set()
+    for line_index, line in enumerate(lines):
+        for start in range(len(line) - match_length + 1):
+            window = line[start:start + match_length]
+            for bit in range(8):
+                if all(mask >> bit & 1 for mask in window):
+                    matched.update((line_index, start + i) for i in range(match_length))
+    return matched
+
+
+def _random_lines(rng):
+    length = rng.randint(0, 12)
+    # masks with several bits set stand for tiles with several colors
+    return [[rng.choice((0, 1, 2, 4, 8, 3, 6)) for _ in range(length)] for _ in range(rng.randint(0, 6))]
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_color_runs_match_brute_force(seed):
+    rng = random.Random(seed)
+    lines = _random_lines(rng)
+    match_length = rng.randint(1, 5)
+    assert set(_find_color_runs(lines, match_length)) == _brute_color_runs(lines, match_length)
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is not installed')
+@pytest.mark.parametrize('seed', range(200))
+def test_numpy_color_runs_match_brute_force(seed):
+    rng = random.Random(seed)
+    lines = _random_lines(rng)
+    match_length = rng.randint(1, 5)
+    assert set(_find_color_runs_numpy(lines, match_length)) == _brute_color_runs(lines, match_length)
+
+
+_COLOR_RUN_FINDERS = [_find_color_runs] + ([_find_color_runs_numpy] if np is not None else [])
+
+
+@pytest.mark.parametrize('find_color_runs', _COLOR_RUN_FINDERS)
+@pytest.mark.parametrize('lines, match_length, expected', [
+    ([], 3, set()),
+    ([[], []], 3, set()),
+    # runs longer than the lines never match
+    ([[1, 1], [2, 2]], 3, set()),
+    ([[1, 1, 1]], 4, set()),
+    ([[1, 1, 1]], 3, {(0, 0), (0, 1), (0, 2)}),
+    ([[1], [0]], 1, {(0, 0)}),
+    # a tile with two colors joins runs of either color
+    ([[1, 3, 2, 2]], 3, {(0, 1), (0, 2), (0, 3)}),
+    ([[1, 1, 3, 2, 2]], 3, {(0, 0), (0, 1), (0, 2), (0, 3), (0, 4)}),
+])
+def test_color_run_edge_cases(find_color_runs, lines, match_length, expected):
+    assert set(find_color_runs(lines, match_length)) == expected
+
+
+@pytest.mark.parametrize('height, width', [(1, 5), (5, 1), (1, 1)])
+def test_matching_a_single_line_board(height, width):
+    board = make_random_board(random.Random(0), height, width, fill=0)
+    for y in range(height):
+        for x in range(width):
+            board.get_tile_at(board.get_coordinate(x, y)).set_elements([GEMS[0]])
+    match_length = max(height, width)
+    assert len(MatchNOfColorRule(match_length).check_matches(board)) == height * width
+    assert MatchNOfColorRule(match_length + 1).check_matches(board) == set()
+    region = board.get_dirty_region()
+    assert MatchNOfColorRule(match_length + 1).check_matches_in_region(board, region) == set()
+
+
+def test_matching_an_empty_board():
+    board = make_random_board(random.Random(0), 4, 4, fill=0)
+    match_rule = MatchNOfColorRule(3)
+    assert match_rule.check_matches(board) == set()
+    assert match_rule.check_matches_in_region(board, board.get_dirty_region()) == set()
+
+
+class _ChangeRecorder(TileChangeListener):
+    def __init__(self):
+        self.coordinates = set()
+
+    def on_tile_change(self, board, coordinate):
+        self.coordinates.add(coordinate)
+
+
+def _settle(board):
+    # destroyed tiles are checked again on the next update
+    while not board.get_dirty_region().is_empty():
+        board.update(0)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matching_the_dirty_region_finds_every_match(seed):
+    rng = random.Random(seed)
+    board = make_random_board(rng, rng.randint(3, 10), rng.randint(3, 10), fill=0.9)
+    match_rule = MatchNOfColorRule(rng.randint(2, 4))
+    board.set_tile_match_rule(match_rule)
+    recorder = _ChangeRecorder()
+    board.add_tile_change_listener(recorder)
+    for _ in range(30):
+        _settle(board)
+        assert match_rule.check_matches(board) == set()
+
+        recorder.coordinates.clear()
+        for _ in range(rng.randint(1, 5)):
+            apply_random_edit(board, rng)
+        region = board.get_dirty_region()
+        assert {coordinate.y for coordinate in recorder.coordinates} <= region.get_rows()
+        assert {coordinate.x for coordinate in recorder.coordinates} <= region.get_columns()
+        assert match_rule.check_matches_in_region(board, region) == match_rule.check_matches(board)
+
+
+def _shift_down_one_tile_at_a_time(board, cleared_row):
+    for y in reversed(range(cleared_row)):
+        for x in range(board.get_width()):
+            source, target = board.get_coordinate(x, y), board.get_coordinate(x, y + 1)
+            if board.get_tile_at(target).has_elements() or not board.get_tile_at(source).can_support_move():
+                continue
+            board.swap_tile_contents(source, target)
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_shifting_rows_down_matches_shifting_tiles_one_at_a_time(seed):
+    rng = random.Random(seed)
+    height, width = rng.randint(2, 8), rng.randint(1, 6)
+    elements = GEMS + [STONE] if seed % 2 else GEMS
+    expected_board = make_random_board(rng, height, width, fill=rng.random(), elements=elements)
+    board = Board(height=height, width=width)
+    for y in range(height):
+        for expected_tile, tile in zip(expected_board.get_tile_row(y), board.get_tile_row(y)):
+            tile.set_elements(expected_tile.get_elements())
+    cleared_rows = sorted(rng.sample(range(height), rng.randint(1, min(3, height))))
+    for cleared_row in cleared_rows:
+        if rng.random() < 0.7:
+            for expected_tile, tile in zip(expected_board.get_tile_row(cleared_row), board.get_tile_row(cleared_row)):
+                expected_tile.set_elements([])
+                tile.set_elements([])
+    if seed % 3:
+        board.set_row_occupancy(RowOccupancy(board))
+    board.take_snapshot()
+    contents_before = get_contents(board)
+    expected_changes, changes = _ChangeRecorder(), _ChangeRecorder()
+    expected_board.add_tile_change_listener(expected_changes)
+    board.add_tile_change_listener(changes)
+
+    for cleared_row in cleared_rows:
+        _shift_down_one_tile_at_a_time(expected_board, cleared_row)
+    ShiftToFillRowEventRule().trigger(board, {board.get_coordinate(x, y) for y in cleared_rows for x in range(width)})
+
+    assert get_contents(board) == get_contents(expected_board)
+    # tiles which were only passed through on the way down don't have to be reported
+    changed = {board.get_coordinate(x, y) for y in range(height) for x in range(width)
+               if get_contents(board)[y][x] != contents_before[y][x]}
+    assert changed <= changes.coordinates <= expected_changes.coordinates
+    # the row snapshots moved along with the rows
+    assert [[tuple(element.element_name for element in tile) for tile in row]
+            for row in board.take_snapshot().rows] == get_contents(board)
+    if board.has_row_occupancy():
+        rebuilt = RowOccupancy(board)
+        assert all(board.get_row_occupancy().get_occupied_mask(y) == rebuilt.get_occupied_mask(y) and
+                   board.get_row_occupancy().get_blocked_mask(y) == rebuilt.get_blocked_mask(y)
+                   for y in range(height))
@@ -0,0 +1,186 @@
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from board import Board
+from board_elements import BoardElementSet, GameElement
+from button_controller import DirectionButton, ActionButton
+from examples.tetris import apply_tetris_rule, red_tile
+from placement import enumerate_placements
+
+
+@dataclass
+class _Mist(GameElement):
+    """
+    An element live tiles can rotate into, but which stops them from shifting or dropping
+    """
+    element_name: str = 'Mist'
+    supports_move_through: bool = True
+
+    def draw(self, canvas, x1: int, y1: int, x2: int, y2: int):
+        pass
+
+
+def _make_board(seed):
+    rng = random.Random(seed)
+    board = Board(height=12, width=8)
+    apply_tetris_rule(board, seed=seed)
+    for y in range(12 - rng.randint(0, 6), 12):
+        # rows with a single gap can be cleared
+        gap = rng.randrange(8)
+        fill = 1 if rng.random() < 0.5 else 0.6
+        for x in range(8):
+            if x != gap and rng.random() < fill:
+                board.get_tile_at(board.get_coordinate(x, y)).set_elements([red_tile])
+    # the generator drops the first piece
+    board.update(0)
+    return board
+
+
+def _get_live_state(board):
+    return tuple((pair.coordinate.x, pair.coordinate.y) for pair in board.get_live_tiles().get_element_pairs())
+
+
+def _reach(board, snapshots, apply_input):
+    """
+    :return: Every live tile state reached by applying the input to the known states, until nothing new is reached
+    """
+    reached = dict(snapshots)
+    pending = list(snapshots.values())
+    while pending:
+        snapshot = pending.pop()
+        board.restore_snapshot(snapshot)
+        for new_snapshot in apply_input(board, snapshot):
+            state = _get_live_state(board)
+            if state not in reached:
+                reached[state] = new_snapshot
+                pending.append(new_snapshot)
+    return reached
+
+
+def _brute_force_placements(board):
+    """
+    :return: The tiles covered by every placement, found by pressing the board's own rotate and shift buttons
+    """
+    rotate_rule = board.get_user_input_rule(ActionButton.PRIMARY)
+    shift_rule = board.get_user_input_rule(DirectionButton.LEFT)
+    start = board.take_snapshot()
+
+    def rotate(board, snapshot):
+        for event in (ActionButton.PRIMARY, ActionButton.SECONDARY):
+            board.restore_snapshot(snapshot)
+            rotate_rule.handle_input(board, event=event)
+            yield board.take_snapshot()
+
+    rotated = _reach(board, {_get_live_state(board): start}, rotate)
+    shifted = {}
+    for state, snapshot in rotated.items():
+        for event in (DirectionButton.LEFT, DirectionButton.RIGHT):
+            def shift(board, snapshot, event=event):
+                shift_rule.handle_input(board, event=event)
+                yield board.take_snapshot()
+            shifted.update(_reach(board, {state: snapshot}, shift))
+
+    placements = set()
+    for state in shifted:
+        cells = list(state)
+        while all(y + 1 < board.get_height() and not board.get_tile_at(board.get_coordinate(x, y + 1)).has_elements()
+                  for x, y in cells):
+            cells = [(x, y + 1) for x, y in cells]
+        placements.add(frozenset(cells))
+    board.restore_snapshot(start)
+    return placements
+
+
+def _brute_force_features(board, cells):
+    width, height = board.get_width(), board.get_height()
+    grid = [[board.get_tile_at(board.get_coordinate(x, y)).has_elements() or (x, y) in cells for x in range(width)]
+            for y in range(height)]
+    remaining = [row for row in grid if not all(row)]
+    lines_cleared = height - len(remaining)
+    grid = [[False] * width for _ in range(lines_cleared)] + remaining
+    heights = [next((height - y for y in range(height) if grid[y][x]), 0) for x in range(width)]
+    holes = sum(1 for x in range(width) for y in range(height - heights[x], height) if not grid[y][x])
+    bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(width - 1))
+    return lines_cleared, holes, sum(heights), bumpiness
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_placements_match_pressing_the_buttons(seed):
+    board = _make_board(seed)
+    rotate_rule = board.get_user_input_rule(ActionButton.PRIMARY)
+    placements = enumerate_placements(board, rotate_rule=rotate_rule)
+
+    assert {frozenset((c.x, c.y) for c in placement.coordinates) for placement in placements} == \
+        _brute_force_placements(board)
+    for placement in placements:
+        cells = {(c.x, c.y) for c in placement.coordinates}
+        assert (placement.lines_cleared, placement.holes, placement.aggregate_height, placement.bumpiness) == \
+            _brute_force_features(board, cells)
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_placements_match_pressing_the_buttons_with_tiles_live_tiles_can_rotate_into(seed):
+    rng = random.Random(seed)
+    board = _make_board(seed)
+    for _ in range(4):
+        board.get_tile_at(board.get_coordinate(rng.randrange(8), rng.randrange(5))).set_elements([_Mist()])
+    rotate_rule = board.get_user_input_rule(ActionButton.PRIMARY)
+    rotate_rule.set_kick_offsets([(1, 0), (-1, 0)])
+    placements = enumerate_placements(board, rotate_rule=rotate_rule)
+    assert {frozenset((c.x, c.y) for c in placement.coordinates) for placement in placements} == \
+        _brute_force_placements(board)
+
+
+def _make_bar_board(stones):
+    """
+    A 3 wide board with a flat bar of three tiles in its second row, and stones at the given tiles
+    """
+    board = Board(height=6, width=3)
+    apply_tetris_rule(board, seed=0)
+    for x, y in stones:
+        board.get_tile_at(board.get_coordinate(x, y)).set_elements([red_tile])
+    bar = BoardElementSet()
+    for x in range(3):
+        bar.add_element(red_tile, board.get_coordinate(x, 1))
+    board.set_live_tile(bar)
+    rotate_rule = board.get_user_input_rule(ActionButton.PRIMARY)
+    rotate_rule.set_kick_offsets([(1, 0)])
+    return board, rotate_rule
+
+
+def test_rotation_is_refused_when_its_kick_is_blocked_too():
+    board, rotate_rule = _make_bar_board([(0, 2), (1, 3)])
+    placements = enumerate_placements(board, rotate_rule=rotate_rule)
+    assert {placement.rotation for placement in placements} == {0}
+    assert {frozenset((c.x, c.y) for c in placement.coordinates) for placement in placements} == \
+        _brute_force_placements(board)
+
+
+def test_rotation_is_kicked_when_it_does_not_fit_where_it_is():
+    board, rotate_rule = _make_bar_board([(0, 2)])
+    standing = {frozenset((c.x, c.y) for c in placement.coordinates)
+                for placement in enumerate_placements(board, rotate_rule=rotate_rule) if placement.rotation % 2}
+    # the bar is kicked one column right, and can then be shifted right but not back left onto the stone
+    assert standing == {frozenset((1, y) for y in range(3, 6)), frozenset((2, y) for y in range(3, 6))}
+    assert standing <= _brute_force_placements(board)
+
+
+def test_placements_on_a_one_column_board():
+    board = Board(height=5, width=1)
+    apply_tetris_rule(board, seed=0)
+    board.get_tile_at(board.get_coordinate(0, 4)).set_elements([red_tile])
+    tile = BoardElementSet()
+    tile.add_element(red_tile, board.get_coordinate(0, 0))
+    board.set_live_tile(tile)
+    placements = enumerate_placements(board, rotate_rule=board.get_user_input_rule(ActionButton.PRIMARY))
+    assert [(placement.x, placement.y) for placement in placements] == [(0, 3)]
+    # only the row the tile lands in is cleared, the full row below it was already there
+    assert (placements[0].lines_cleared, placements[0].holes, placements[0].aggregate_height) == (1, 0, 1)
+
+
+def test_placing_without_live_tiles_raises():
+    board = Board(height=5, width=4)
+    with pytest.raises(ValueError):
+        enumerate_placements(board)
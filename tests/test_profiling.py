@@ -0,0 +1,77 @@
+import pytest
+
+import board as board_module
+from board import Board
+from button_controller import DirectionButton
+from examples.bejeweled import apply_bejeweled_rule
+from examples.tetris import apply_tetris_rule
+from profiling import RollingHistogram
+
+
+def _play(board, tick_count):
+    for tick in range(tick_count):
+        board.queue_input(DirectionButton.DOWN, time_ms=tick * 100)
+        board.update(tick * 100)
+
+
+@pytest.mark.parametrize('apply_rules', [apply_bejeweled_rule, apply_tetris_rule])
+def test_profiled_update_reports_every_stage(apply_rules):
+    board = Board(height=20, width=8)
+    apply_rules(board, seed=0)
+    board.enable_profiling()
+    _play(board, 10)
+    assert not board.is_game_over()
+    summaries = board.get_profiler().get_stage_summaries()
+    assert set(summaries) == {'update', 'input', 'match', 'generate', 'move', 'gravity', 'game_condition'}
+    assert all(summary['count'] == 10 for summary in summaries.values())
+    assert type(board.get_tile_match_rule()).__name__ in board.get_profiler().get_rule_summaries()
+
+
+def test_profiled_cascade_update_reports_every_stage():
+    board = Board(height=10, width=8)
+    apply_bejeweled_rule(board, seed=0)
+    board.enable_cascade_resolution()
+    board.enable_profiling()
+    _play(board, 5)
+    summaries = board.get_profiler().get_stage_summaries()
+    assert set(summaries) == {'update', 'input', 'cascade', 'gravity', 'game_condition'}
+    assert all(summary['count'] == 5 for summary in summaries.values())
+
+
+def test_profiling_off_leaves_rules_unwrapped():
+    board = Board(height=10, width=8)
+    apply_bejeweled_rule(board, seed=0)
+    assert board._apply_rule is board_module._apply_rule
+    board.enable_profiling()
+    assert board._apply_rule is not board_module._apply_rule
+    board.disable_profiling()
+    assert board._apply_rule is board_module._apply_rule
+    assert board.get_profiler() is None
+
+
+def test_profiling_does_not_change_how_the_game_plays():
+    boards = [Board(height=10, width=8), Board(height=10, width=8)]
+    for board in boards:
+        apply_tetris_rule(board, seed=2)
+    boards[0].enable_profiling()
+    for board in boards:
+        _play(board, 60)
+    contents = [[[tuple(tile.get_elements()) for tile in board.get_tile_row(y)] for y in range(board.get_height())]
+                for board in boards]
+    assert contents[0] == contents[1]
+
+
+def test_rolling_histogram_keeps_only_the_recent_durations():
+    histogram = RollingHistogram(capacity=4)
+    for duration_ms in (100, 1, 2, 3, 4):
+        histogram.record(duration_ms * 1_000_000)
+    assert histogram.get_count() == 5
+    assert histogram.get_max_ms() == 4
+    assert histogram.get_percentile_ms(50) == 2
+    assert histogram.get_percentile_ms(100) == 4
+    assert histogram.get_percentile_ms(0) == 1
+    with pytest.raises(ValueError):
+        histogram.get_percentile_ms(101)
+    with pytest.raises(ValueError):
+        RollingHistogram(capacity=0)
+    assert RollingHistogram().get_summary() == {'count': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
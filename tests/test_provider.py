@@ -0,0 +1,165 @@
+import pytest
+
+from helpers import GEMS
+from provider import (UniformRandomElementProvider, WeightedRandomElementProvider,
+                      RandomRepeatingQueueElementProvider, derive_seed)
+
+
+def _make_uniform(seed):
+    provider = UniformRandomElementProvider(seed=seed, lookahead=4)
+    for gem in GEMS:
+        provider.add_choice(gem)
+    return provider
+
+
+def _make_weighted(seed):
+    provider = WeightedRandomElementProvider(seed=seed, lookahead=4)
+    for gem, weight in zip(GEMS, (10, 20, 30, 40)):
+        provider.add_choice(option=gem, weight=weight)
+    return provider
+
+
+def _make_queue(seed):
+    provider = RandomRepeatingQueueElementProvider(seed=seed, lookahead=4)
+    for gem in GEMS:
+        provider.add_choice(gem)
+    return provider
+
+
+_MAKE_PROVIDERS = [_make_uniform, _make_weighted, _make_queue]
+
+
+def _names(elements):
+    return [element.element_name for element in elements]
+
+
+@pytest.mark.parametrize('make_provider', _MAKE_PROVIDERS)
+def test_same_seed_provides_the_same_sequence(make_provider):
+    first, second, other = make_provider(7), make_provider(7), make_provider(8)
+    sequence = _names(first.provide() for _ in range(50))
+    assert sequence == _names(second.provide() for _ in range(50))
+    assert sequence != _names(other.provide() for _ in range(50))
+
+
+@pytest.mark.parametrize('make_provider', _MAKE_PROVIDERS)
+def test_set_seed_restarts_the_sequence(make_provider):
+    provider = make_provider(7)
+    provider.peek(3)
+    provider.set_seed(7)
+    reference = make_provider(1)
+    reference.set_seed(7)
+    assert _names(provider.provide() for _ in range(20)) == _names(reference.provide() for _ in range(20))
+
+
+@pytest.mark.parametrize('make_provider', _MAKE_PROVIDERS)
+def test_peeked_choices_are_provided_next_in_order(make_provider):
+    provider, reference = make_provider(3), make_provider(3)
+    peeked = _names(provider.peek(3))
+    # looking again does not draw any further
+    assert _names(provider.peek(2)) == peeked[:2]
+    assert _names(provider.peek(4))[:3] == peeked
+    assert _names(provider.provide() for _ in range(3)) == peeked
+    # peeking does not change what comes after
+    assert _names(provider.provide() for _ in range(20)) == _names(reference.provide() for _ in range(23))[3:]
+
+
+@pytest.mark.parametrize('make_provider', _MAKE_PROVIDERS)
+def test_peek_is_limited_to_the_lookahead(make_provider):
+    with pytest.raises(ValueError):
+        make_provider(0).peek(5)
+
+
+@pytest.mark.parametrize('make_provider', _MAKE_PROVIDERS)
+@pytest.mark.parametrize('peeked', [0, 2, 4])
+@pytest.mark.parametrize('count', [0, 1, 3, 40])
+def test_provide_many_is_the_same_as_providing_one_at_a_time(make_provider, peeked, count):
+    provider, reference = make_provider(11), make_provider(11)
+    if peeked:
+        provider.peek(peeked)
+        reference.peek(peeked)
+    assert _names(provider.provide_many(count)) == _names(reference.provide() for _ in range(count))
+    assert _names(provider.provide_many(5)) == _names(reference.provide() for _ in range(5))
+
+
+def test_provide_many_needs_a_count_of_at_least_zero():
+    with pytest.raises(ValueError):
+        _make_uniform(0).provide_many(-1)
+
+
+@pytest.mark.parametrize('make_provider', _MAKE_PROVIDERS)
+def test_restored_state_provides_the_same_sequence(make_provider):
+    provider = make_provider(5)
+    provider.provide_many(6)
+    provider.peek(2)
+    state = provider.save_state()
+    sequence = _names(provider.provide() for _ in range(30))
+    provider.restore_state(state)
+    assert _names(provider.provide() for _ in range(30)) == sequence
+
+
+def test_empty_provider_raises():
+    with pytest.raises(ValueError):
+        UniformRandomElementProvider(seed=0).provide()
+    with pytest.raises(ValueError):
+        RandomRepeatingQueueElementProvider(seed=0).provide()
+
+
+def test_derived_seeds_are_stable_and_independent():
+    assert derive_seed(1, 0) == derive_seed(1, 0)
+    assert len({derive_seed(1, 0), derive_seed(1, 1), derive_seed(2, 0)}) == 3
+    assert 0 <= derive_seed(1, 0) < 2 ** 64
+
+
+def _get_table_chances(provider):
+    """
+    The chance of every option of a weighted provider, read back from its alias table
+    """
+    options, probabilities, aliases = provider._options, provider._probabilities, provider._aliases
+    chances = [0.0] * len(options)
+    for slot, probability in enumerate(probabilities):
+        chances[slot] += probability / len(options)
+        chances[aliases[slot]] += (1 - probability) / len(options)
+    return chances
+
+
+@pytest.mark.parametrize('weights', [(100,), (50, 50), (10, 20, 30, 40), (0, 25, 0, 75), (1, 1, 98), (0, 100)])
+def test_alias_table_matches_the_weights(weights):
+    provider = WeightedRandomElementProvider(seed=0)
+    for gem, weight in zip(GEMS, weights):
+        provider.add_choice(option=gem, weight=weight)
+    assert _get_table_chances(provider) == pytest.approx([weight / 100 for weight in weights])
+
+    sample_count = 20000
+    samples = _names(provider.provide_many(sample_count))
+    for gem, weight in zip(GEMS, weights):
+        count = samples.count(gem.element_name)
+        if weight == 0:
+            assert count == 0
+        else:
+            assert count == pytest.approx(sample_count * weight / 100, rel=0.1)
+
+
+def test_alias_table_is_rebuilt_after_adding_a_choice():
+    provider = WeightedRandomElementProvider(seed=0)
+    provider.add_choice(option=GEMS[0], weight=40)
+    assert _get_table_chances(provider) == pytest.approx([1.0])
+    provider.add_choice(option=GEMS[1], weight=60)
+    assert _get_table_chances(provider) == pytest.approx([0.4, 0.6])
+    assert set(_names(provider.provide_many(200))) == {GEMS[0].element_name, GEMS[1].element_name}
+
+
+def test_weights_need_to_add_up_to_a_hundred():
+    provider = WeightedRandomElementProvider(seed=0)
+    provider.add_choice(option=GEMS[0], weight=0)
+    provider.add_choice(option=GEMS[1], weight=0)
+    with pytest.raises(ValueError):
+        provider.provide()
+    with pytest.raises(ValueError):
+        provider.provide_many(3)
+    provider.add_choice(option=GEMS[2], weight=60)
+    with pytest.raises(ValueError):
+        provider.provide()
+    with pytest.raises(ValueError):
+        provider.add_choice(option=GEMS[3], weight=50)
+    with pytest.raises(ValueError):
+        provider.add_choice(option=GEMS[3], weight=-1)
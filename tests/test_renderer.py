@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from board import Board
+from button_controller import DirectionButton, ActionButton
+from examples.bejeweled import apply_bejeweled_rule
+from examples.tetris import apply_tetris_rule
+from renderer import BoardRenderer
+from simulation import HeadlessGame
+
+_SIZE = 300
+
+
+class _FakeCanvas:
+    """
+    Keeps the items of a canvas in drawing order, without a window
+    """
+    def __init__(self):
+        self.items = {}
+        self._next_item = 0
+
+    def __getattr__(self, name):
+        if not name.startswith('create_'):
+            raise AttributeError(name)
+
+        def create(*coordinates, tags=(), **options):
+            self._next_item += 1
+            tags = (tags,) if isinstance(tags, str) else tuple(tags)
+            self.items[self._next_item] = [name[len('create_'):], _round(coordinates), options, set(tags)]
+            return self._next_item
+        return create
+
+    def delete(self, tag_or_item):
+        for item in self._find(tag_or_item):
+            del self.items[item]
+
+    def tag_raise(self, tag):
+        for item in self._find(tag):
+            self.items[item] = self.items.pop(item)
+
+    def coords(self, item, *coordinates):
+        self.items[item][1] = _round(coordinates)
+
+    def itemconfigure(self, item, **options):
+        self.items[item][2] = {**self.items[item][2], **options}
+
+    def get_drawing(self):
+        """
+        :return: What every item looks like, with the grid first and then everything else in no specific order
+        """
+        looks = [(kind, coordinates, sorted(options.items())) for kind, coordinates, options, _ in self.items.values()]
+        grid_size = sum('grid' in tags for *_, tags in self.items.values())
+        return looks[:grid_size], sorted(map(repr, looks[grid_size:]))
+
+    def get_layers(self):
+        layers = ('game_over', 'cursor', 'live')
+        return [next((len(layers) - i for i, layer in enumerate(layers) if layer in tags), 0)
+                for *_, tags in self.items.values() if 'grid' not in tags]
+
+    def _find(self, tag_or_item):
+        if isinstance(tag_or_item, int):
+            return [tag_or_item] if tag_or_item in self.items else []
+        return [item for item, (*_, tags) in self.items.items() if tag_or_item in tags]
+
+
+def _round(coordinates):
+    if len(coordinates) == 1:
+        coordinates = coordinates[0]
+    return tuple(round(value, 3) for value in coordinates)
+
+
+def _draw_from_scratch(board):
+    canvas = _FakeCanvas()
+    renderer = BoardRenderer(board, canvas, width=_SIZE, height=_SIZE)
+    renderer.render()
+    renderer.detach()
+    return canvas
+
+
+@pytest.mark.parametrize('apply_rules', [apply_bejeweled_rule, apply_tetris_rule])
+@pytest.mark.parametrize('seed', range(2))
+def test_incremental_frames_match_frames_drawn_from_scratch(apply_rules, seed):
+    game = HeadlessGame()
+    board = Board(height=10, width=8)
+    apply_rules(board, seed=seed)
+    game.add_board(board)
+    canvas = _FakeCanvas()
+    renderer = BoardRenderer(board, canvas, width=_SIZE, height=_SIZE)
+    rng = random.Random(seed)
+    buttons = sorted(DirectionButton.as_set() | ActionButton.as_set(), key=str)
+    for _ in range(100):
+        game.press(rng.choice(buttons), board_index=0)
+        game.tick()
+        renderer.render()
+        assert canvas.get_drawing() == _draw_from_scratch(board).get_drawing()
+        assert canvas.get_layers() == sorted(canvas.get_layers())
+
+
+def test_detached_renderer_stops_listening():
+    board = Board(height=4, width=4)
+    apply_bejeweled_rule(board, seed=0)
+    listener_count = len(board._tile_change_listeners)
+    renderer = BoardRenderer(board, _FakeCanvas(), width=_SIZE, height=_SIZE)
+    assert len(board._tile_change_listeners) == listener_count + 1
+    renderer.detach()
+    assert len(board._tile_change_listeners) == listener_count
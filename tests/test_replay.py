@@ -0,0 +1,62 @@
+import io
+import random
+
+import pytest
+
+from board import Board
+from button_controller import DirectionButton, ActionButton
+from examples.bejeweled import apply_bejeweled_rule
+from examples.tetris import apply_tetris_rule
+from helpers import get_contents
+from replay import InputRecorder, InputLogReplay, replay_input_log
+from simulation import HeadlessGame, ScriptedInput, ScriptedInputSource
+
+
+def _get_live_tiles(board):
+    if not board.has_live_tiles():
+        return None
+    return sorted((pair.coordinate.x, pair.coordinate.y, pair.element.element_name)
+                  for pair in board.get_live_tiles().get_element_pairs())
+
+
+def _play(apply_rules, seed, inputs, tick_count):
+    game = HeadlessGame(update_interval=50)
+    for _ in range(2):
+        board = Board(height=12, width=8)
+        apply_rules(board, seed=seed)
+        game.add_board(board)
+    game.add_input_source(ScriptedInputSource(inputs))
+    game.run(max_ticks=tick_count, stop_on_game_over=False)
+    return game
+
+
+@pytest.mark.parametrize('apply_rules', [apply_bejeweled_rule, apply_tetris_rule])
+@pytest.mark.parametrize('seed', range(3))
+def test_replayed_game_matches_the_recorded_game(apply_rules, seed):
+    rng = random.Random(seed)
+    buttons = sorted(DirectionButton.as_set() | ActionButton.as_set(), key=str)
+    tick_count = 200
+    inputs = sorted((ScriptedInput(time_ms=rng.randrange(tick_count) * 50, board_index=rng.randrange(2),
+                                   button=rng.choice(buttons)) for _ in range(300)), key=lambda i: i.time_ms)
+    log = io.StringIO()
+    recorder = InputRecorder(log, seed=seed, update_interval=50)
+    for scripted_input in inputs:
+        recorder.record(scripted_input.time_ms, scripted_input.board_index, scripted_input.button)
+    recorder.close(tick_count * 50)
+    recorded_game = _play(apply_rules, seed, inputs, tick_count)
+
+    log.seek(0)
+    replay = InputLogReplay(log)
+    boards = []
+    for _ in range(2):
+        board = Board(height=12, width=8)
+        apply_rules(board, seed=replay.get_seed())
+        boards.append(board)
+    replayed_game = replay_input_log(replay, boards)
+
+    assert replayed_game.get_tick_count() == recorded_game.get_tick_count()
+    for index in range(2):
+        assert replayed_game.get_score(index) == recorded_game.get_score(index)
+        assert get_contents(replayed_game.get_board(index)) == get_contents(recorded_game.get_board(index))
+        assert _get_live_tiles(replayed_game.get_board(index)) == _get_live_tiles(recorded_game.get_board(index))
+        assert replayed_game.get_board(index).is_game_over() == recorded_game.get_board(index).is_game_over()
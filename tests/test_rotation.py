@@ -0,0 +1,147 @@
+import random
+
+import pytest
+
+from bitboard import RowOccupancy
+from board_elements import BoardElementSet, Coordinate, RelativeElementSet
+from button_controller import ActionButton
+from helpers import GEMS, STONE, make_random_board
+from input_rules import RotateLiveTilesRule
+from rotation import RotationTable, WALL_KICK_OFFSETS, get_shape
+
+
+def _random_relative_set(rng):
+    cells = {(rng.randrange(4), rng.randrange(4)) for _ in range(rng.randint(1, 6))}
+    element_set = RelativeElementSet()
+    for x, y in sorted(cells, key=lambda cell: rng.random()):
+        element_set.add_element(rng.choice(GEMS), Coordinate(x, y))
+    return element_set
+
+
+def _rotated_copy(element_set, clockwise):
+    rotated = RelativeElementSet()
+    for pair in element_set.get_element_pairs():
+        rotated.add_element(pair.element, pair.coordinate)
+    if clockwise:
+        rotated.rotate_clockwise()
+    else:
+        rotated.rotate_counterclockwise()
+    return rotated
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_table_rotations_match_rotating_the_set(seed):
+    rng = random.Random(seed)
+    element_set = _random_relative_set(rng)
+    rotation_table = RotationTable()
+    if seed % 2:
+        rotation_table.add_element_set(element_set)
+    for clockwise in (True, False):
+        shape, rotated = get_shape(element_set), element_set
+        for _ in range(4):
+            shape = rotation_table.get_rotated_shape(shape, clockwise=clockwise)
+            rotated = _rotated_copy(rotated, clockwise)
+            assert shape == get_shape(rotated)
+        assert shape == get_shape(element_set)
+
+
+def _brute_force_rotate(board, live_tiles, clockwise, kick_offsets):
+    relative = RelativeElementSet()
+    top_right = live_tiles.get_top_right()
+    for pair in live_tiles.get_element_pairs():
+        relative.add_element(pair.element, pair.coordinate - top_right)
+    rotated = _rotated_copy(relative, clockwise)
+    for kick_x, kick_y in kick_offsets:
+        cells = [(top_right.x + kick_x + pair.coordinate.x, top_right.y + kick_y + pair.coordinate.y, pair.element)
+                 for pair in rotated.get_element_pairs()]
+        if all(0 <= x < board.get_width() and 0 <= y < board.get_height() and
+               board.get_tile_at(board.get_coordinate(x, y)).can_move_through() for x, y, _ in cells):
+            return cells
+    return None
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_kicked_rotations_match_trying_every_offset(seed):
+    rng = random.Random(seed)
+    board = make_random_board(rng, 8, 6, fill=rng.random() * 0.5, elements=GEMS + [STONE])
+    if seed % 2:
+        board.set_row_occupancy(RowOccupancy(board))
+    live_tiles = BoardElementSet()
+    left, top = rng.randrange(5), rng.randrange(7)
+    for pair in _random_relative_set(rng).get_element_pairs():
+        x, y = min(left + pair.coordinate.x, 5), min(top + pair.coordinate.y, 7)
+        if not any(existing.coordinate == Coordinate(x, y) for existing in live_tiles.get_element_pairs()):
+            live_tiles.add_element(pair.element, Coordinate(x, y))
+    rotate_rule = RotateLiveTilesRule()
+    kick_offsets = ((0, 0),)
+    if seed % 3:
+        rotate_rule.set_kick_offsets(WALL_KICK_OFFSETS)
+        kick_offsets += WALL_KICK_OFFSETS
+
+    for event in (ActionButton.PRIMARY, ActionButton.SECONDARY):
+        board.set_live_tile(live_tiles)
+        expected = _brute_force_rotate(board, live_tiles, event is ActionButton.PRIMARY, kick_offsets)
+        rotate_rule.handle_input(board, event=event)
+        cells = [(pair.coordinate.x, pair.coordinate.y, pair.element)
+                 for pair in board.get_live_tiles().get_element_pairs()]
+        if expected is None:
+            assert board.get_live_tiles() is live_tiles
+        else:
+            assert cells == expected
+
+
+def _make_bar_board(width, stones, kick_offsets):
+    """
+    A board with a flat bar of three tiles in the top left of its second row, and stones at the given tiles
+    """
+    board = make_random_board(random.Random(0), 5, width, fill=0)
+    for x, y in stones:
+        board.get_tile_at(board.get_coordinate(x, y)).set_elements([STONE])
+    bar = BoardElementSet()
+    for x in range(3):
+        bar.add_element(GEMS[0], Coordinate(x, 1))
+    board.set_live_tile(bar)
+    rotate_rule = RotateLiveTilesRule()
+    rotate_rule.set_kick_offsets(kick_offsets)
+    return board, rotate_rule, bar
+
+
+def _get_live_cells(board):
+    return sorted((pair.coordinate.x, pair.coordinate.y) for pair in board.get_live_tiles().get_element_pairs())
+
+
+def test_rotation_which_fits_is_not_kicked():
+    board, rotate_rule, _ = _make_bar_board(5, [], [(1, 0)])
+    rotate_rule.handle_input(board, event=ActionButton.PRIMARY)
+    assert _get_live_cells(board) == [(0, 1), (0, 2), (0, 3)]
+
+
+def test_first_kick_which_fits_is_used():
+    board, rotate_rule, _ = _make_bar_board(5, [(0, 2), (1, 3)], [(1, 0), (2, 0), (3, 0)])
+    rotate_rule.handle_input(board, event=ActionButton.PRIMARY)
+    assert _get_live_cells(board) == [(2, 1), (2, 2), (2, 3)]
+
+
+def test_rotation_is_refused_when_every_kick_is_blocked():
+    board, rotate_rule, bar = _make_bar_board(5, [(0, 2), (1, 3)], [(1, 0)])
+    for event in (ActionButton.PRIMARY, ActionButton.SECONDARY):
+        rotate_rule.handle_input(board, event=event)
+        assert board.get_live_tiles() is bar
+
+
+def test_kick_off_the_board_is_refused():
+    board, rotate_rule, bar = _make_bar_board(3, [(0, 2)], [(-1, 0), (0, 3), (3, 0)])
+    rotate_rule.handle_input(board, event=ActionButton.PRIMARY)
+    assert board.get_live_tiles() is bar
+
+
+def test_rotation_on_a_one_column_board_is_refused():
+    board = make_random_board(random.Random(0), 5, 1, fill=0)
+    column = BoardElementSet()
+    for y in range(3):
+        column.add_element(GEMS[0], Coordinate(0, y))
+    board.set_live_tile(column)
+    rotate_rule = RotateLiveTilesRule()
+    rotate_rule.set_kick_offsets(WALL_KICK_OFFSETS)
+    rotate_rule.handle_input(board, event=ActionButton.PRIMARY)
+    assert board.get_live_tiles() is column
@@ -0,0 +1,116 @@
+import pytest
+
+from board import Board
+from clock import VirtualClock
+from examples.bejeweled import apply_bejeweled_rule
+from examples.tetris import apply_tetris_rule
+from gravity_rules import DownwardGravityRule
+from scheduler import FixedStepScheduler, get_step_ms
+
+
+def _make_scheduler(clock, *, step_ms=100, render_interval_ms=33, max_catch_up_steps=5):
+    scheduler = FixedStepScheduler(clock=clock, step_ms=step_ms, render_interval_ms=render_interval_ms,
+                                   max_catch_up_steps=max_catch_up_steps)
+    scheduler.start()
+    return scheduler
+
+
+def test_steps_are_taken_once_they_are_due():
+    clock = VirtualClock(1000)
+    scheduler = _make_scheduler(clock)
+    assert scheduler.take_due_steps() == [0]
+    assert scheduler.take_due_steps() == []
+    clock.advance(99)
+    assert scheduler.take_due_steps() == []
+    clock.advance(1)
+    assert scheduler.take_due_steps() == [100]
+    assert scheduler.get_simulation_time_ms() == 200
+
+
+def test_late_steps_are_caught_up_up_to_the_cap_and_the_rest_dropped():
+    clock = VirtualClock()
+    scheduler = _make_scheduler(clock, max_catch_up_steps=3)
+    assert scheduler.take_due_steps() == [0]
+    # steps at 100 to 1000 are due
+    clock.advance(1000)
+    assert scheduler.take_due_steps() == [100, 200, 300]
+    assert scheduler.get_dropped_step_count() == 7
+    # the simulation time only moves on by the steps which were taken
+    assert scheduler.get_simulation_time_ms() == 400
+    assert scheduler.take_due_steps() == []
+    clock.advance(100)
+    assert scheduler.take_due_steps() == [400]
+    assert scheduler.get_dropped_step_count() == 7
+
+
+def test_steps_which_are_caught_up_are_not_dropped():
+    clock = VirtualClock()
+    scheduler = _make_scheduler(clock, max_catch_up_steps=5)
+    scheduler.take_due_steps()
+    clock.advance(500)
+    assert scheduler.take_due_steps() == [100, 200, 300, 400, 500]
+    assert scheduler.get_dropped_step_count() == 0
+
+
+def test_delay_until_next_is_the_earlier_of_the_next_step_and_frame():
+    clock = VirtualClock()
+    scheduler = _make_scheduler(clock, step_ms=100, render_interval_ms=33)
+    assert scheduler.get_delay_until_next_ms() == 0
+    scheduler.take_due_steps()
+    assert scheduler.take_render_due()
+    assert scheduler.get_delay_until_next_ms() == 33
+    clock.advance(40)
+    assert scheduler.get_delay_until_next_ms() == 0
+    assert scheduler.take_render_due()
+    assert scheduler.get_delay_until_next_ms() == 26
+    clock.advance(60)
+    assert scheduler.take_due_steps() == [100]
+    # the frame due at 99 was late, so the next one is scheduled from now
+    assert scheduler.take_render_due()
+    assert scheduler.get_delay_until_next_ms() == 33
+
+
+def test_late_frames_are_drawn_once():
+    clock = VirtualClock()
+    scheduler = _make_scheduler(clock, render_interval_ms=33)
+    assert scheduler.take_render_due()
+    clock.advance(200)
+    assert scheduler.take_render_due()
+    assert not scheduler.take_render_due()
+    assert scheduler.get_delay_until_next_ms() == 0  # the step at 0 was never taken
+    scheduler.take_due_steps()
+    assert scheduler.get_delay_until_next_ms() == 33
+
+
+def test_scheduler_has_to_be_started():
+    scheduler = FixedStepScheduler(clock=VirtualClock(), step_ms=100, render_interval_ms=33)
+    with pytest.raises(RuntimeError):
+        scheduler.take_due_steps()
+
+
+@pytest.mark.parametrize('keyword', ['step_ms', 'render_interval_ms', 'max_catch_up_steps'])
+def test_scheduler_intervals_need_to_be_positive(keyword):
+    arguments = {'step_ms': 100, 'render_interval_ms': 33, 'max_catch_up_steps': 5, keyword: 0}
+    with pytest.raises(ValueError):
+        FixedStepScheduler(clock=VirtualClock(), **arguments)
+
+
+def test_virtual_clock_only_moves_forward():
+    clock = VirtualClock(5)
+    clock.advance(10)
+    assert clock.now_ms() == 15
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+
+
+def test_step_is_short_enough_for_every_gravity_rule():
+    tetris, bejeweled, slow = Board(height=10, width=5), Board(height=10, width=5), Board(height=10, width=5)
+    apply_tetris_rule(tetris)
+    apply_bejeweled_rule(bejeweled)
+    slow.set_gravity_rule(DownwardGravityRule(drop_interval=250))
+
+    assert get_step_ms(100, []) == 100
+    assert get_step_ms(100, [bejeweled]) == 100
+    assert get_step_ms(100, [tetris]) == tetris.get_gravity_rule().drop_interval == 50
+    assert get_step_ms(100, [slow]) == 50
+    assert get_step_ms(100, [slow, tetris, bejeweled]) == 50
@@ -0,0 +1,150 @@
+import random
+
+import pytest
+
+from board import Board, TileChangeListener
+from board_elements import BoardElementSet
+from helpers import GEMS, STONE, make_random_board, get_contents
+from shift_rules import ShiftDirection, ShiftLiveTilesRule, ShiftStaticTilesRule
+
+_STEPS = {
+    ShiftDirection.UP: (0, -1),
+    ShiftDirection.DOWN: (0, 1),
+    ShiftDirection.LEFT: (-1, 0),
+    ShiftDirection.RIGHT: (1, 0),
+}
+
+
+def _shift_one_tile_at_a_time(board, direction, shift_amount):
+    """
+    Moves tiles the way the shift rule did before it worked on whole lines
+    """
+    step_x, step_y = _STEPS[direction]
+    xs = range(board.get_width())
+    ys = range(board.get_height())
+    # start from the far end, so tiles which already moved are not moved again
+    if step_x > 0:
+        xs = reversed(xs)
+    if step_y > 0:
+        ys = reversed(ys)
+    cells = [(x, y) for y in ys for x in xs] if step_y else [(x, y) for x in xs for y in ys]
+    for x, y in cells:
+        for i in range(shift_amount):
+            source = board.get_coordinate(x + i * step_x, y + i * step_y)
+            target = board.get_coordinate(x + (i + 1) * step_x, y + (i + 1) * step_y)
+            if (not board.is_valid_coordinate(source) or not board.is_valid_coordinate(target) or
+                    board.get_tile_at(target).has_elements() or not board.get_tile_at(source).can_support_move()):
+                continue
+            board.swap_tile_contents(source, target)
+
+
+class _ChangeRecorder(TileChangeListener):
+    def __init__(self):
+        self.coordinates = set()
+
+    def on_tile_change(self, board, coordinate):
+        self.coordinates.add((coordinate.x, coordinate.y))
+
+
+def _copy_board(board):
+    copy = Board(height=board.get_height(), width=board.get_width())
+    for y in range(board.get_height()):
+        for tile, copied_tile in zip(board.get_tile_row(y), copy.get_tile_row(y)):
+            copied_tile.set_elements(tile.get_elements())
+    return copy
+
+
+def _make_rule(direction, shift_amount, *, settle_to_rest=False):
+    rule = ShiftStaticTilesRule()
+    rule.set_shift_direction(direction)
+    rule.set_shift_amount(shift_amount)
+    rule.enable_tile_movement()
+    if settle_to_rest:
+        rule.enable_settle_to_rest()
+    return rule
+
+
+@pytest.mark.parametrize('direction', list(ShiftDirection))
+@pytest.mark.parametrize('seed', range(40))
+def test_line_shifts_match_shifting_one_tile_at_a_time(seed, direction):
+    rng = random.Random(seed)
+    board = make_random_board(rng, rng.randint(1, 8), rng.randint(1, 8), fill=rng.random(),
+                              elements=GEMS + [STONE])
+    shift_amount = rng.randint(1, 3)
+    expected_board = _copy_board(board)
+    before = get_contents(board)
+    recorder = _ChangeRecorder()
+    board.add_tile_change_listener(recorder)
+
+    _shift_one_tile_at_a_time(expected_board, direction, shift_amount)
+    _make_rule(direction, shift_amount).move_tiles(board)
+
+    after = get_contents(board)
+    assert after == get_contents(expected_board)
+    # tiles which got contents looking the same as their own may be reported as well
+    assert recorder.coordinates >= {(x, y) for y, row in enumerate(after) for x, tile in enumerate(row)
+                                    if tile != before[y][x]}
+
+
+@pytest.mark.parametrize('direction', list(ShiftDirection))
+@pytest.mark.parametrize('seed', range(40))
+def test_settling_matches_shifting_until_nothing_moves(seed, direction):
+    rng = random.Random(seed)
+    board = make_random_board(rng, rng.randint(1, 8), rng.randint(1, 8), fill=rng.random(),
+                              elements=GEMS + [STONE])
+    expected_board = _copy_board(board)
+    while True:
+        contents = get_contents(expected_board)
+        _shift_one_tile_at_a_time(expected_board, direction, 1)
+        if get_contents(expected_board) == contents:
+            break
+
+    _make_rule(direction, 1, settle_to_rest=True).move_tiles(board)
+    assert get_contents(board) == get_contents(expected_board)
+
+
+def _make_live_board(stone_x, *, static_direction=None):
+    """
+    A 1 tall board with a live tile in its first column, and a stone in the given column
+    """
+    board = Board(height=1, width=6)
+    if stone_x is not None:
+        board.get_tile_at(board.get_coordinate(stone_x, 0)).set_elements([STONE])
+    if static_direction is not None:
+        board.set_static_tile_move_rule(_make_rule(static_direction, 1))
+    live_tiles = BoardElementSet()
+    live_tiles.add_element(GEMS[0], board.get_coordinate(0, 0))
+    board.set_live_tile(live_tiles)
+    rule = ShiftLiveTilesRule()
+    rule.set_shift_direction(ShiftDirection.RIGHT)
+    rule.set_shift_amount(3)
+    rule.enable_tile_movement()
+    return board, rule
+
+
+def _get_live_xs(board):
+    return [pair.coordinate.x for pair in board.get_live_tiles().get_element_pairs()]
+
+
+def test_live_tiles_shift_the_whole_amount():
+    board, rule = _make_live_board(None)
+    rule.move_tiles(board)
+    assert _get_live_xs(board) == [3]
+    rule.move_tiles(board)
+    # the board edge is in the way
+    assert _get_live_xs(board) == [3]
+
+
+@pytest.mark.parametrize('stone_x', [1, 2, 3])
+def test_blocked_live_tile_shift_is_refused_as_a_whole(stone_x):
+    board, rule = _make_live_board(stone_x)
+    rule.move_tiles(board)
+    assert _get_live_xs(board) == [0]
+    assert get_contents(board)[0][stone_x] == ('Stone',)
+
+
+def test_blocked_live_tiles_lock_where_they_are_when_shifted_the_way_static_tiles_move():
+    board, rule = _make_live_board(3, static_direction=ShiftDirection.RIGHT)
+    rule.move_tiles(board)
+    assert not board.has_live_tiles()
+    assert get_contents(board)[0][:4] == [(GEMS[0].element_name,), (), (), ('Stone',)]
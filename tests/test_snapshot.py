@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from bitboard import RowOccupancy
+from board import Board
+from button_controller import DirectionButton
+from examples.bejeweled import apply_bejeweled_rule
+from examples.tetris import apply_tetris_rule
+from helpers import GEMS, STONE, make_random_board, apply_random_edit, get_contents
+from swap_index import LegalSwapIndex, get_legal_swap_index
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_restoring_any_snapshot_brings_back_its_tiles(seed):
+    rng = random.Random(seed)
+    board = make_random_board(rng, rng.randint(1, 8), rng.randint(1, 8), elements=GEMS + [STONE])
+    board.set_row_occupancy(RowOccupancy(board))
+    swap_index = get_legal_swap_index(board, 3)
+    snapshots = []
+    for _ in range(100):
+        if rng.random() < 0.3:
+            snapshots.append((board.take_snapshot(), get_contents(board)))
+        if snapshots and rng.random() < 0.2:
+            snapshot, contents = rng.choice(snapshots)
+            board.restore_snapshot(snapshot)
+            assert get_contents(board) == contents
+            # listeners were told about every restored tile
+            rebuilt = RowOccupancy(board)
+            assert all(board.get_row_occupancy().get_occupied_mask(y) == rebuilt.get_occupied_mask(y)
+                       for y in range(board.get_height()))
+            assert set(swap_index.get_legal_swaps()) == set(LegalSwapIndex(board, 3).get_legal_swaps())
+        else:
+            apply_random_edit(board, rng)
+
+
+def _play(game_board, tick_count):
+    frames = []
+    for tick in range(tick_count):
+        game_board.update(tick * 100)
+        live_tiles = game_board.get_live_tiles()
+        frames.append((get_contents(game_board), game_board.is_game_over(),
+                       None if live_tiles is None else sorted((pair.coordinate.x, pair.coordinate.y)
+                                                              for pair in live_tiles.get_element_pairs())))
+    return frames
+
+
+@pytest.mark.parametrize('apply_rules', [apply_bejeweled_rule, apply_tetris_rule])
+@pytest.mark.parametrize('seed', range(3))
+def test_restored_board_plays_out_the_same(apply_rules, seed):
+    board = Board(height=10, width=8)
+    apply_rules(board, seed=seed)
+    _play(board, 20)
+    snapshot = board.take_snapshot()
+    frames = _play(board, 60)
+    board.restore_snapshot(snapshot)
+    # the generators continue from the state they were in, so the same tiles are generated again
+    assert _play(board, 60) == frames
+
+
+def test_restoring_a_snapshot_drops_queued_input():
+    board = Board(height=6, width=6)
+    apply_bejeweled_rule(board, seed=0)
+    snapshot = board.take_snapshot()
+    board.queue_input(DirectionButton.RIGHT, time_ms=0)
+    board.queue_input(DirectionButton.DOWN, time_ms=500)
+    board.restore_snapshot(snapshot)
+    assert not board.has_queued_inputs()
+    board.update(1000)
+    position = board.get_cursor().get_primary_position()
+    assert (position.x, position.y) == (0, 0)
+
+
+def test_restoring_a_snapshot_brings_back_the_last_cascade():
+    board = Board(height=8, width=8)
+    apply_bejeweled_rule(board, seed=1)
+    board.enable_cascade_resolution()
+    board.update(0)
+    cascade = board.get_last_cascade()
+    snapshot = board.take_snapshot()
+    for tick in range(1, 20):
+        board.update(tick * 100)
+    board.restore_snapshot(snapshot)
+    assert board.get_last_cascade() is cascade
+
+
+def test_change_count_keeps_counting_up_when_restoring():
+    board = Board(height=4, width=4)
+    apply_bejeweled_rule(board, seed=0)
+    snapshot = board.take_snapshot()
+    apply_random_edit(board, random.Random(0))
+    change_count = board.get_change_count()
+    board.restore_snapshot(snapshot)
+    # restoring changed the tiles back, which any earlier count has to see
+    assert board.get_change_count() > change_count
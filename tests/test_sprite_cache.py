@@ -0,0 +1,84 @@
+import pytest
+
+import sprite_cache
+from constants import Color
+from examples.bejeweled import Gem
+from examples.tetris import TetrisTile
+from sprite_cache import SpriteCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SpriteCache()
+    monkeypatch.setattr(sprite_cache, 'SPRITE_CACHE', cache)
+    return cache
+
+
+class _RecordingCanvas:
+    def __init__(self):
+        self.items = []
+
+    def __getattr__(self, name):
+        if not name.startswith('create_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.items.append((name[len('create_'):], args, kwargs)) or len(self.items)
+
+
+def test_sprites_are_shared_by_elements_which_look_the_same(cache):
+    first, second = Gem(name='GemRed', color=Color.RED), Gem(name='GemRed', color=Color.RED)
+    assert first.get_cell_sprite(0, 0, 20, 20) is second.get_cell_sprite(40, 60, 60, 80)
+    assert len(cache) == 1
+
+
+def test_sprite_key_includes_the_look_and_type(cache):
+    red_gem, blue_gem = Gem(name='GemRed', color=Color.RED), Gem(name='GemBlue', color=Color.BLUE)
+    red_tile = TetrisTile(name='GemRed', color=Color.RED)
+    sprites = {element.get_cell_sprite(0, 0, 20, 20) for element in (red_gem, blue_gem, red_tile)}
+    assert len(sprites) == 3 == len(cache)
+
+
+def test_sprite_key_includes_the_cell_size(cache):
+    gem = Gem(name='GemRed', color=Color.RED)
+    small, large = gem.get_cell_sprite(0, 0, 20, 20), gem.get_cell_sprite(0, 0, 40, 40)
+    assert small is not large
+    assert small.points != large.points
+    # cells of the same size which only differ by float rounding share a sprite
+    assert gem.get_cell_sprite(0.1, 0.2, 20.1, 20.2) is small
+    assert len(cache) == 2
+
+
+def test_invalidate_drops_only_the_given_cell_size(cache):
+    gem, tile = Gem(name='GemRed', color=Color.RED), TetrisTile(name='RedTile', color=Color.RED)
+    small = gem.get_cell_sprite(0, 0, 20, 20)
+    large = gem.get_cell_sprite(0, 0, 40, 40)
+    tile.get_cell_sprite(0, 0, 20, 20)
+
+    cache.invalidate((20, 20))
+    assert len(cache) == 1
+    assert gem.get_cell_sprite(0, 0, 40, 40) is large
+    rebuilt = gem.get_cell_sprite(0, 0, 20, 20)
+    assert rebuilt is not small and rebuilt == small
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_drawing_many_tiles_builds_one_sprite_and_draws_it_in_every_cell(cache):
+    gem = Gem(name='GemOrange', color=Color.ORANGE)
+    canvas = _RecordingCanvas()
+    for x in range(5):
+        for y in range(4):
+            gem.draw(canvas, x * 25, y * 25, x * 25 + 25, y * 25 + 25)
+    assert len(cache) == 1
+    assert len(canvas.items) == 20
+    # every item is the sprite moved to its cell
+    sprite = gem.get_cell_sprite(0, 0, 25, 25)
+    assert canvas.items[-1] == (sprite.item_type, tuple(sprite.get_coordinates(100, 75)), dict(sprite.options))
+
+
+def test_sprites_are_redrawn_only_when_the_item_type_and_option_names_match(cache):
+    red, blue = Gem(name='GemOrange', color=Color.RED), Gem(name='GemOrange', color=Color.BLUE)
+    square = TetrisTile(name='RedTile', color=Color.RED)
+    red_sprite, blue_sprite = red.get_cell_sprite(0, 0, 20, 20), blue.get_cell_sprite(0, 0, 20, 20)
+    assert blue_sprite.can_redraw(red_sprite)
+    assert not square.get_cell_sprite(0, 0, 20, 20).can_redraw(red_sprite)
@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from condition_rules import CheckIfMatchPossibleRule
+from helpers import GEMS, make_random_board, apply_random_edit
+from match_rules import MatchNOfColorRule
+from swap_index import get_legal_swap_index
+
+
+def _brute_legal_swaps(board, match_length):
+    width, height = board.get_width(), board.get_height()
+    masks = [[tile.get_color_mask() for tile in board.get_tile_row(y)] for y in range(height)]
+
+    def has_run_through(x, y):
+        for step_x, step_y in ((1, 0), (0, 1)):
+            for offset in range(match_length):
+                cells = [(x + (i - offset) * step_x, y + (i - offset) * step_y) for i in range(match_length)]
+                if all(0 <= cx < width and 0 <= cy < height for cx, cy in cells):
+                    common = -1
+                    for cx, cy in cells:
+                        common &= masks[cy][cx]
+                    if common:
+                        return True
+        return False
+
+    swaps = []
+    for y in range(height):
+        for x in range(width):
+            for x2, y2 in ((x + 1, y), (x, y + 1)):
+                if x2 >= width or y2 >= height:
+                    continue
+                first, second = board.get_coordinate(x, y), board.get_coordinate(x2, y2)
+                if not (board.get_tile_at(first).can_support_move() and board.get_tile_at(second).can_support_move()):
+                    continue
+                masks[y][x], masks[y2][x2] = masks[y2][x2], masks[y][x]
+                if has_run_through(x, y) or has_run_through(x2, y2):
+                    swaps.append((first, second))
+                masks[y][x], masks[y2][x2] = masks[y2][x2], masks[y][x]
+    return swaps
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_legal_swaps_follow_random_edits(seed):
+    rng = random.Random(seed)
+    board = make_random_board(rng, rng.randint(1, 9), rng.randint(1, 9), fill=0.8)
+    match_length = rng.randint(2, 4)
+    swap_index = get_legal_swap_index(board, match_length)
+    for _ in range(100):
+        for _ in range(rng.randint(1, 3)):
+            apply_random_edit(board, rng)
+        assert set(swap_index.get_legal_swaps()) == set(_brute_legal_swaps(board, match_length))
+        assert swap_index.has_legal_swaps() == bool(swap_index.get_legal_swaps())
+        assert swap_index.has_empty_tiles() == any(not board.get_tile_at(board.get_coordinate(x, y)).has_elements()
+                                                   for y in range(board.get_height())
+                                                   for x in range(board.get_width()))
+
+
+def test_condition_rule_follows_the_match_length_of_the_board():
+    board = make_random_board(random.Random(0), 6, 6)
+    match_rule = MatchNOfColorRule(3)
+    board.set_tile_match_rule(match_rule)
+    condition = CheckIfMatchPossibleRule()
+    listener_count = len(board._tile_change_listeners)
+
+    assert condition.get_swap_index(board).get_match_length() == 3
+    match_rule.set_match_length(4)
+    assert condition.get_swap_index(board).get_match_length() == 4
+    assert condition.get_swap_index(board) is board.get_legal_swap_index()
+    # the index built for the old length is no longer listening
+    assert len(board._tile_change_listeners) == listener_count + 1
+
+
+def _fill(board, colors):
+    """
+    :param colors: Index into GEMS of every tile, row by row, None for an empty tile
+    """
+    for y, row in enumerate(colors):
+        for x, color in enumerate(row):
+            board.get_tile_at(board.get_coordinate(x, y)).set_elements([] if color is None else [GEMS[color]])
+
+
+def _as_points(swaps):
+    return {((first.x, first.y), (second.x, second.y)) for first, second in swaps}
+
+
+def test_empty_board_has_no_legal_swaps():
+    board = make_random_board(random.Random(0), 4, 4, fill=0)
+    swap_index = get_legal_swap_index(board, 3)
+    assert swap_index.get_legal_swaps() == []
+    assert not swap_index.has_legal_swaps()
+    assert swap_index.has_empty_tiles()
+
+
+@pytest.mark.parametrize('transpose', [False, True])
+def test_single_line_board(transpose):
+    colors = [[0, 0, 1, 0]]
+    board = make_random_board(random.Random(0), 4 if transpose else 1, 1 if transpose else 4, fill=0)
+    _fill(board, [list(column) for column in zip(*colors)] if transpose else colors)
+    expected = {((2, 0), (3, 0))}
+    if transpose:
+        expected = {((y1, x1), (y2, x2)) for (x1, y1), (x2, y2) in expected}
+    assert _as_points(get_legal_swap_index(board, 3).get_legal_swaps()) == expected
+    assert _as_points(_brute_legal_swaps(board, 3)) == expected
+    assert not get_legal_swap_index(board, 4).has_legal_swaps()
+
+
+@pytest.mark.parametrize('height, width', [(1, 1), (2, 2), (1, 3)])
+def test_match_length_larger_than_the_board_has_no_legal_swaps(height, width):
+    board = make_random_board(random.Random(0), height, width, fill=0)
+    _fill(board, [[0] * width for _ in range(height)])
+    swap_index = get_legal_swap_index(board, max(height, width) + 1)
+    assert not swap_index.has_legal_swaps()
+    assert not swap_index.has_empty_tiles()
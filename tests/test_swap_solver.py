@@ -0,0 +1,129 @@
+import pytest
+
+from board import Board
+from examples.bejeweled import apply_bejeweled_rule
+from helpers import GEMS, get_contents
+from match_rules import MatchNOfColorRule
+from rules import MatchEventRule
+from swap_solver import SwapSolver
+
+_MAX_CASCADE_DEPTH = 4
+
+
+class _MatchCounter(MatchEventRule):
+    def __init__(self):
+        self.match_count = 0
+        self.cleared_tiles = 0
+
+    def trigger(self, board, coordinates):
+        self.match_count += 1
+        self.cleared_tiles += len(coordinates)
+
+
+def _make_settled_board(seed, *, resolve_cascades):
+    board = Board(height=8, width=8)
+    apply_bejeweled_rule(board, seed=seed)
+    if resolve_cascades:
+        board.enable_cascade_resolution()
+    counter = _MatchCounter()
+    board.add_match_event_rule(counter)
+    tick = 0
+    while not board.get_dirty_region().is_empty():
+        board.update(tick * 100)
+        tick += 1
+    return board, counter
+
+
+def _play_out_every_swap(board, counter):
+    """
+    :return: (cascade depth, cleared tiles) of every swap which makes a match, played out on the board itself
+    """
+    snapshot = board.take_snapshot()
+    outcomes = {}
+    for y in range(board.get_height()):
+        for x in range(board.get_width()):
+            for x2, y2 in ((x + 1, y), (x, y + 1)):
+                if x2 >= board.get_width() or y2 >= board.get_height():
+                    continue
+                first, second = board.get_coordinate(x, y), board.get_coordinate(x2, y2)
+                if not (board.get_tile_at(first).can_support_move() and board.get_tile_at(second).can_support_move()):
+                    continue
+                board.restore_snapshot(snapshot)
+                counter.match_count = counter.cleared_tiles = 0
+                board.swap_tile_contents(first, second)
+                if board.is_cascade_resolution_enabled():
+                    board.resolve_cascade(max_chain_depth=_MAX_CASCADE_DEPTH)
+                else:
+                    while not board.get_dirty_region().is_empty() and counter.match_count < _MAX_CASCADE_DEPTH:
+                        board._try_apply_match_rule()
+                        board._try_apply_generate_rule()
+                        board._try_apply_move_rules()
+                if counter.match_count > 0:
+                    outcomes[(first, second)] = (counter.match_count, counter.cleared_tiles)
+    board.restore_snapshot(snapshot)
+    return outcomes
+
+
+@pytest.mark.parametrize('resolve_cascades', [False, True])
+@pytest.mark.parametrize('seed', range(10))
+def test_solver_matches_swaps_played_out_on_the_board(seed, resolve_cascades):
+    board, counter = _make_settled_board(seed, resolve_cascades=resolve_cascades)
+    evaluations = SwapSolver(max_cascade_depth=_MAX_CASCADE_DEPTH).evaluate_swaps(board)
+    assert evaluations
+    assert {(evaluation.first, evaluation.second): (evaluation.cascade_depth, evaluation.cleared_tiles)
+            for evaluation in evaluations} == _play_out_every_swap(board, counter)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_solver_leaves_the_board_as_it_was(seed):
+    board, _ = _make_settled_board(seed, resolve_cascades=False)
+    listener_count = len(board._tile_change_listeners)
+    snapshot = board.take_snapshot()
+    contents = get_contents(board)
+    SwapSolver().find_best_swap(board)
+    assert get_contents(board) == contents
+    assert len(board._tile_change_listeners) == listener_count
+
+    # the generator was left where it was, so the board plays out the same as from the snapshot
+    frames = []
+    for tick in range(20):
+        board.update(tick * 100)
+        frames.append(get_contents(board))
+    board.restore_snapshot(snapshot)
+    for tick in range(20):
+        board.update(tick * 100)
+        assert get_contents(board) == frames[tick]
+
+
+def _make_line_board(colors):
+    """
+    :param colors: Index into GEMS of every tile of a one row board
+    """
+    board = Board(height=1, width=len(colors))
+    board.set_tile_match_rule(MatchNOfColorRule(3))
+    for x, color in enumerate(colors):
+        board.get_tile_at(board.get_coordinate(x, 0)).set_elements([GEMS[color]])
+    return board
+
+
+def test_solver_on_a_one_row_board():
+    board = _make_line_board([0, 0, 1, 0, 2])
+    best = SwapSolver(max_cascade_depth=_MAX_CASCADE_DEPTH).find_best_swap(board)
+    assert ((best.first.x, best.first.y), (best.second.x, best.second.y)) == ((2, 0), (3, 0))
+    assert (best.cascade_depth, best.cleared_tiles) == (1, 3)
+    assert get_contents(board) == [[(GEMS[color].element_name,) for color in (0, 0, 1, 0, 2)]]
+
+
+def test_solver_without_any_match_finds_nothing():
+    board = _make_line_board([0, 1, 0, 1])
+    assert SwapSolver().evaluate_swaps(board) == []
+    assert SwapSolver().find_best_swap(board) is None
+
+    empty = Board(height=4, width=4)
+    empty.set_tile_match_rule(MatchNOfColorRule(3))
+    assert SwapSolver().find_best_swap(empty) is None
+
+
+def test_solver_needs_a_match_rule():
+    with pytest.raises(ValueError):
+        SwapSolver().evaluate_swaps(Board(height=2, width=2))
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from async_host import OutputSink, QueuedInputSource
+from button_controller import DirectionButton, ActionButton
+
+if TYPE_CHECKING:
+    import tkinter as tk
+    from typing import List, Optional
+    from async_host import AsyncGameHost
+    from button_controller import ButtonController
+    from game import BoardWindow
+
+
+class TkSink(OutputSink):
+    """
+    Shows the boards of an AsyncGameHost in a Tk window, the same way Game does, and feeds the
+    presses of its controllers to the host. Tk events are handled whenever a frame is drawn,
+    so there is no mainloop and the host's event loop is never blocked.
+    Closing the window stops the host
+
+    Note:
+        tkinter is only imported once a sink is made, so the host can be used without it
+    """
+
+    def __init__(self, *, title: str = "Tile Matching Game"):
+        import tkinter as tk
+
+        self._window = tk.Tk()
+        self._window.title(title)
+        self._window.protocol("WM_DELETE_WINDOW", self._on_window_closed)
+        self._host: Optional[AsyncGameHost] = None
+        self._boards: List[BoardWindow] = []
+        self._score_labels: List[tk.Label] = []
+        self._controllers: List[ButtonController] = []
+        self._inputs = QueuedInputSource()
+        self._is_closed = False
+
+    def get_window(self) -> tk.Tk:
+        return self._window
+
+    def bind(self, controller: ButtonController, *, board_index: int):
+        """
+        Queue the presses of a controller for a board of the host, they are applied right before its next update
+        """
+        self._controllers.append(controller)
+        for button in DirectionButton.as_set() | ActionButton.as_set():
+            controller.on_button(button=button, fn=lambda event: self._inputs.put(event, board_index=board_index))
+
+    async def on_start(self, host: AsyncGameHost):
+        from game import make_board_window
+
+        self._host = host
+        host.add_input_source(self._inputs)
+        for board in host.get_boards():
+            board_window, score_label = make_board_window(self._window, board, column=len(self._boards))
+            self._boards.append(board_window)
+            self._score_labels.append(score_label)
+        for controller in self._controllers:
+            controller.start_controller()
+        self._window.update()
+
+    async def on_tick(self, host: AsyncGameHost, simulation_time_ms: int):
+        pass
+
+    async def on_frame(self, host: AsyncGameHost):
+        if self._is_closed:
+            return
+        for board_window, score_label in zip(self._boards, self._score_labels):
+            board_window.renderer.render()
+            score_label.config(text=f"Score: {host.scores[board_window.board]}")
+        # Handle key presses and window events, which may close the window
+        self._window.update()
+
+    async def close(self):
+        if not self._is_closed:
+            self._destroy_window()
+
+    def _on_window_closed(self):
+        if self._host is not None:
+            self._host.stop()
+        self._destroy_window()
+
+    def _destroy_window(self):
+        self._is_closed = True
+        for board_window in self._boards:
+            board_window.renderer.detach()
+        self._window.destroy()